@@ -6,6 +6,7 @@ class Settings(BaseSettings):
     LLAMA_CPP_SERVER_URL: str = "http://localhost:8080"
     LLAMA_MODEL_NAME: str = "default"
     AI_PROVIDER: str = "llamacpp"  # Default provider
+    LLM_CACHE_PATH: str = ""  # SQLite file that keeps generated content across restarts; empty = memory only
 
     # Database (SQLite for local dev)
     DATABASE_URL: str = "sqlite:///./postfarm.db"
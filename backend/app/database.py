@@ -1,30 +1,103 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 import os
 
 # Database URL - using SQLite for local development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./postfarm.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Async drivers used for request handlers, keyed by backend name
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def _to_async_url(url: str):
+    """Swap the sync driver in a database URL for its async counterpart"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    return parsed.set(drivername=driver) if driver else parsed
+
+
+def _async_pool_options(url) -> dict:
+    """
+    Pool settings for the async engine.
+
+    aiosqlite defaults to NullPool for file databases, which reopens the
+    file (and drops SQLite's page cache) on every request. Keep a pool of
+    warm connections instead. In-memory databases keep their StaticPool.
+    """
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
+
+ASYNC_DATABASE_URL = _to_async_url(DATABASE_URL)
+
+_connect_args = {"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+
+# Sync engine: table creation/seeding at startup and background services
+engine = create_engine(DATABASE_URL, connect_args=_connect_args)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: request handlers, so DB I/O doesn't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    connect_args=_connect_args,
+    # Room for every statement shape the routers build (filters, cursor
+    # pages, upserts) so hot queries never fall out and get recompiled
+    query_cache_size=1200,
+    **_async_pool_options(ASYNC_DATABASE_URL),
+)
+
+if async_engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so pooled readers don't block the writer, once per connection"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+# INSERT construct with ON CONFLICT support for the configured backend
+if async_engine.dialect.name == "postgresql":
+    from sqlalchemy.dialects.postgresql import insert as upsert_insert
+else:
+    from sqlalchemy.dialects.sqlite import insert as upsert_insert
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def init_db():
     from app.models import Draft, ScheduledPost, PlatformConfig, AIProviderConfig, PlatformType
     Base.metadata.create_all(bind=engine)
 
+    # create_all skips tables that already exist, so add indexes that were
+    # introduced after a table was first created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
     # Seed default platforms if they don't exist
     db = SessionLocal()
     try:
@@ -44,4 +117,3 @@ def init_db():
             print("✅ Seeded default platforms: Twitter, LinkedIn")
     finally:
         db.close()
-
@@ -5,14 +5,20 @@ This module provides a wrapper around the Supabase Python client,
 handling connection management and providing typed query builders.
 """
 
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone
 from functools import lru_cache
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
 from supabase import Client, create_client
 
 from app.config import settings
+from app.utils.cache import TTLCache
+
+# Secrets by (user_id, secret_type), so repeat posts skip the Supabase round
+# trip; upsert_secret and delete_secret invalidate their key
+_secret_cache = TTLCache(ttl_seconds=30)
 
 
 @lru_cache()
@@ -32,9 +38,47 @@ def get_supabase_client() -> Client:
     return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
 
 
+async def _execute(query):
+    """
+    Execute a query builder without blocking the event loop.
+
+    The sync client does blocking HTTP in execute(), so it runs in a worker
+    thread; this is what lets independent queries overlap under gather.
+    """
+    return await asyncio.to_thread(query.execute)
+
+
+def _expiry_epoch(expires_at: Optional[str]) -> Optional[float]:
+    """Parse a stored ISO expiry into epoch seconds; naive values are UTC."""
+    if not expires_at:
+        return None
+    parsed = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _after_position(query, column: str, after: Optional[Tuple[str, str]]):
+    """
+    Restrict a query ordered by (column, id) to rows past a keyset position.
+
+    `after` is the (column value, id) pair of the last row already returned,
+    as PostgREST rendered them.
+    """
+    if not after:
+        return query
+    value, row_id = after
+    return query.or_(
+        f'{column}.gt."{value}",and({column}.eq."{value}",id.gt.{row_id})'
+    )
+
+
 class DraftRepository:
     """Repository for draft operations in Supabase."""
 
+    # Client-writable draft fields
+    FIELDS = ("title", "content", "prompt", "tags", "confirmed", "scheduled_at")
+
     def __init__(self, client: Optional[Client] = None):
         self.client = client or get_supabase_client()
         self.table = "drafts"
@@ -43,13 +87,12 @@ class DraftRepository:
         self, user_id: str, skip: int = 0, limit: int = 100
     ) -> List[Dict[str, Any]]:
         """List all drafts for a user."""
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .select("*")
             .eq("user_id", user_id)
             .order("created_at", desc=True)
             .range(skip, skip + limit - 1)
-            .execute()
         )
 
         return response.data
@@ -57,19 +100,33 @@ class DraftRepository:
     async def get_by_id(self, draft_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific draft by ID, scoped to user."""
         try:
-            response = (
+            response = await _execute(
                 self.client.table(self.table)
                 .select("*")
                 .eq("id", draft_id)
                 .eq("user_id", user_id)
                 .limit(1)
-                .execute()
             )
 
             return response.data[0] if response.data and len(response.data) > 0 else None
         except Exception:
             return None
 
+    async def exists(self, draft_id: str, user_id: str) -> bool:
+        """Check a draft exists for the user without fetching its content."""
+        try:
+            response = await _execute(
+                self.client.table(self.table)
+                .select("id")
+                .eq("id", draft_id)
+                .eq("user_id", user_id)
+                .limit(1)
+            )
+
+            return bool(response.data)
+        except Exception:
+            return False
+
     async def create(
         self, user_id: str, data: Dict[str, Any], draft_id: Optional[str] = None
     ) -> Dict[str, Any]:
@@ -88,13 +145,62 @@ class DraftRepository:
         if draft_id:
             draft_data["id"] = draft_id
 
-        response = self.client.table(self.table).insert(draft_data).execute()
+        response = await _execute(self.client.table(self.table).insert(draft_data))
 
         if not response.data:
             raise ValueError("Failed to create draft")
 
         return response.data[0]
 
+    async def upsert(
+        self,
+        user_id: str,
+        draft_id: str,
+        data: Dict[str, Any],
+        client_updated_at: Optional[datetime] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Create a draft, or update it if the ID already exists, in one call.
+
+        Uses the upsert_draft function (migrations/007_upsert_draft.sql).
+        Returns the draft and whether it was inserted. Raises ConflictError
+        if the server version is newer than client_updated_at.
+        """
+        fields = {key: data[key] for key in self.FIELDS if key in data}
+        response = await _execute(
+            self.client.rpc(
+                "upsert_draft",
+                {
+                    "p_id": draft_id,
+                    "p_user_id": user_id,
+                    "p_data": fields,
+                    "p_client_updated_at": (
+                        client_updated_at.isoformat() if client_updated_at else None
+                    ),
+                },
+            )
+        )
+
+        if response.data:
+            row = response.data[0]
+            return row["draft"], row["inserted"]
+
+        # The update was skipped: newer on the server, or another user's ID
+        existing = await _execute(
+            self.client.table(self.table)
+            .select("updated_at")
+            .eq("id", draft_id)
+            .eq("user_id", user_id)
+            .limit(1)
+        )
+        if not existing.data:
+            raise ValueError("Draft not found")
+
+        raise ConflictError(
+            "Draft was modified on another device",
+            server_updated_at=existing.data[0]["updated_at"],
+        )
+
     async def update(
         self,
         draft_id: str,
@@ -110,43 +216,38 @@ class DraftRepository:
         """
         # Check for conflicts if client_updated_at provided
         if client_updated_at:
-            try:
-                existing = (
-                    self.client.table(self.table)
-                    .select("updated_at")
-                    .eq("id", draft_id)
-                    .eq("user_id", user_id)
-                    .limit(1)
-                    .execute()
-                )
+            # Only an empty result means "not found"; API errors propagate
+            # with their own type instead of being reported as a missing draft
+            existing = await _execute(
+                self.client.table(self.table)
+                .select("updated_at")
+                .eq("id", draft_id)
+                .eq("user_id", user_id)
+                .limit(1)
+            )
 
-                if not existing.data or len(existing.data) == 0:
-                    raise ValueError("Draft not found")
-            except Exception:
+            if not existing.data:
                 raise ValueError("Draft not found")
 
-            server_updated_at = datetime.fromisoformat(
-                existing.data["updated_at"].replace("Z", "+00:00")
-            )
+            server_updated_at = existing.data[0]["updated_at"]
 
-            if server_updated_at > client_updated_at:
+            if datetime.fromisoformat(server_updated_at) > client_updated_at:
                 raise ConflictError(
                     "Draft was modified on another device",
-                    server_updated_at=existing.data["updated_at"],
+                    server_updated_at=server_updated_at,
                 )
 
         # Build update dict, excluding None values
         update_data = {}
-        for key in ["title", "content", "prompt", "tags", "confirmed", "scheduled_at"]:
+        for key in self.FIELDS:
             if key in data and data[key] is not None:
                 update_data[key] = data[key]
 
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .update(update_data)
             .eq("id", draft_id)
             .eq("user_id", user_id)
-            .execute()
         )
 
         if not response.data:
@@ -156,32 +257,51 @@ class DraftRepository:
 
     async def delete(self, draft_id: str, user_id: str) -> bool:
         """Delete a draft."""
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .delete()
             .eq("id", draft_id)
             .eq("user_id", user_id)
-            .execute()
         )
 
         return len(response.data) > 0
 
     async def get_modified_since(
-        self, user_id: str, since: Optional[datetime] = None
+        self,
+        user_id: str,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
     ) -> List[Dict[str, Any]]:
-        """Get all drafts modified since a given timestamp."""
+        """
+        Get drafts modified since a given timestamp, oldest first.
+
+        Pages with `limit` and `after`, the (updated_at, id) of the last
+        draft on the previous page.
+        """
         query = self.client.table(self.table).select("*").eq("user_id", user_id)
 
         if since:
             query = query.gte("updated_at", since.isoformat())
 
-        response = query.order("updated_at", desc=True).execute()
+        query = _after_position(query, "updated_at", after)
+        query = query.order("updated_at").order("id")
+        if limit:
+            query = query.limit(limit)
+
+        response = await _execute(query)
         return response.data
 
 
 class ScheduledPostRepository:
     """Repository for scheduled post operations in Supabase."""
 
+    # Only what the calendar view renders, so PostgREST skips the rest;
+    # content_preview is generated from content (migrations/009)
+    CALENDAR_COLUMNS = (
+        "id,platform,content_preview,scheduled_time,draft_id,status,error_message"
+    )
+
     def __init__(self, client: Optional[Client] = None):
         self.client = client or get_supabase_client()
         self.table = "scheduled_posts"
@@ -199,10 +319,9 @@ class ScheduledPostRepository:
         if status:
             query = query.eq("status", status)
 
-        response = (
+        response = await _execute(
             query.order("scheduled_time", desc=False)
             .range(skip, skip + limit - 1)
-            .execute()
         )
 
         return response.data
@@ -210,13 +329,12 @@ class ScheduledPostRepository:
     async def get_by_id(self, post_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific scheduled post by ID."""
         try:
-            response = (
+            response = await _execute(
                 self.client.table(self.table)
                 .select("*")
                 .eq("id", post_id)
                 .eq("user_id", user_id)
                 .limit(1)
-                .execute()
             )
 
             return response.data[0] if response.data and len(response.data) > 0 else None
@@ -234,7 +352,7 @@ class ScheduledPostRepository:
             "status": "scheduled",
         }
 
-        response = self.client.table(self.table).insert(post_data).execute()
+        response = await _execute(self.client.table(self.table).insert(post_data))
 
         if not response.data:
             raise ValueError("Failed to create scheduled post")
@@ -248,8 +366,15 @@ class ScheduledPostRepository:
         status: str,
         error_message: Optional[str] = None,
         posted_at: Optional[datetime] = None,
+        only_if_status: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
-        """Update the status of a scheduled post."""
+        """
+        Update the status of a scheduled post.
+
+        With only_if_status, the update applies only while the post is in one
+        of those statuses, checked in the same statement; otherwise it is
+        reported like a missing post.
+        """
         update_data = {"status": status}
 
         if error_message is not None:
@@ -257,13 +382,16 @@ class ScheduledPostRepository:
         if posted_at is not None:
             update_data["posted_at"] = posted_at.isoformat()
 
-        response = (
+        query = (
             self.client.table(self.table)
             .update(update_data)
             .eq("id", post_id)
             .eq("user_id", user_id)
-            .execute()
         )
+        if only_if_status:
+            query = query.in_("status", only_if_status)
+
+        response = await _execute(query)
 
         if not response.data:
             raise ValueError("Scheduled post not found")
@@ -272,65 +400,100 @@ class ScheduledPostRepository:
 
     async def delete(self, post_id: str, user_id: str) -> bool:
         """Delete a scheduled post."""
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .delete()
             .eq("id", post_id)
             .eq("user_id", user_id)
-            .execute()
         )
 
         return len(response.data) > 0
 
     async def get_calendar(
-        self, user_id: str, start_date: datetime, end_date: datetime
+        self,
+        user_id: str,
+        start_date: datetime,
+        end_date: datetime,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
     ) -> List[Dict[str, Any]]:
-        """Get scheduled posts for a date range (calendar view)."""
-        response = (
+        """
+        Get scheduled posts for a date range (calendar view).
+
+        Pages with `limit` and `after`, the (scheduled_time, id) of the last
+        post on the previous page.
+        """
+        query = (
             self.client.table(self.table)
-            .select("*")
+            .select(self.CALENDAR_COLUMNS)
             .eq("user_id", user_id)
             .gte("scheduled_time", start_date.isoformat())
             .lte("scheduled_time", end_date.isoformat())
-            .order("scheduled_time", desc=False)
-            .execute()
         )
+        query = _after_position(query, "scheduled_time", after)
+        query = query.order("scheduled_time").order("id")
+        if limit:
+            query = query.limit(limit)
 
+        response = await _execute(query)
         return response.data
 
     async def get_modified_since(
-        self, user_id: str, since: Optional[datetime] = None
+        self,
+        user_id: str,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
     ) -> List[Dict[str, Any]]:
-        """Get all scheduled posts modified since a given timestamp."""
+        """
+        Get scheduled posts modified since a given timestamp, oldest first.
+
+        Pages with `limit` and `after`, the (created_at, id) of the last
+        post on the previous page.
+        """
         query = self.client.table(self.table).select("*").eq("user_id", user_id)
 
         if since:
             query = query.gte("created_at", since.isoformat())
 
-        response = query.order("created_at", desc=True).execute()
+        query = _after_position(query, "created_at", after)
+        query = query.order("created_at").order("id")
+        if limit:
+            query = query.limit(limit)
+
+        response = await _execute(query)
         return response.data
 
-    async def get_all_scheduled(self) -> List[Dict[str, Any]]:
-        """Get all scheduled posts across all users (for scheduler startup)."""
-        response = (
-            self.client.table(self.table)
-            .select("*")
-            .eq("status", "scheduled")
-            .order("scheduled_time", desc=False)
-            .execute()
-        )
+    async def get_all_scheduled(
+        self,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get scheduled posts across all users (for scheduler startup), soonest first.
+
+        Pages with `limit` and `after`, the (scheduled_time, id) of the last
+        post on the previous page.
+        """
+        query = self.client.table(self.table).select("*").eq("status", "scheduled")
+        query = _after_position(query, "scheduled_time", after)
+        query = query.order("scheduled_time").order("id")
+        if limit:
+            query = query.limit(limit)
 
+        response = await _execute(query)
         return response.data
 
-    async def get_by_id_for_scheduler(self, post_id: str) -> Optional[Dict[str, Any]]:
+    async def get_by_id_for_scheduler(
+        self, post_id: str, columns: str = "*"
+    ) -> Optional[Dict[str, Any]]:
         """Get a specific scheduled post by ID (for scheduler use - bypasses user scoping)."""
         try:
-            response = (
+            response = await _execute(
                 self.client.table(self.table)
-                .select("*")
+                .select(columns)
                 .eq("id", post_id)
                 .limit(1)
-                .execute()
             )
 
             return response.data[0] if response.data and len(response.data) > 0 else None
@@ -345,6 +508,21 @@ class SyncMetadataRepository:
         self.client = client or get_supabase_client()
         self.table = "sync_metadata"
 
+    async def get_user_counts(self, user_id: str) -> Dict[str, int]:
+        """
+        Count a user's drafts and scheduled posts in one call.
+
+        Uses the get_user_counts function (migrations/008_user_counts.sql).
+        """
+        response = await _execute(
+            self.client.rpc("get_user_counts", {"p_user_id": user_id})
+        )
+        row = response.data[0] if response.data else {}
+        return {
+            "draft_count": row.get("draft_count", 0),
+            "scheduled_post_count": row.get("scheduled_post_count", 0),
+        }
+
     async def record_deletion(
         self, user_id: str, entity_type: str, entity_id: str
     ) -> Dict[str, Any]:
@@ -356,10 +534,31 @@ class SyncMetadataRepository:
             "action": "delete",
         }
 
-        response = self.client.table(self.table).insert(data).execute()
+        response = await _execute(self.client.table(self.table).insert(data))
 
         return response.data[0] if response.data else None
 
+    async def record_deletions_bulk(
+        self, user_id: str, deletions: List[Tuple[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """Record several (entity_type, entity_id) deletions in one insert."""
+        if not deletions:
+            return []
+
+        rows = [
+            {
+                "user_id": user_id,
+                "entity_type": entity_type,
+                "entity_id": entity_id,
+                "action": "delete",
+            }
+            for entity_type, entity_id in deletions
+        ]
+
+        response = await _execute(self.client.table(self.table).insert(rows))
+
+        return response.data or []
+
     async def get_deletions_since(
         self, user_id: str, since: Optional[datetime] = None
     ) -> List[str]:
@@ -374,7 +573,7 @@ class SyncMetadataRepository:
         if since:
             query = query.gte("created_at", since.isoformat())
 
-        response = query.execute()
+        response = await _execute(query)
         return [item["entity_id"] for item in response.data]
 
 
@@ -388,19 +587,34 @@ class UserSecretsRepository:
     async def get_secret(
         self, user_id: str, secret_type: str
     ) -> Optional[Dict[str, Any]]:
-        """Get a secret by type (e.g., 'twitter', 'linkedin')."""
+        """
+        Get a secret by type (e.g., 'twitter', 'linkedin').
+
+        The stored data comes back with `expires_at_epoch` added: its
+        `expires_at` parsed to epoch seconds, or None if it has none.
+        """
+        key = (user_id, secret_type)
+        cached = _secret_cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
-            response = (
+            response = await _execute(
                 self.client.table(self.table)
                 .select("secret_data")
                 .eq("user_id", user_id)
                 .eq("secret_type", secret_type)
                 .limit(1)
-                .execute()
             )
 
             if response.data and len(response.data) > 0:
-                return response.data[0]["secret_data"]
+                secret_data = response.data[0]["secret_data"]
+                secret = {
+                    **secret_data,
+                    "expires_at_epoch": _expiry_epoch(secret_data.get("expires_at")),
+                }
+                _secret_cache.set(key, secret)
+                return secret
             return None
         except Exception:
             # No data found or query error
@@ -416,11 +630,11 @@ class UserSecretsRepository:
             "secret_data": secret_data,
         }
 
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .upsert(data, on_conflict="user_id,secret_type")
-            .execute()
         )
+        _secret_cache.invalidate((user_id, secret_type))
 
         if not response.data:
             raise ValueError("Failed to store secret")
@@ -429,13 +643,13 @@ class UserSecretsRepository:
 
     async def delete_secret(self, user_id: str, secret_type: str) -> bool:
         """Delete a secret."""
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .delete()
             .eq("user_id", user_id)
             .eq("secret_type", secret_type)
-            .execute()
         )
+        _secret_cache.invalidate((user_id, secret_type))
 
         return len(response.data) > 0
 
@@ -481,10 +695,9 @@ class OAuthStateRepository:
 
         # Calculate expiry time (created_at + ttl_seconds)
         # Use SQL INTERVAL for precision
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .insert(data)
-            .execute()
         )
 
         if not response.data:
@@ -499,12 +712,11 @@ class OAuthStateRepository:
         Returns None if state doesn't exist or has expired.
         """
         try:
-            response = (
+            response = await _execute(
                 self.client.table(self.table)
                 .select("*")
                 .eq("state", state)
                 .limit(1)
-                .execute()
             )
 
             if not response.data or len(response.data) == 0:
@@ -513,9 +725,7 @@ class OAuthStateRepository:
             state_data = response.data[0]
 
             # Check if expired
-            expires_at = datetime.fromisoformat(
-                state_data["expires_at"].replace("Z", "+00:00")
-            )
+            expires_at = datetime.fromisoformat(state_data["expires_at"])
             if datetime.now(expires_at.tzinfo) > expires_at:
                 # State has expired, delete it
                 await self.delete_state(state)
@@ -527,11 +737,10 @@ class OAuthStateRepository:
 
     async def delete_state(self, state: str) -> bool:
         """Delete an OAuth state (after use or expiry)."""
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .delete()
             .eq("state", state)
-            .execute()
         )
 
         return len(response.data) > 0
@@ -544,11 +753,10 @@ class OAuthStateRepository:
             Number of states deleted
         """
         # Delete states where expires_at < NOW()
-        response = (
+        response = await _execute(
             self.client.table(self.table)
             .delete()
             .lt("expires_at", datetime.utcnow().isoformat())
-            .execute()
         )
 
         return len(response.data)
@@ -5,9 +5,10 @@ from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from app.database import init_db
+from app.database import async_engine, init_db
 from app.middleware.auth import get_current_user
 from app.routers import (
+    batch,
     drafts,
     export,
     llm,
@@ -21,6 +22,8 @@ from app.routers import (
     sync,
 )
 from app.services.scheduler_service import scheduler_service
+from app.utils.http_client import close_http_client
+from app.utils.pagination import NEXT_CURSOR_HEADER
 
 
 @asynccontextmanager
@@ -31,6 +34,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     scheduler_service.stop()
+    await close_http_client()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -56,6 +61,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include routers with authentication
@@ -104,6 +110,9 @@ app.include_router(
 app.include_router(
     oauth.router, prefix="/api", tags=["OAuth"], dependencies=auth_dependency
 )
+app.include_router(
+    batch.router, prefix="/api/batch", tags=["Batch"], dependencies=auth_dependency
+)
 
 
 @app.get("/")
@@ -10,12 +10,12 @@ from dataclasses import dataclass
 from functools import lru_cache
 from typing import Optional
 
-import httpx
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.config import settings
+from app.utils.http_client import get_http_client
 
 # HTTP Bearer token security scheme
 security = HTTPBearer(auto_error=False)
@@ -88,10 +88,10 @@ async def _fetch_jwks() -> dict:
 
         jwks_url = f"{frontend_api}/.well-known/jwks.json"
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(jwks_url, timeout=10.0)
-            response.raise_for_status()
-            jwks = response.json()
+        client = get_http_client()
+        response = await client.get(jwks_url, timeout=10.0)
+        response.raise_for_status()
+        jwks = response.json()
 
         # Update cache
         _jwks_cache["keys"] = jwks
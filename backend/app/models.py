@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum as SQLEnum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum as SQLEnum, Index
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql import func, text
 from app.database import Base
 import enum
 from datetime import datetime
@@ -15,6 +16,11 @@ class PostStatus(str, enum.Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
+# Value -> member lookups for parsing request params without the
+# exception-raising enum constructor
+PLATFORM_BY_NAME = {member.value: member for member in PlatformType}
+POST_STATUS_BY_NAME = {member.value: member for member in PostStatus}
+
 class Draft(Base):
     __tablename__ = "drafts"
     
@@ -50,6 +56,15 @@ class ScheduledPost(Base):
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Keyset pagination seeks on (scheduled_time, id)
+        Index("ix_scheduled_posts_time_id", "scheduled_time", "id"),
+        # Status/platform filters ordered or ranged by scheduled_time
+        # (post lists, calendar)
+        Index("ix_scheduled_posts_status_time", "status", "scheduled_time"),
+        Index("ix_scheduled_posts_platform_time", "platform", "scheduled_time"),
+    )
+    
     def to_dict(self):
         return {
             "id": self.id,
@@ -68,12 +83,14 @@ class PlatformConfig(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     platform = Column(SQLEnum(PlatformType), nullable=False, unique=True)
-    api_key = Column(String(500), nullable=True)
-    api_secret = Column(String(500), nullable=True)
-    access_token = Column(String(1000), nullable=True)
-    access_token_secret = Column(String(1000), nullable=True)
-    bearer_token = Column(String(1000), nullable=True)  # For Twitter API v2
-    linkedin_org_id = Column(String(255), nullable=True)
+    # Credentials are deferred: only publishing needs their values, and it
+    # loads them together with undefer_group("credentials")
+    api_key = deferred(Column(String(500), nullable=True), group="credentials")
+    api_secret = deferred(Column(String(500), nullable=True), group="credentials")
+    access_token = deferred(Column(String(1000), nullable=True), group="credentials")
+    access_token_secret = deferred(Column(String(1000), nullable=True), group="credentials")
+    bearer_token = deferred(Column(String(1000), nullable=True), group="credentials")  # For Twitter API v2
+    linkedin_org_id = deferred(Column(String(255), nullable=True), group="credentials")
     is_active = Column(Boolean, default=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -105,6 +122,17 @@ class AIProviderConfig(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Partial index: the current-provider lookup only ever wants the
+        # single active row
+        Index(
+            "ix_ai_provider_configs_active",
+            "is_active",
+            sqlite_where=text("is_active = 1"),
+            postgresql_where=text("is_active"),
+        ),
+    )
+    
     def to_dict(self, include_secrets=False):
         import json
         config = {}
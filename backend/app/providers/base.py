@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 class BaseAIProvider(ABC):
     """Base class for AI providers"""
@@ -48,6 +48,49 @@ class BaseAIProvider(ABC):
         """
         pass
     
+    async def generate_content_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None,
+        platform: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated content as text deltas
+        
+        Providers without native streaming yield the full result as a
+        single delta.
+        
+        Yields:
+            Chunks of generated text
+        """
+        yield await self.generate_content(
+            prompt=prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system_prompt=system_prompt,
+            platform=platform
+        )
+    
+    async def edit_content_stream(
+        self,
+        original_content: str,
+        edit_instruction: str,
+        temperature: float = 0.5
+    ) -> AsyncIterator[str]:
+        """
+        Stream edited content as text deltas
+        
+        Yields:
+            Chunks of edited text
+        """
+        yield await self.edit_content(
+            original_content=original_content,
+            edit_instruction=edit_instruction,
+            temperature=temperature
+        )
+    
     @abstractmethod
     async def check_health(self) -> bool:
         """
@@ -1,8 +1,10 @@
+from functools import lru_cache
 from typing import Optional, Dict, List
 from app.providers.base import BaseAIProvider
 from app.providers.llamacpp import LlamaCppProvider
 from app.config import settings
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import AIProviderConfig
 import json
 
@@ -18,8 +20,9 @@ try:
 except ImportError:
     pass
 
-def list_providers() -> List[Dict[str, str]]:
-    """List all available providers"""
+@lru_cache(maxsize=1)
+def _provider_entries() -> tuple:
+    """Provider listing, built once since the registry is fixed at import time"""
     providers = [
         {
             'name': 'llamacpp',
@@ -35,9 +38,17 @@ def list_providers() -> List[Dict[str, str]]:
             'description': 'Google Gemini API (2.0 Flash, 2.5 Flash, 2.5 Pro)'
         })
     
-    return providers
+    return tuple(providers)
+
+def list_providers() -> List[Dict[str, str]]:
+    """
+    List all available providers
+    
+    Returns fresh copies, so callers may mutate the result freely.
+    """
+    return [dict(provider) for provider in _provider_entries()]
 
-def get_provider(provider_name: Optional[str] = None, db: Optional[Session] = None) -> BaseAIProvider:
+async def get_provider(provider_name: Optional[str] = None, db: Optional[AsyncSession] = None) -> BaseAIProvider:
     """
     Get an AI provider instance
     
@@ -61,9 +72,10 @@ def get_provider(provider_name: Optional[str] = None, db: Optional[Session] = No
     config = {}
     if db:
         try:
-            provider_config = db.query(AIProviderConfig).filter(
-                AIProviderConfig.provider_name == provider_name
-            ).first()
+            result = await db.execute(
+                select(AIProviderConfig).where(AIProviderConfig.provider_name == provider_name)
+            )
+            provider_config = result.scalar_one_or_none()
             
             if provider_config and provider_config.config_json:
                 config = json.loads(provider_config.config_json)
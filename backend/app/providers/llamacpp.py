@@ -1,9 +1,42 @@
 import httpx
 import re
 import json
-from typing import Optional
+import orjson
+from contextlib import aclosing
+from typing import AsyncIterator, Optional
 from app.providers.base import BaseAIProvider
 from app.config import settings
+from app.utils.http_client import get_http_client
+
+# Patterns for pulling an answer out of a reasoning model's reasoning_content
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+# A line mentioning one of these markers holds the answer after its first colon;
+# matched across the whole reasoning in one pass rather than line by line
+_ANSWER_LINE_RE = re.compile(
+    r'^.*?(?:answer|output|content|tweet|post):.*$', re.IGNORECASE | re.MULTILINE
+)
+# Lines containing any of these read as thinking rather than output
+_REASONING_KEYWORD_RE = re.compile(r'think|consider|hmm|well|let me|i need', re.IGNORECASE)
+
+# Default system prompts when the caller doesn't pass one
+PLATFORM_SYSTEM_PROMPTS = {
+    "twitter": """Write a Twitter post in a positive, energetic, and assertive tone that feels smart and engaging. Use clear, concise language as if giving valuable advice or sharing an insight directly with a friend. Keep the message abstract so it can be applied to any topic or perspective. Never include hashtags, emojis, meta-commentary, "—" dashes, or checklist confirmations. Output ONLY the post content.""",
+    "linkedin": """You are a LinkedIn ghostwriter creating viral, engaging posts. Write in first person with a confident, upbeat, savvy tone. Use this structure naturally (don't number it or mention steps):
+- Bold hook with metrics/results
+- Free value or key insight
+- Brief origin story or realization
+- Show expertise through experience
+- Surprising or unconventional insight
+- Actionable method or framework
+- Bullet points for metrics/outcomes (use ↳, →, •, for visual emphasis)
+- Positive, energizing conclusion
+- Call-to-action for engagement
+
+CRITICAL: Never include hashtags, emojis, meta-commentary, "—" dashes, or checklist confirmations. Output ONLY the post content. Max 250 words.""",
+}
+
+LINKEDIN_TOPIC_SUFFIX = "\n\nCreate a LinkedIn post following the structure provided. Output the post content directly."
+DIRECT_OUTPUT_SUFFIX = "\n\nIMPORTANT: Provide only the final content output. Do not show your reasoning process."
 
 class LlamaCppProvider(BaseAIProvider):
     """Provider for llama.cpp server"""
@@ -12,181 +45,228 @@ class LlamaCppProvider(BaseAIProvider):
         self.config = config or {}
         self.base_url = self.config.get('server_url', settings.LLAMA_CPP_SERVER_URL)
         self.model_name = self.config.get('model_name', settings.LLAMA_MODEL_NAME)
-        self.timeout = self.config.get('timeout', 180.0)
+        # The configured timeout bounds waits on generation; connecting to a
+        # server that isn't up fails fast instead
+        self.timeout = httpx.Timeout(
+            self.config.get('timeout', 180.0), connect=5.0, write=10.0, pool=5.0
+        )
+        # Request fields that are the same for every generation; both
+        # generate paths stream
+        self._payload_template = {
+            "model": self.model_name,
+            "stream": True,
+            "reasoning_effort": 0.0
+        }
     
-    async def generate_content(
+    def _build_payload(
         self,
         prompt: str,
-        max_tokens: int = 500,
-        temperature: float = 0.7,
-        system_prompt: Optional[str] = None,
-        platform: Optional[str] = None
-    ) -> str:
-        """Generate content using local llama.cpp server"""
+        max_tokens: int,
+        temperature: float,
+        system_prompt: Optional[str],
+        platform: Optional[str]
+    ) -> dict:
+        """Build the chat completion request body for a generation"""
         if system_prompt is None:
             # Use platform-specific system prompts
-            if platform == "twitter":
-                system_prompt = """Write a Twitter post in a positive, energetic, and assertive tone that feels smart and engaging. Use clear, concise language as if giving valuable advice or sharing an insight directly with a friend. Keep the message abstract so it can be applied to any topic or perspective. Never include hashtags, emojis, meta-commentary, "—" dashes, or checklist confirmations. Output ONLY the post content."""
-            elif platform == "linkedin":
-                system_prompt = """You are a LinkedIn ghostwriter creating viral, engaging posts. Write in first person with a confident, upbeat, savvy tone. Use this structure naturally (don't number it or mention steps):
-- Bold hook with metrics/results
-- Free value or key insight
-- Brief origin story or realization
-- Show expertise through experience
-- Surprising or unconventional insight
-- Actionable method or framework
-- Bullet points for metrics/outcomes (use ↳, →, •, for visual emphasis)
-- Positive, energizing conclusion
-- Call-to-action for engagement
-
-CRITICAL: Never include hashtags, emojis, meta-commentary, "—" dashes, or checklist confirmations. Output ONLY the post content. Max 250 words."""
+            system_prompt = PLATFORM_SYSTEM_PROMPTS.get(platform)
         
         # For reasoning models, add explicit instruction to output directly
         # For LinkedIn, integrate the user prompt as the post topic
         if platform == "linkedin":
-            user_content = f"Post Topic: {prompt}\n\nCreate a LinkedIn post following the structure provided. Output the post content directly."
+            user_content = f"Post Topic: {prompt}{LINKEDIN_TOPIC_SUFFIX}"
+        elif max_tokens > 0:
+            user_content = prompt + DIRECT_OUTPUT_SUFFIX
         else:
             user_content = prompt
         
-        if max_tokens > 0 and platform != "linkedin":
-            user_content = f"{user_content}\n\nIMPORTANT: Provide only the final content output. Do not show your reasoning process."
-        
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_content}
         ]
         
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                # Adjust max_tokens based on platform to match character limits
-                # The frontend now sends platform-specific max_tokens:
-                # Twitter: ~100 tokens (for 280 char limit)
-                # LinkedIn: ~800 tokens (for 3000 char limit)
-                # Don't multiply for Twitter - it's already correctly sized
-                if platform == "twitter":
-                    # Twitter needs small token limit to match 280 char limit
-                    effective_max_tokens = min(max_tokens, 150)  # Cap at 150 to prevent over-generation
-                elif platform == "linkedin":
-                    # LinkedIn can use more tokens, but don't multiply unnecessarily
-                    effective_max_tokens = min(max_tokens, 1000)  # Cap at 1000
-                else:
-                    # For other platforms, use the provided max_tokens
-                    effective_max_tokens = max_tokens
+        # Adjust max_tokens based on platform to match character limits
+        # The frontend now sends platform-specific max_tokens:
+        # Twitter: ~100 tokens (for 280 char limit)
+        # LinkedIn: ~800 tokens (for 3000 char limit)
+        # Don't multiply for Twitter - it's already correctly sized
+        if platform == "twitter":
+            # Twitter needs small token limit to match 280 char limit
+            effective_max_tokens = min(max_tokens, 150)  # Cap at 150 to prevent over-generation
+        elif platform == "linkedin":
+            # LinkedIn can use more tokens, but don't multiply unnecessarily
+            effective_max_tokens = min(max_tokens, 1000)  # Cap at 1000
+        else:
+            # For other platforms, use the provided max_tokens
+            effective_max_tokens = max_tokens
+
+        return self._payload_template | {
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": effective_max_tokens
+        }
+
+    async def generate_content(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None,
+        platform: Optional[str] = None
+    ) -> str:
+        """Generate content using local llama.cpp server"""
+        # Streamed and collected here: the read timeout then applies between
+        # tokens rather than to the whole generation, and the response body
+        # is never buffered as one document
+        payload = self._build_payload(prompt, max_tokens, temperature, system_prompt, platform)
+
+        content_parts = []
+        reasoning_parts = []
+        finish_reason = None
+        received = False
+        # aclosing releases the connection as soon as we break out
+        async with aclosing(self._stream_choices(payload)) as choices:
+            async for choice in choices:
+                received = True
+                delta = choice.get("delta") or {}
+                if delta.get("content"):
+                    content_parts.append(delta["content"])
+                if delta.get("reasoning_content"):
+                    reasoning_parts.append(delta["reasoning_content"])
+                if choice.get("finish_reason"):
+                    finish_reason = choice["finish_reason"]
+                    break
+
+        if not received:
+            raise ValueError("Unexpected response format from LLM server")
+
+        content = "".join(content_parts).strip()
+        reasoning = "".join(reasoning_parts).strip()
+        return self._extract_content(content, reasoning, platform, finish_reason)
+
+    def _extract_content(
+        self,
+        content: str,
+        reasoning: str,
+        platform: Optional[str],
+        finish_reason: Optional[str]
+    ) -> str:
+        """Turn a completion's content and reasoning into the post text"""
+        # Handle reasoning models
+        if not content and reasoning:
+            # Strategy 1: Look for quoted text
+            quoted = _QUOTED_RE.findall(reasoning)
+            if quoted:
+                content = quoted[-1]
                 
-                payload = {
-                    "model": self.model_name,
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": effective_max_tokens,
-                    "stream": False,
-                    "reasoning_effort": 0.0
-                }
+            # Strategy 2: Look for text after markers
+            if not content:
+                for match in _ANSWER_LINE_RE.finditer(reasoning):
+                    content = match.group().partition(':')[2].strip()
+                    if content:
+                        break
                 
-                response = await client.post(
-                    f"{self.base_url}/v1/chat/completions",
-                    json=payload
-                )
-                response.raise_for_status()
-                data = response.json()
+            # Strategy 3: Take last substantial non-reasoning line, walking
+            # back from the end so only the lines after it are looked at
+            if not content:
+                end = len(reasoning)
+                while end >= 0:
+                    start = reasoning.rfind('\n', 0, end) + 1
+                    line_clean = reasoning[start:end].strip()
+                    if len(line_clean) > 10 and not _REASONING_KEYWORD_RE.search(line_clean):
+                        content = line_clean
+                        break
+                    end = start - 1
                 
-                # Extract generated content
-                if "choices" in data and len(data["choices"]) > 0:
-                    choice = data["choices"][0]
-                    message = choice.get("message", {})
-                    
-                    content = message.get("content", "").strip()
-                    reasoning = message.get("reasoning_content", "").strip()
-                    
-                    # Handle reasoning models
-                    if not content and reasoning:
-                        # Strategy 1: Look for quoted text
-                        quoted = re.findall(r'"([^"]+)"', reasoning)
-                        if quoted:
-                            content = quoted[-1]
-                        
-                        # Strategy 2: Look for text after markers
-                        if not content:
-                            markers = ['answer:', 'output:', 'content:', 'tweet:', 'post:']
-                            reasoning_lines = reasoning.split('\n')
-                            for i, line in enumerate(reasoning_lines):
-                                line_lower = line.lower().strip()
-                                for marker in markers:
-                                    if marker in line_lower:
-                                        parts = line.split(':', 1)
-                                        if len(parts) > 1:
-                                            content = parts[1].strip()
-                                            break
-                                if content:
-                                    break
-                        
-                        # Strategy 3: Take last substantial non-reasoning line
-                        if not content:
-                            reasoning_keywords = ['think', 'consider', 'hmm', 'well', 'let me', 'i need']
-                            reasoning_lines = reasoning.split('\n')
-                            for line in reversed(reasoning_lines):
-                                line_clean = line.strip()
-                                if line_clean and len(line_clean) > 10:
-                                    is_reasoning = any(kw in line_clean.lower() for kw in reasoning_keywords)
-                                    if not is_reasoning:
-                                        content = line_clean
-                                        break
+            # Strategy 4: Use entire reasoning if all else fails
+            if not content:
+                content = reasoning
+            
+        content = content.strip() if content else ""
+            
+        # For LinkedIn, try to extract JSON if present
+        if platform == "linkedin" and content:
+            # Try to parse JSON response
+            try:
+                # Look for JSON block in the content (handle nested braces)
+                json_start = content.find('{')
+                if json_start != -1:
+                    # Find matching closing brace
+                    brace_count = 0
+                    json_end = -1
+                    for i in range(json_start, len(content)):
+                        if content[i] == '{':
+                            brace_count += 1
+                        elif content[i] == '}':
+                            brace_count -= 1
+                            if brace_count == 0:
+                                json_end = i + 1
+                                break
                         
-                        # Strategy 4: Use entire reasoning if all else fails
-                        if not content:
-                            content = reasoning
-                    
-                    content = content.strip() if content else ""
-                    
-                    # For LinkedIn, try to extract JSON if present
-                    if platform == "linkedin" and content:
-                        # Try to parse JSON response
-                        try:
-                            # Look for JSON block in the content (handle nested braces)
-                            json_start = content.find('{')
-                            if json_start != -1:
-                                # Find matching closing brace
-                                brace_count = 0
-                                json_end = -1
-                                for i in range(json_start, len(content)):
-                                    if content[i] == '{':
-                                        brace_count += 1
-                                    elif content[i] == '}':
-                                        brace_count -= 1
-                                        if brace_count == 0:
-                                            json_end = i + 1
-                                            break
-                                
-                                if json_end > json_start:
-                                    json_str = content[json_start:json_end]
-                                    parsed = json.loads(json_str)
-                                    if "linkedin_post" in parsed:
-                                        content = parsed["linkedin_post"]
-                        except (json.JSONDecodeError, KeyError, ValueError):
-                            # If JSON parsing fails, use content as-is
-                            pass
-                    
-                    if not content:
-                        raise ValueError(
-                            f"LLM returned empty content. Finish reason: {choice.get('finish_reason', 'unknown')}. "
-                            f"Try increasing max_tokens or check if the model is loaded correctly."
-                        )
-                    
-                    return content
-                else:
-                    raise ValueError("Unexpected response format from LLM server")
-                    
-            except httpx.RequestError as e:
-                raise ConnectionError(f"Failed to connect to LLM server: {str(e)}")
-            except httpx.HTTPStatusError as e:
-                raise ValueError(f"LLM server error: {e.response.status_code} - {e.response.text}")
-    
-    async def edit_content(
+                    if json_end > json_start:
+                        json_str = content[json_start:json_end]
+                        parsed = json.loads(json_str)
+                        if "linkedin_post" in parsed:
+                            content = parsed["linkedin_post"]
+            except (json.JSONDecodeError, KeyError, ValueError):
+                # If JSON parsing fails, use content as-is
+                pass
+            
+        if not content:
+            raise ValueError(
+                f"LLM returned empty content. Finish reason: {finish_reason or 'unknown'}. "
+                f"Try increasing max_tokens or check if the model is loaded correctly."
+            )
+            
+        return content
+
+    async def _stream_choices(self, payload: dict) -> AsyncIterator[dict]:
+        """POST a streaming chat completion and yield each chunk's first choice"""
+        client = get_http_client()
+        try:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/v1/chat/completions",
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            ) as response:
+                if response.is_error:
+                    await response.aread()
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data == "[DONE]":
+                        break
+                    choices = orjson.loads(data).get("choices") or []
+                    if choices:
+                        yield choices[0]
+        except httpx.RequestError as e:
+            raise ConnectionError(f"Failed to connect to LLM server: {str(e)}")
+        except httpx.HTTPStatusError as e:
+            raise ValueError(f"LLM server error: {e.response.status_code} - {e.response.text}")
+
+    async def generate_content_stream(
         self,
-        original_content: str,
-        edit_instruction: str,
-        temperature: float = 0.5
-    ) -> str:
-        """Edit existing content based on instructions"""
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None,
+        platform: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream content deltas from the llama.cpp server as they are generated"""
+        payload = self._build_payload(prompt, max_tokens, temperature, system_prompt, platform)
+
+        async for choice in self._stream_choices(payload):
+            # Reasoning deltas arrive as reasoning_content and are skipped
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+    def _build_edit_prompt(self, original_content: str, edit_instruction: str) -> tuple[str, str]:
+        """Build the (prompt, system_prompt) pair for an edit request"""
         system_prompt = """You are a professional content editor. 
 Edit the provided content according to the user's instructions while maintaining 
 the original tone and style. Make the requested changes precisely."""
@@ -198,20 +278,45 @@ Edit instructions:
 {edit_instruction}
 
 Provide the edited version:"""
-        
+        return prompt, system_prompt
+
+    async def edit_content(
+        self,
+        original_content: str,
+        edit_instruction: str,
+        temperature: float = 0.5
+    ) -> str:
+        """Edit existing content based on instructions"""
+        prompt, system_prompt = self._build_edit_prompt(original_content, edit_instruction)
         return await self.generate_content(
             prompt=prompt,
             system_prompt=system_prompt,
             temperature=temperature,
             max_tokens=1000
         )
+
+    async def edit_content_stream(
+        self,
+        original_content: str,
+        edit_instruction: str,
+        temperature: float = 0.5
+    ) -> AsyncIterator[str]:
+        """Stream edited content deltas as they are generated"""
+        prompt, system_prompt = self._build_edit_prompt(original_content, edit_instruction)
+        async for delta in self.generate_content_stream(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            temperature=temperature,
+            max_tokens=1000
+        ):
+            yield delta
     
     async def check_health(self) -> bool:
         """Check if llama.cpp server is accessible"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/health")
-                return response.status_code == 200
+            client = get_http_client()
+            response = await client.get(f"{self.base_url}/health", timeout=5.0)
+            return response.status_code == 200
         except Exception:
             return False
     
@@ -0,0 +1,95 @@
+"""
+Batch API router.
+
+Runs several read-only API calls concurrently in one round-trip, so a
+dashboard load (platforms, current provider, calendar, posts) doesn't
+pay an HTTP + auth round-trip per call.
+"""
+
+import asyncio
+from typing import Any, List, Optional
+
+import httpx
+from fastapi import APIRouter, Request
+from pydantic import BaseModel, Field
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 20
+
+
+class BatchRequestItem(BaseModel):
+    id: str
+    method: str = "GET"
+    url: str  # Path under /api, with optional query string
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(..., max_length=MAX_BATCH_SIZE)
+
+
+class BatchResponseItem(BaseModel):
+    id: str
+    status: int
+    body: Optional[Any] = None
+
+
+def _validate_item(item: BatchRequestItem) -> Optional[BatchResponseItem]:
+    """Return an error response for items the batch endpoint won't dispatch."""
+    if item.method.upper() != "GET":
+        # Writes stay individual requests so their ordering is explicit
+        return BatchResponseItem(
+            id=item.id, status=405, body={"detail": "Only GET requests can be batched"}
+        )
+    if not item.url.startswith("/api/") or item.url.startswith("/api/batch"):
+        return BatchResponseItem(
+            id=item.id, status=400, body={"detail": f"Invalid batch URL: {item.url}"}
+        )
+    return None
+
+
+async def _dispatch(
+    client: httpx.AsyncClient, item: BatchRequestItem
+) -> BatchResponseItem:
+    """Run a single sub-request against the app."""
+    error = _validate_item(item)
+    if error is not None:
+        return error
+
+    response = await client.get(item.url)
+    try:
+        body = response.json()
+    except ValueError:
+        body = response.text or None
+    return BatchResponseItem(id=item.id, status=response.status_code, body=body)
+
+
+@router.post("/", response_model=List[BatchResponseItem])
+async def run_batch(batch: BatchRequest, request: Request):
+    """
+    Execute GET sub-requests concurrently and return their results in order.
+
+    Each sub-request is dispatched in-process with the caller's
+    Authorization header, so per-route auth still applies.
+    """
+    headers = {}
+    if "authorization" in request.headers:
+        headers["Authorization"] = request.headers["authorization"]
+
+    transport = httpx.ASGITransport(app=request.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://internal", headers=headers
+    ) as client:
+        results = await asyncio.gather(
+            *(_dispatch(client, item) for item in batch.requests),
+            return_exceptions=True,
+        )
+
+    return [
+        result
+        if isinstance(result, BatchResponseItem)
+        else BatchResponseItem(
+            id=item.id, status=500, body={"detail": "Sub-request failed"}
+        )
+        for item, result in zip(batch.requests, results)
+    ]
@@ -11,7 +11,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.database import get_db
@@ -89,7 +89,7 @@ class DraftResponse(BaseModel):
 @router.get("/", response_model=List[DraftResponse])
 async def list_drafts(
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
 ):
@@ -102,7 +102,7 @@ async def list_drafts(
         return [DraftResponse.from_supabase(d) for d in drafts]
     else:
         # SQLite fallback (no user filtering in legacy mode)
-        result = db.execute(
+        result = await db.execute(
             select(Draft).offset(skip).limit(limit).order_by(Draft.created_at.desc())
         )
         drafts = result.scalars().all()
@@ -113,7 +113,7 @@ async def list_drafts(
 async def get_draft(
     draft_id: str,
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get a specific draft by ID."""
     if settings.USE_SUPABASE:
@@ -133,7 +133,7 @@ async def get_draft(
         except ValueError:
             raise HTTPException(status_code=404, detail="Draft not found")
 
-        result = db.execute(select(Draft).where(Draft.id == draft_id_int))
+        result = await db.execute(select(Draft).where(Draft.id == draft_id_int))
         draft = result.scalar_one_or_none()
 
         if not draft:
@@ -146,7 +146,7 @@ async def get_draft(
 async def create_draft(
     draft_data: DraftCreate,
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new draft for the authenticated user."""
     if settings.USE_SUPABASE:
@@ -179,8 +179,8 @@ async def create_draft(
         )
 
         db.add(draft)
-        db.commit()
-        db.refresh(draft)
+        await db.commit()
+        await db.refresh(draft)
 
         return DraftResponse.from_orm(draft, user.user_id)
 
@@ -190,7 +190,7 @@ async def update_draft(
     draft_id: str,
     draft_data: DraftUpdate,
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Update an existing draft.
@@ -240,7 +240,7 @@ async def update_draft(
         except ValueError:
             raise HTTPException(status_code=404, detail="Draft not found")
 
-        result = db.execute(select(Draft).where(Draft.id == draft_id_int))
+        result = await db.execute(select(Draft).where(Draft.id == draft_id_int))
         draft = result.scalar_one_or_none()
 
         if not draft:
@@ -255,8 +255,8 @@ async def update_draft(
         if draft_data.tags is not None:
             draft.tags = ",".join(draft_data.tags) if draft_data.tags else None
 
-        db.commit()
-        db.refresh(draft)
+        await db.commit()
+        await db.refresh(draft)
 
         return DraftResponse.from_orm(draft, user.user_id)
 
@@ -265,7 +265,7 @@ async def update_draft(
 async def delete_draft(
     draft_id: str,
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a draft."""
     if settings.USE_SUPABASE:
@@ -289,13 +289,13 @@ async def delete_draft(
         except ValueError:
             raise HTTPException(status_code=404, detail="Draft not found")
 
-        result = db.execute(select(Draft).where(Draft.id == draft_id_int))
+        result = await db.execute(select(Draft).where(Draft.id == draft_id_int))
         draft = result.scalar_one_or_none()
 
         if not draft:
             raise HTTPException(status_code=404, detail="Draft not found")
 
-        db.delete(draft)
-        db.commit()
+        await db.delete(draft)
+        await db.commit()
 
         return None
@@ -4,10 +4,11 @@ Export API router.
 Provides endpoints for exporting user data (GDPR compliance).
 """
 
+import asyncio
 from datetime import datetime
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+import orjson
+from fastapi import APIRouter, Depends, Response
 
 from app.config import settings
 from app.middleware.auth import ClerkUser, get_current_user
@@ -15,6 +16,15 @@ from app.middleware.auth import ClerkUser, get_current_user
 router = APIRouter()
 
 
+def _json_download(export_data: dict, filename: str) -> Response:
+    """Serialize an export with orjson and serve it as a file download."""
+    return Response(
+        content=orjson.dumps(export_data),
+        media_type="application/json",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
 @router.get("/drafts")
 async def export_drafts(user: ClerkUser = Depends(get_current_user)):
     """
@@ -41,10 +51,7 @@ async def export_drafts(user: ClerkUser = Depends(get_current_user)):
 
     filename = f"postfarm-drafts-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
 
-    return JSONResponse(
-        content=export_data,
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+    return _json_download(export_data, filename)
 
 
 @router.get("/scheduled-posts")
@@ -72,10 +79,7 @@ async def export_scheduled_posts(user: ClerkUser = Depends(get_current_user)):
         f"postfarm-scheduled-posts-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
     )
 
-    return JSONResponse(
-        content=export_data,
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+    return _json_download(export_data, filename)
 
 
 @router.get("/all")
@@ -91,11 +95,10 @@ async def export_all_data(user: ClerkUser = Depends(get_current_user)):
     if settings.USE_SUPABASE:
         from app.database_supabase import DraftRepository, ScheduledPostRepository
 
-        draft_repo = DraftRepository()
-        post_repo = ScheduledPostRepository()
-
-        drafts = await draft_repo.list_by_user(user.user_id, limit=10000)
-        posts = await post_repo.list_by_user(user.user_id, limit=10000)
+        drafts, posts = await asyncio.gather(
+            DraftRepository().list_by_user(user.user_id, limit=10000),
+            ScheduledPostRepository().list_by_user(user.user_id, limit=10000),
+        )
     else:
         drafts = []
         posts = []
@@ -113,7 +116,4 @@ async def export_all_data(user: ClerkUser = Depends(get_current_user)):
 
     filename = f"postfarm-export-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
 
-    return JSONResponse(
-        content=export_data,
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
-    )
+    return _json_download(export_data, filename)
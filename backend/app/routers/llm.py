@@ -1,21 +1,32 @@
+import orjson
+import logging
 from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Optional
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.llm_service import LLMService
 from app.database import get_db
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-def get_llm_service(db: Session = Depends(get_db)) -> LLMService:
+# Upper bounds on request text, enforced at validation time (422) so
+# oversized payloads never reach the provider
+MAX_CONTENT_LENGTH = 32_000
+MAX_INSTRUCTION_LENGTH = 8_000
+
+TITLE_SYSTEM_PROMPT = "You are a helpful assistant that creates short, descriptive titles. Return ONLY the title, nothing else. No quotes, no punctuation at the end."
+
+def get_llm_service(db: AsyncSession = Depends(get_db)) -> LLMService:
     """Dependency to get LLMService with database session"""
     return LLMService(db=db)
 
 class GenerateRequest(BaseModel):
-    prompt: str
+    prompt: str = Field(..., max_length=MAX_CONTENT_LENGTH)
     max_tokens: Optional[int] = 500
     temperature: Optional[float] = 0.7
-    system_prompt: Optional[str] = None
+    system_prompt: Optional[str] = Field(None, max_length=MAX_INSTRUCTION_LENGTH)
     platform: Optional[str] = None  # "twitter", "linkedin", "general", or null
 
 class GenerateResponse(BaseModel):
@@ -23,8 +34,8 @@ class GenerateResponse(BaseModel):
     prompt: str
 
 class EditRequest(BaseModel):
-    original_content: str
-    edit_instruction: str
+    original_content: str = Field(..., max_length=MAX_CONTENT_LENGTH)
+    edit_instruction: str = Field(..., max_length=MAX_INSTRUCTION_LENGTH)
     temperature: Optional[float] = 0.5
 
 class EditResponse(BaseModel):
@@ -32,11 +43,40 @@ class EditResponse(BaseModel):
     original_content: str
 
 class GenerateTitleRequest(BaseModel):
-    content: str
+    content: str = Field(..., max_length=MAX_CONTENT_LENGTH)
 
 class GenerateTitleResponse(BaseModel):
     title: str
 
+def _sse_stream(chunks: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap text chunks as Server-Sent Events ({"delta": ...}, then a done event)"""
+    async def events():
+        try:
+            async for chunk in chunks:
+                yield f"data: {orjson.dumps({'delta': chunk}).decode()}\n\n"
+        except ConnectionError as e:
+            yield f"event: error\ndata: {orjson.dumps({'error': f'AI provider not available: {e}'}).decode()}\n\n"
+            return
+        except ValueError as e:
+            yield f"event: error\ndata: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+            return
+        except Exception:
+            logger.exception("Error streaming content")
+            yield f"event: error\ndata: {orjson.dumps({'error': 'Error streaming content'}).decode()}\n\n"
+            return
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _fallback_title(content: str) -> str:
+    """Title used when the AI provider can't generate one"""
+    trimmed = content[:50].strip()
+    return f"{trimmed}..." if len(content) > 50 else trimmed
+
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_content(request: GenerateRequest, llm_service: LLMService = Depends(get_llm_service)):
     """Generate content from a prompt using configured AI provider"""
@@ -52,14 +92,29 @@ async def generate_content(request: GenerateRequest, llm_service: LLMService = D
     except ConnectionError as e:
         raise HTTPException(
             status_code=503,
-            detail=f"AI provider not available: {str(e)}"
+            detail=f"AI provider not available: {e}"
         )
-    except Exception as e:
+    except ValueError as e:
+        # Provider reached but returned an error or unusable output
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception:
+        logger.exception("Error generating content")
         raise HTTPException(
             status_code=500,
-            detail=f"Error generating content: {str(e)}"
+            detail="Error generating content"
         )
 
+@router.post("/generate/stream")
+async def generate_content_stream(request: GenerateRequest, llm_service: LLMService = Depends(get_llm_service)):
+    """Stream generated content as Server-Sent Events"""
+    return _sse_stream(llm_service.generate_content_stream(
+        prompt=request.prompt,
+        max_tokens=request.max_tokens,
+        temperature=request.temperature,
+        system_prompt=request.system_prompt,
+        platform=request.platform
+    ))
+
 @router.post("/edit", response_model=EditResponse)
 async def edit_content(request: EditRequest, llm_service: LLMService = Depends(get_llm_service)):
     """Edit existing content based on instructions"""
@@ -76,26 +131,42 @@ async def edit_content(request: EditRequest, llm_service: LLMService = Depends(g
     except ConnectionError as e:
         raise HTTPException(
             status_code=503,
-            detail=f"AI provider not available: {str(e)}"
+            detail=f"AI provider not available: {e}"
         )
-    except Exception as e:
+    except ValueError as e:
+        # Provider reached but returned an error or unusable output
+        raise HTTPException(status_code=502, detail=str(e))
+    except Exception:
+        logger.exception("Error editing content")
         raise HTTPException(
             status_code=500,
-            detail=f"Error editing content: {str(e)}"
+            detail="Error editing content"
         )
 
+@router.post("/edit/stream")
+async def edit_content_stream(request: EditRequest, llm_service: LLMService = Depends(get_llm_service)):
+    """Stream edited content as Server-Sent Events"""
+    return _sse_stream(llm_service.edit_content_stream(
+        original_content=request.original_content,
+        edit_instruction=request.edit_instruction,
+        temperature=request.temperature
+    ))
+
 @router.post("/generate-title", response_model=GenerateTitleResponse)
 async def generate_title(request: GenerateTitleRequest, llm_service: LLMService = Depends(get_llm_service)):
     """Generate a short title for draft content"""
     try:
         # Truncate content if too long
-        content_preview = request.content[:500] if len(request.content) > 500 else request.content
+        content_preview = request.content[:500]
         
+        prompt = f"Generate a concise 3-5 word title for this social media draft:\n\n{content_preview}"
+        # Identical concurrent requests (StrictMode double-invocations, rapid
+        # retries) share one provider call inside generate_content
         title = await llm_service.generate_content(
-            prompt=f"Generate a concise 3-5 word title for this social media draft:\n\n{content_preview}",
+            prompt=prompt,
             max_tokens=20,
             temperature=0.3,
-            system_prompt="You are a helpful assistant that creates short, descriptive titles. Return ONLY the title, nothing else. No quotes, no punctuation at the end."
+            system_prompt=TITLE_SYSTEM_PROMPT
         )
         
         # Clean up the title
@@ -104,25 +175,20 @@ async def generate_title(request: GenerateTitleRequest, llm_service: LLMService
             title = title[:60].rsplit(' ', 1)[0] + '...'
         
         return GenerateTitleResponse(title=title)
-    except ConnectionError as e:
+    except (ConnectionError, ValueError):
         # Return a fallback title if AI is not available
-        fallback = request.content[:50].strip()
-        if len(request.content) > 50:
-            fallback += '...'
-        return GenerateTitleResponse(title=fallback)
-    except Exception as e:
-        # Return a fallback title on error
-        fallback = request.content[:50].strip()
-        if len(request.content) > 50:
-            fallback += '...'
-        return GenerateTitleResponse(title=fallback)
+        return GenerateTitleResponse(title=_fallback_title(request.content))
+    except Exception:
+        # Return a fallback title on unexpected errors, but keep the traceback
+        logger.exception("Error generating title")
+        return GenerateTitleResponse(title=_fallback_title(request.content))
 
 @router.get("/health")
 async def llm_health(llm_service: LLMService = Depends(get_llm_service)):
     """Check AI provider health"""
     is_healthy = await llm_service.check_server_health()
     if is_healthy:
-        provider = llm_service._get_provider()
+        provider = await llm_service._get_provider()
         return {
             "status": "healthy",
             "provider": provider.get_provider_name(),
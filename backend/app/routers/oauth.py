@@ -3,20 +3,60 @@ OAuth 2.0 router for platform connections (Twitter, LinkedIn).
 Handles authorization flows and token storage in Supabase.
 """
 
+import logging
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 from urllib.parse import urlencode
 
+import httpx
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 
 from app.config import settings
+from app.database_supabase import OAuthStateRepository, UserSecretsRepository
 from app.middleware.auth import ClerkUser, get_current_user
+from app.utils.http_client import get_http_client
 from app.utils.pkce import generate_code_verifier, generate_code_challenge
 
 router = APIRouter(prefix="/oauth", tags=["oauth"])
+logger = logging.getLogger(__name__)
+
+# Per-platform OAuth constants, keyed by lowercased platform name.
+# Settings attribute names are resolved at call time so overrides apply.
+_PLATFORM_CONFIG = {
+    "twitter": {
+        "display": "Twitter",
+        # Twitter OAuth 2.0 with PKCE
+        "authorize_url": "https://twitter.com/i/oauth2/authorize",
+        "token_url": "https://api.twitter.com/2/oauth2/token",
+        "scope": "tweet.read tweet.write users.read offline.access",
+        "client_id": "TWITTER_CLIENT_ID",
+        "redirect_uri": "TWITTER_REDIRECT_URI",
+        "pkce": True,
+    },
+    "linkedin": {
+        "display": "LinkedIn",
+        # LinkedIn OAuth 2.0 (no PKCE support)
+        # openid + profile replace the deprecated r_liteprofile scope
+        "authorize_url": "https://www.linkedin.com/oauth/v2/authorization",
+        "token_url": "https://www.linkedin.com/oauth/v2/accessToken",
+        "scope": "openid profile w_member_social",
+        "client_id": "LINKEDIN_CLIENT_ID",
+        "redirect_uri": "LINKEDIN_REDIRECT_URI",
+        "pkce": False,
+    },
+}
+
+
+def _get_platform_config(platform: str) -> tuple[str, dict]:
+    """Normalize a platform name and return it with its OAuth config."""
+    platform = platform.lower()
+    cfg = _PLATFORM_CONFIG.get(platform)
+    if cfg is None:
+        raise HTTPException(status_code=400, detail="Unsupported platform")
+    return platform, cfg
 
 
 class OAuthStateCreate(BaseModel):
@@ -49,10 +89,7 @@ async def initiate_oauth(
     Initiate OAuth flow for a platform.
     Returns authorization URL for the user to visit.
     """
-    platform = request.platform.lower()
-
-    if platform not in ["twitter", "linkedin"]:
-        raise HTTPException(status_code=400, detail="Unsupported platform")
+    platform, cfg = _get_platform_config(request.platform)
 
     if not settings.USE_SUPABASE:
         raise HTTPException(
@@ -66,8 +103,6 @@ async def initiate_oauth(
     code_challenge = generate_code_challenge(code_verifier)
 
     # Store state with PKCE verifier in database
-    from app.database_supabase import OAuthStateRepository
-
     repo = OAuthStateRepository()
     await repo.create_state(
         state=state,
@@ -78,35 +113,17 @@ async def initiate_oauth(
     )
 
     # Build authorization URL
-    if platform == "twitter":
-        # Twitter OAuth 2.0 with PKCE
-        # Scopes: tweet.read, tweet.write, users.read, offline.access
-        auth_params = {
-            "response_type": "code",
-            "client_id": settings.TWITTER_CLIENT_ID,
-            "redirect_uri": settings.TWITTER_REDIRECT_URI,
-            "scope": "tweet.read tweet.write users.read offline.access",
-            "state": state,
-            "code_challenge": code_challenge,
-            "code_challenge_method": "S256",
-        }
-        auth_url = "https://twitter.com/i/oauth2/authorize?" + urlencode(auth_params)
-
-    elif platform == "linkedin":
-        # LinkedIn OAuth 2.0 (no PKCE support)
-        # Scopes: openid, profile (replaces deprecated r_liteprofile), w_member_social
-        auth_params = {
-            "response_type": "code",
-            "client_id": settings.LINKEDIN_CLIENT_ID,
-            "redirect_uri": settings.LINKEDIN_REDIRECT_URI,
-            "scope": "openid profile w_member_social",
-            "state": state,
-        }
-        auth_url = "https://www.linkedin.com/oauth/v2/authorization?" + urlencode(
-            auth_params
-        )
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported platform")
+    auth_params = {
+        "response_type": "code",
+        "client_id": getattr(settings, cfg["client_id"]),
+        "redirect_uri": getattr(settings, cfg["redirect_uri"]),
+        "scope": cfg["scope"],
+        "state": state,
+    }
+    if cfg["pkce"]:
+        auth_params["code_challenge"] = code_challenge
+        auth_params["code_challenge_method"] = "S256"
+    auth_url = f"{cfg['authorize_url']}?{urlencode(auth_params)}"
 
     return OAuthStateResponse(state=state, auth_url=auth_url)
 
@@ -120,7 +137,7 @@ async def oauth_callback(
     Handle OAuth callback.
     Exchange authorization code for access token and store in Supabase.
     """
-    platform = request.platform.lower()
+    platform, cfg = _get_platform_config(request.platform)
     code = request.code
     state = request.state
 
@@ -131,8 +148,6 @@ async def oauth_callback(
         )
 
     # Retrieve and verify state from database
-    from app.database_supabase import OAuthStateRepository
-
     repo = OAuthStateRepository()
     state_data = await repo.get_state(state)
 
@@ -153,12 +168,10 @@ async def oauth_callback(
 
     # Exchange code for token
     try:
-        if platform == "twitter":
+        if cfg["pkce"]:
             token_data = await _exchange_twitter_code(code, code_verifier)
-        elif platform == "linkedin":
-            token_data = await _exchange_linkedin_code(code)
         else:
-            raise HTTPException(status_code=400, detail="Unsupported platform")
+            token_data = await _exchange_linkedin_code(code)
 
         # Store tokens in Supabase
         await _store_oauth_tokens(user.user_id, platform, token_data)
@@ -166,13 +179,30 @@ async def oauth_callback(
         return OAuthTokenResponse(
             success=True,
             platform=platform,
-            message=f"{platform.capitalize()} connected successfully",
+            message=f"{cfg['display']} connected successfully",
         )
 
-    except Exception as e:
+    except httpx.HTTPStatusError as e:
+        # The platform rejected the token exchange (bad code, expired, etc.)
+        logger.warning(
+            "%s token exchange failed: %s %s",
+            cfg["display"], e.response.status_code, e.response.text,
+        )
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to complete OAuth flow: {cfg['display']} returned {e.response.status_code}",
+        )
+    except httpx.RequestError:
+        logger.warning("%s token exchange request failed", cfg["display"], exc_info=True)
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to complete OAuth flow: could not reach {cfg['display']}",
+        )
+    except Exception:
+        logger.exception("Failed to complete %s OAuth flow", cfg["display"])
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to complete OAuth flow: {str(e)}",
+            detail="Failed to complete OAuth flow",
         )
 
 
@@ -184,10 +214,7 @@ async def disconnect_platform(
     """
     Disconnect a platform by deleting stored tokens.
     """
-    platform = platform.lower()
-
-    if platform not in ["twitter", "linkedin"]:
-        raise HTTPException(status_code=400, detail="Unsupported platform")
+    platform, cfg = _get_platform_config(platform)
 
     if not settings.USE_SUPABASE:
         raise HTTPException(
@@ -195,8 +222,6 @@ async def disconnect_platform(
             detail="OAuth is only available when USE_SUPABASE is enabled",
         )
 
-    from app.database_supabase import UserSecretsRepository
-
     repo = UserSecretsRepository()
     deleted = await repo.delete_secret(user.user_id, platform)
 
@@ -209,7 +234,7 @@ async def disconnect_platform(
     return {
         "success": True,
         "platform": platform,
-        "message": f"{platform.capitalize()} disconnected",
+        "message": f"{cfg['display']} disconnected",
     }
 
 
@@ -221,10 +246,7 @@ async def get_oauth_status(
     """
     Check if a platform is connected (has valid tokens).
     """
-    platform = platform.lower()
-
-    if platform not in ["twitter", "linkedin"]:
-        raise HTTPException(status_code=400, detail="Unsupported platform")
+    platform, _ = _get_platform_config(platform)
 
     if not settings.USE_SUPABASE:
         return {
@@ -233,8 +255,6 @@ async def get_oauth_status(
             "message": "OAuth requires Supabase",
         }
 
-    from app.database_supabase import UserSecretsRepository
-
     repo = UserSecretsRepository()
     secret = await repo.get_secret(user.user_id, platform)
 
@@ -253,22 +273,20 @@ async def _exchange_twitter_code(code: str, code_verifier: str) -> dict:
     Exchange Twitter authorization code for access token.
     Returns: {access_token, refresh_token, expires_in, scope}
     """
-    import httpx
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.twitter.com/2/oauth2/token",
-            data={
-                "code": code,
-                "grant_type": "authorization_code",
-                "client_id": settings.TWITTER_CLIENT_ID,
-                "redirect_uri": settings.TWITTER_REDIRECT_URI,
-                "code_verifier": code_verifier,
-            },
-            auth=(settings.TWITTER_CLIENT_ID, settings.TWITTER_CLIENT_SECRET),
-        )
-        response.raise_for_status()
-        return response.json()
+    client = get_http_client()
+    response = await client.post(
+        _PLATFORM_CONFIG["twitter"]["token_url"],
+        data={
+            "code": code,
+            "grant_type": "authorization_code",
+            "client_id": settings.TWITTER_CLIENT_ID,
+            "redirect_uri": settings.TWITTER_REDIRECT_URI,
+            "code_verifier": code_verifier,
+        },
+        auth=(settings.TWITTER_CLIENT_ID, settings.TWITTER_CLIENT_SECRET),
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def _exchange_linkedin_code(code: str) -> dict:
@@ -276,21 +294,19 @@ async def _exchange_linkedin_code(code: str) -> dict:
     Exchange LinkedIn authorization code for access token.
     Returns: {access_token, expires_in, scope}
     """
-    import httpx
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://www.linkedin.com/oauth/v2/accessToken",
-            data={
-                "grant_type": "authorization_code",
-                "code": code,
-                "client_id": settings.LINKEDIN_CLIENT_ID,
-                "client_secret": settings.LINKEDIN_CLIENT_SECRET,
-                "redirect_uri": settings.LINKEDIN_REDIRECT_URI,
-            },
-        )
-        response.raise_for_status()
-        return response.json()
+    client = get_http_client()
+    response = await client.post(
+        _PLATFORM_CONFIG["linkedin"]["token_url"],
+        data={
+            "grant_type": "authorization_code",
+            "code": code,
+            "client_id": settings.LINKEDIN_CLIENT_ID,
+            "client_secret": settings.LINKEDIN_CLIENT_SECRET,
+            "redirect_uri": settings.LINKEDIN_REDIRECT_URI,
+        },
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def _store_oauth_tokens(user_id: str, platform: str, token_data: dict):
@@ -300,8 +316,6 @@ async def _store_oauth_tokens(user_id: str, platform: str, token_data: dict):
     if not settings.USE_SUPABASE:
         raise ValueError("Supabase is required for token storage")
 
-    from app.database_supabase import UserSecretsRepository
-
     repo = UserSecretsRepository()
 
     # Calculate expiration time
@@ -327,8 +341,6 @@ async def refresh_oauth_token(user_id: str, platform: str) -> dict:
     if not settings.USE_SUPABASE:
         raise ValueError("Supabase is required for token refresh")
 
-    from app.database_supabase import UserSecretsRepository
-
     repo = UserSecretsRepository()
     secret = await repo.get_secret(user_id, platform)
 
@@ -354,20 +366,18 @@ async def _refresh_twitter_token(refresh_token: str) -> dict:
     """
     Refresh Twitter access token using refresh token.
     """
-    import httpx
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.twitter.com/2/oauth2/token",
-            data={
-                "grant_type": "refresh_token",
-                "refresh_token": refresh_token,
-                "client_id": settings.TWITTER_CLIENT_ID,
-            },
-            auth=(settings.TWITTER_CLIENT_ID, settings.TWITTER_CLIENT_SECRET),
-        )
-        response.raise_for_status()
-        return response.json()
+    client = get_http_client()
+    response = await client.post(
+        _PLATFORM_CONFIG["twitter"]["token_url"],
+        data={
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": settings.TWITTER_CLIENT_ID,
+        },
+        auth=(settings.TWITTER_CLIENT_ID, settings.TWITTER_CLIENT_SECRET),
+    )
+    response.raise_for_status()
+    return response.json()
 
 
 async def cleanup_expired_oauth_states():
@@ -378,8 +388,6 @@ async def cleanup_expired_oauth_states():
     if not settings.USE_SUPABASE:
         return
 
-    from app.database_supabase import OAuthStateRepository
-
     repo = OAuthStateRepository()
     deleted_count = await repo.cleanup_expired()
     return deleted_count
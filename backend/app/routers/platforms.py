@@ -1,16 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import PlatformConfig, PlatformType
-from app.services.platform_service import PlatformService
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, upsert_insert
+from app.models import PLATFORM_BY_NAME, PlatformConfig
+from app.services.platform_service import platform_service
 from app.middleware.auth import ClerkUser, get_current_user
 from app.config import settings
-from sqlalchemy import select
+from app.utils.cache import TTLCache
+from sqlalchemy import func, select
 
 router = APIRouter()
-platform_service = PlatformService()
+
+# Platform configs only change through PUT /{platform}; cleared there
+_response_cache = TTLCache(ttl_seconds=60)
 
 class PlatformConfigRequest(BaseModel):
     api_key: Optional[str] = None
@@ -28,111 +31,110 @@ class PlatformConfigResponse(BaseModel):
     updated_at: Optional[str]
     has_credentials: bool
 
+# Only these columns are read for responses: credentials are reduced to a
+# boolean in SQL, so secret values never leave the database
+_has_credentials = (
+    PlatformConfig.bearer_token.isnot(None)
+    | (PlatformConfig.access_token.isnot(None) & PlatformConfig.api_key.isnot(None))
+).label("has_credentials")
+_RESPONSE_COLUMNS = (
+    PlatformConfig.id,
+    PlatformConfig.platform,
+    PlatformConfig.is_active,
+    PlatformConfig.updated_at,
+    _has_credentials,
+)
+
+def _to_response(row) -> PlatformConfigResponse:
+    """Build a response from a row of _RESPONSE_COLUMNS"""
+    return PlatformConfigResponse(
+        id=row.id,
+        platform=row.platform.value,
+        is_active=row.is_active,
+        updated_at=row.updated_at.isoformat() if row.updated_at else None,
+        has_credentials=bool(row.has_credentials),
+    )
+
 class TestConnectionResponse(BaseModel):
     success: bool
     message: str
 
 @router.get("/", response_model=list[PlatformConfigResponse])
-async def list_platforms(db: Session = Depends(get_db)):
+async def list_platforms(db: AsyncSession = Depends(get_db)):
     """List all platform configurations"""
-    result = db.execute(select(PlatformConfig))
-    configs = result.scalars().all()
+    cached = _response_cache.get("list")
+    if cached is not None:
+        return cached
     
-    return [
-        PlatformConfigResponse(
-            id=config.id,
-            platform=config.platform.value,
-            is_active=config.is_active,
-            updated_at=config.updated_at.isoformat() if config.updated_at else None,
-            has_credentials=bool(
-                config.bearer_token or (config.access_token and config.api_key)
-            )
-        )
-        for config in configs
-    ]
+    result = await db.execute(select(*_RESPONSE_COLUMNS))
+    response = [_to_response(row) for row in result]
+    _response_cache.set("list", response)
+    return response
 
 @router.get("/{platform}", response_model=PlatformConfigResponse)
-async def get_platform_config(platform: str, db: Session = Depends(get_db)):
+async def get_platform_config(platform: str, db: AsyncSession = Depends(get_db)):
     """Get configuration for a specific platform"""
-    try:
-        platform_type = PlatformType(platform.lower())
-    except ValueError:
+    platform_type = PLATFORM_BY_NAME.get(platform.lower())
+    if platform_type is None:
         raise HTTPException(status_code=400, detail=f"Invalid platform: {platform}")
     
-    result = db.execute(
-        select(PlatformConfig).where(PlatformConfig.platform == platform_type)
-    )
-    config = result.scalar_one_or_none()
+    cached = _response_cache.get(platform_type)
+    if cached is not None:
+        return cached
     
-    if not config:
-        # Create default config if it doesn't exist
-        config = PlatformConfig(
-            platform=platform_type,
-            is_active=False
-        )
-        db.add(config)
-        db.commit()
-        db.refresh(config)
+    query = select(*_RESPONSE_COLUMNS).where(PlatformConfig.platform == platform_type)
+    row = (await db.execute(query)).one_or_none()
     
-    return PlatformConfigResponse(
-        id=config.id,
-        platform=config.platform.value,
-        is_active=config.is_active,
-        updated_at=config.updated_at.isoformat() if config.updated_at else None,
-        has_credentials=bool(
-            config.bearer_token or (config.access_token and config.api_key)
+    if row is None:
+        # Create default config if it doesn't exist; a concurrent request
+        # may have created it first
+        await db.execute(
+            upsert_insert(PlatformConfig)
+            .values(platform=platform_type, is_active=False)
+            .on_conflict_do_nothing(index_elements=[PlatformConfig.platform])
         )
-    )
+        await db.commit()
+        _response_cache.invalidate("list")
+        row = (await db.execute(query)).one()
+    
+    response = _to_response(row)
+    _response_cache.set(platform_type, response)
+    return response
 
 @router.put("/{platform}", response_model=PlatformConfigResponse)
 async def update_platform_config(
     platform: str,
     config_data: PlatformConfigRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update platform configuration"""
-    try:
-        platform_type = PlatformType(platform.lower())
-    except ValueError:
+    platform_type = PLATFORM_BY_NAME.get(platform.lower())
+    if platform_type is None:
         raise HTTPException(status_code=400, detail=f"Invalid platform: {platform}")
     
-    result = db.execute(
-        select(PlatformConfig).where(PlatformConfig.platform == platform_type)
+    # Insert or update in one statement; only fields that were sent are written
+    updates = config_data.model_dump(exclude_none=True)
+    stmt = (
+        upsert_insert(PlatformConfig)
+        .values(platform=platform_type, **updates)
+        .on_conflict_do_update(
+            index_elements=[PlatformConfig.platform],
+            set_={**updates, "updated_at": func.now()},
+        )
     )
-    config = result.scalar_one_or_none()
-    
-    if not config:
-        config = PlatformConfig(platform=platform_type)
-        db.add(config)
+    await db.execute(stmt)
     
-    # Update fields
-    if config_data.api_key is not None:
-        config.api_key = config_data.api_key
-    if config_data.api_secret is not None:
-        config.api_secret = config_data.api_secret
-    if config_data.access_token is not None:
-        config.access_token = config_data.access_token
-    if config_data.access_token_secret is not None:
-        config.access_token_secret = config_data.access_token_secret
-    if config_data.bearer_token is not None:
-        config.bearer_token = config_data.bearer_token
-    if config_data.linkedin_org_id is not None:
-        config.linkedin_org_id = config_data.linkedin_org_id
-    if config_data.is_active is not None:
-        config.is_active = config_data.is_active
-    
-    db.commit()
-    db.refresh(config)
-    
-    return PlatformConfigResponse(
-        id=config.id,
-        platform=config.platform.value,
-        is_active=config.is_active,
-        updated_at=config.updated_at.isoformat() if config.updated_at else None,
-        has_credentials=bool(
-            config.bearer_token or (config.access_token and config.api_key)
+    # Read back with a plain SELECT: SQLite before 3.41 can evaluate
+    # IS NOT NULL in an upsert's RETURNING clause before the row is written
+    row = (
+        await db.execute(
+            select(*_RESPONSE_COLUMNS).where(PlatformConfig.platform == platform_type)
         )
-    )
+    ).one()
+    await db.commit()
+    _response_cache.invalidate("list", platform_type)
+    
+    return _to_response(row)
 
 @router.post("/{platform}/test", response_model=TestConnectionResponse)
 async def test_platform_connection(platform: str):
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from pydantic import BaseModel
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.models import ScheduledPost, PostStatus, PlatformType
-from sqlalchemy import select
+from app.models import PLATFORM_BY_NAME, POST_STATUS_BY_NAME, ScheduledPost
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from sqlalchemy import select, tuple_
 from datetime import datetime
 
 router = APIRouter()
 
+# Upper bound on posts per page
+MAX_POSTS_PAGE_SIZE = 1000
+
 class ScheduledPostResponse(BaseModel):
     id: int
     draft_id: int
@@ -22,33 +26,65 @@ class ScheduledPostResponse(BaseModel):
     
     @classmethod
     def from_orm(cls, post: ScheduledPost):
-        return cls(**post.to_dict())
+        # to_dict already produces this exact shape from a trusted ORM row,
+        # so skip per-field validation
+        return cls.model_construct(**post.to_dict())
 
 @router.get("/", response_model=List[ScheduledPostResponse])
 async def list_posts(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_POSTS_PAGE_SIZE),
     status: Optional[str] = None,
     platform: Optional[str] = None
 ):
-    """List all scheduled/posted content"""
+    """
+    List all scheduled/posted content, newest first.
+    
+    Pass the X-Next-Cursor response header back as `cursor` to fetch the
+    next page. `skip` is kept for older clients.
+    """
     query = select(ScheduledPost)
     
     if status:
-        query = query.where(ScheduledPost.status == PostStatus(status))
+        status_enum = POST_STATUS_BY_NAME.get(status)
+        if status_enum is None:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
+        query = query.where(ScheduledPost.status == status_enum)
     if platform:
-        query = query.where(ScheduledPost.platform == PlatformType(platform))
+        platform_type = PLATFORM_BY_NAME.get(platform)
+        if platform_type is None:
+            raise HTTPException(status_code=400, detail=f"Invalid platform: {platform}")
+        query = query.where(ScheduledPost.platform == platform_type)
     
-    result = db.execute(query.offset(skip).limit(limit).order_by(ScheduledPost.scheduled_time.desc()))
+    if cursor:
+        try:
+            cursor_time, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(
+            tuple_(ScheduledPost.scheduled_time, ScheduledPost.id) < (cursor_time, cursor_id)
+        )
+    elif skip:
+        query = query.offset(skip)
+    
+    result = await db.execute(
+        query.order_by(ScheduledPost.scheduled_time.desc(), ScheduledPost.id.desc()).limit(limit)
+    )
     posts = result.scalars().all()
     
+    if posts and len(posts) == limit:
+        last = posts[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.scheduled_time, last.id)
+    
     return [ScheduledPostResponse.from_orm(post) for post in posts]
 
 @router.get("/{post_id}", response_model=ScheduledPostResponse)
-async def get_post(post_id: int, db: Session = Depends(get_db)):
+async def get_post(post_id: int, db: AsyncSession = Depends(get_db)):
     """Get a specific scheduled post"""
-    result = db.execute(select(ScheduledPost).where(ScheduledPost.id == post_id))
+    result = await db.execute(select(ScheduledPost).where(ScheduledPost.id == post_id))
     post = result.scalar_one_or_none()
     
     if not post:
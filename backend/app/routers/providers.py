@@ -1,15 +1,27 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, upsert_insert
 from app.models import AIProviderConfig
+from sqlalchemy import func, select, update
 from app.providers.factory import list_providers, get_provider
 from app.config import settings
+from app.services.llm_service import clear_content_cache
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
 import json
 
 router = APIRouter()
 
+# Current provider only changes through /select and /{name}/config; cleared there
+_response_cache = TTLCache(ttl_seconds=60)
+
+# Concurrent tests of the same provider share one probe, and a healthy
+# result is reused briefly so a dashboard refresh doesn't re-probe
+_health_flights = SingleFlight()
+_health_cache = TTLCache(ttl_seconds=10)
+
 class ProviderConfigRequest(BaseModel):
     config: Dict[str, Any]
 
@@ -22,36 +34,44 @@ async def list_available_providers():
     return {"providers": list_providers()}
 
 @router.get("/current")
-async def get_current_provider(db: Session = Depends(get_db)):
+async def get_current_provider(db: AsyncSession = Depends(get_db)):
     """Get the currently active provider"""
+    cached = _response_cache.get("current")
+    if cached is not None:
+        return cached
+    
     try:
         # Check database for active provider
-        active_config = db.query(AIProviderConfig).filter(
-            AIProviderConfig.is_active == True
-        ).first()
+        result = await db.execute(
+            select(AIProviderConfig).where(AIProviderConfig.is_active == True).limit(1)
+        )
+        active_config = result.scalar_one_or_none()
         
         if active_config:
-            return {
+            current = {
                 "provider_name": active_config.provider_name,
                 "display_name": active_config.to_dict().get("display_name", active_config.provider_name),
                 "is_active": True
             }
+        else:
+            # Fall back to default from settings
+            default_provider = settings.AI_PROVIDER
+            providers = list_providers()
+            provider_info = next((p for p in providers if p["name"] == default_provider), None)
+            
+            current = {
+                "provider_name": default_provider,
+                "display_name": provider_info["display_name"] if provider_info else default_provider,
+                "is_active": False  # Not explicitly set in DB
+            }
         
-        # Fall back to default from settings
-        default_provider = settings.AI_PROVIDER
-        providers = list_providers()
-        provider_info = next((p for p in providers if p["name"] == default_provider), None)
-        
-        return {
-            "provider_name": default_provider,
-            "display_name": provider_info["display_name"] if provider_info else default_provider,
-            "is_active": False  # Not explicitly set in DB
-        }
+        _response_cache.set("current", current)
+        return current
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting current provider: {str(e)}")
 
 @router.post("/select")
-async def select_provider(request: SelectProviderRequest, db: Session = Depends(get_db)):
+async def select_provider(request: SelectProviderRequest, db: AsyncSession = Depends(get_db)):
     """Select and activate a provider"""
     try:
         # Validate provider exists
@@ -63,26 +83,23 @@ async def select_provider(request: SelectProviderRequest, db: Session = Depends(
                 detail=f"Unknown provider: {request.provider_name}"
             )
         
-        # Deactivate all providers
-        db.query(AIProviderConfig).update({AIProviderConfig.is_active: False})
-        
-        # Activate the selected provider
-        provider_config = db.query(AIProviderConfig).filter(
-            AIProviderConfig.provider_name == request.provider_name
-        ).first()
+        # Make sure the selected provider has a row
+        await db.execute(
+            upsert_insert(AIProviderConfig)
+            .values(provider_name=request.provider_name, is_active=True, config_json=None)
+            .on_conflict_do_nothing(index_elements=[AIProviderConfig.provider_name])
+        )
         
-        if provider_config:
-            provider_config.is_active = True
-        else:
-            # Create new config if it doesn't exist
-            provider_config = AIProviderConfig(
-                provider_name=request.provider_name,
-                is_active=True,
-                config_json=None
+        # Activate it and deactivate every other provider in one UPDATE
+        await db.execute(
+            update(AIProviderConfig).values(
+                is_active=(AIProviderConfig.provider_name == request.provider_name)
             )
-            db.add(provider_config)
+        )
         
-        db.commit()
+        await db.commit()
+        _response_cache.invalidate("current")
+        clear_content_cache()
         
         return {
             "provider_name": request.provider_name,
@@ -91,16 +108,17 @@ async def select_provider(request: SelectProviderRequest, db: Session = Depends(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error selecting provider: {str(e)}")
 
 @router.get("/{provider_name}/config")
-async def get_provider_config(provider_name: str, db: Session = Depends(get_db)):
+async def get_provider_config(provider_name: str, db: AsyncSession = Depends(get_db)):
     """Get configuration for a specific provider"""
     try:
-        provider_config = db.query(AIProviderConfig).filter(
-            AIProviderConfig.provider_name == provider_name
-        ).first()
+        result = await db.execute(
+            select(AIProviderConfig).where(AIProviderConfig.provider_name == provider_name)
+        )
+        provider_config = result.scalar_one_or_none()
         
         if provider_config:
             return provider_config.to_dict(include_secrets=False)
@@ -130,56 +148,61 @@ async def get_provider_config(provider_name: str, db: Session = Depends(get_db))
 async def update_provider_config(
     provider_name: str,
     request: ProviderConfigRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update configuration for a specific provider"""
     try:
-        provider_config = db.query(AIProviderConfig).filter(
-            AIProviderConfig.provider_name == provider_name
-        ).first()
-        
         config_json = json.dumps(request.config)
         
-        if provider_config:
-            provider_config.config_json = config_json
-        else:
-            provider_config = AIProviderConfig(
-                provider_name=provider_name,
-                config_json=config_json,
-                is_active=False
-            )
-            db.add(provider_config)
-        
-        db.commit()
+        # Insert or update the provider's config in one statement
+        stmt = upsert_insert(AIProviderConfig).values(
+            provider_name=provider_name,
+            config_json=config_json,
+            is_active=False
+        ).on_conflict_do_update(
+            index_elements=[AIProviderConfig.provider_name],
+            set_={"config_json": config_json, "updated_at": func.now()}
+        )
+        await db.execute(stmt)
+        await db.commit()
+        _response_cache.invalidate("current")
+        clear_content_cache()
+        _health_cache.invalidate(provider_name)
         
         return {
             "provider_name": provider_name,
             "message": "Configuration updated"
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating provider config: {str(e)}")
 
 @router.post("/{provider_name}/test")
-async def test_provider(provider_name: str, db: Session = Depends(get_db)):
+async def test_provider(provider_name: str, db: AsyncSession = Depends(get_db)):
     """Test connection to a provider"""
-    try:
-        provider = get_provider(provider_name=provider_name, db=db)
-        is_healthy = await provider.check_health()
-        
-        if is_healthy:
-            return {
-                "provider_name": provider_name,
-                "status": "healthy",
-                "message": f"{provider.get_display_name()} is accessible"
-            }
-        else:
-            raise HTTPException(
-                status_code=503,
-                detail=f"{provider.get_display_name()} is not accessible"
-            )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error testing provider: {str(e)}")
-
+    async def probe():
+        provider = await get_provider(provider_name=provider_name, db=db)
+        return provider.get_display_name(), await provider.check_health()
+    
+    result = _health_cache.get(provider_name)
+    if result is None:
+        try:
+            result = await _health_flights.do(provider_name, probe)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error testing provider: {str(e)}")
+    
+    display_name, is_healthy = result
+    if not is_healthy:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{display_name} is not accessible"
+        )
+    
+    _health_cache.set(provider_name, result)
+    return {
+        "provider_name": provider_name,
+        "status": "healthy",
+        "message": f"{display_name} is accessible"
+    }
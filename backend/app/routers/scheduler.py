@@ -5,23 +5,47 @@ Supports both SQLite (local dev) and Supabase (production) backends.
 When USE_SUPABASE is enabled, all operations are user-scoped.
 """
 
-from datetime import datetime
-from typing import Optional
-
-import pytz
-from fastapi import APIRouter, Depends, HTTPException
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db
 from app.middleware.auth import ClerkUser, get_current_user
-from app.models import Draft, PlatformType, PostStatus, ScheduledPost
-from app.services.scheduler_service import scheduler_service
+from app.models import (
+    PLATFORM_BY_NAME,
+    POST_STATUS_BY_NAME,
+    Draft,
+    PostStatus,
+    ScheduledPost,
+)
+from app.services.scheduler_service import ScheduledPostData, scheduler_service
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    decode_position_cursor,
+    encode_cursor,
+    encode_position_cursor,
+    parse_keyset_position,
+)
 
 router = APIRouter()
 
+# Calendar posts per page; clients follow next_cursor for the rest
+CALENDAR_PAGE_SIZE = 200
+MAX_CALENDAR_PAGE_SIZE = 1000
+
+# Upper bound on posts per list_scheduled_posts page
+MAX_POSTS_PAGE_SIZE = 1000
+
 
 class ScheduleRequest(BaseModel):
     draft_id: str  # UUID string for Supabase, can be int-as-string for SQLite
@@ -41,44 +65,106 @@ class ScheduleResponse(BaseModel):
     user_id: Optional[str] = None
 
 
+async def _stream_calendar(query, limit: int) -> AsyncIterator[bytes]:
+    """
+    Stream a calendar page as JSON, grouping rows by date as they arrive.
+
+    Rows are ordered by (scheduled_time, id), so each date's posts are
+    contiguous and a group can be closed as soon as the next date starts;
+    each finished group is sent as one chunk. The query fetches one row
+    past `limit`; if it arrives, the page ends with a next_cursor. Uses its
+    own session because the body is produced after the handler has returned.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=200))
+
+        parts = [b'{"calendar":{']
+        current_date = None
+        total = 0
+        last = None
+        next_cursor = None
+        async for row in result:
+            if total == limit:
+                next_cursor = encode_cursor(last.scheduled_time, last.id)
+                break
+            if row.date_key != current_date:
+                if current_date is not None:
+                    parts.append(b"],")
+                    yield b"".join(parts)
+                    parts = []
+                parts.append(orjson.dumps(row.date_key) + b":[")
+                current_date = row.date_key
+            else:
+                parts.append(b",")
+            total += 1
+            last = row
+            parts.append(
+                orjson.dumps(
+                    {
+                        "id": str(row.id),
+                        "platform": row.platform.value,
+                        "content": f"{row.preview}..." if row.truncated else row.preview,
+                        "scheduled_time": row.scheduled_time,
+                        "draft_id": str(row.draft_id),
+                        "status": row.status.value,
+                        "error_message": row.error_message,
+                    }
+                )
+            )
+        await result.close()
+        if current_date is not None:
+            parts.append(b"]")
+        parts.append(b'},"total":%d,"next_cursor":' % total)
+        parts.append(orjson.dumps(next_cursor) + b"}")
+        yield b"".join(parts)
+
+
 @router.post("/schedule", response_model=ScheduleResponse, status_code=201)
 async def schedule_post(
     request: ScheduleRequest,
+    background_tasks: BackgroundTasks,
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Schedule a post for future publication."""
     # Parse and validate scheduled time
     try:
-        if request.timezone and request.timezone != "UTC":
-            tz = pytz.timezone(request.timezone)
-            scheduled_dt = datetime.fromisoformat(
-                request.scheduled_time.replace("Z", "+00:00")
-            )
-            if scheduled_dt.tzinfo is None:
-                scheduled_dt = tz.localize(scheduled_dt)
-            scheduled_dt = scheduled_dt.astimezone(pytz.UTC)
-        else:
-            scheduled_dt = datetime.fromisoformat(
-                request.scheduled_time.replace("Z", "+00:00")
-            )
+        # fromisoformat accepts a trailing "Z" on Python 3.11+
+        scheduled_dt = datetime.fromisoformat(request.scheduled_time)
+        # Validated up front so a bad name is rejected even for UTC timestamps;
+        # ZoneInfo caches instances per key, so repeat lookups are cheap
+        tz = (
+            ZoneInfo(request.timezone)
+            if request.timezone and request.timezone != "UTC"
+            else None
+        )
+        if scheduled_dt.tzinfo is timezone.utc:
+            # Already UTC ("Z" or "+00:00"): nothing to convert
+            pass
+        elif tz is not None:
             if scheduled_dt.tzinfo is None:
-                scheduled_dt = pytz.UTC.localize(scheduled_dt)
+                scheduled_dt = scheduled_dt.replace(tzinfo=tz)
+            scheduled_dt = scheduled_dt.astimezone(timezone.utc)
+        elif scheduled_dt.tzinfo is None:
+            scheduled_dt = scheduled_dt.replace(tzinfo=timezone.utc)
+    except ZoneInfoNotFoundError:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid timezone: {request.timezone}"
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=400, detail=f"Invalid datetime format: {str(e)}"
         )
 
     # Check if scheduled time is in the future
-    if scheduled_dt <= datetime.now(pytz.UTC):
+    if scheduled_dt <= datetime.now(timezone.utc):
         raise HTTPException(
             status_code=400, detail="Scheduled time must be in the future"
         )
 
     # Validate platform
-    try:
-        platform = PlatformType(request.platform.lower())
-    except ValueError:
+    platform = PLATFORM_BY_NAME.get(request.platform.lower())
+    if platform is None:
         raise HTTPException(
             status_code=400, detail=f"Invalid platform: {request.platform}"
         )
@@ -88,9 +174,7 @@ async def schedule_post(
 
         # Validate draft exists and belongs to user
         draft_repo = DraftRepository()
-        draft = await draft_repo.get_by_id(request.draft_id, user.user_id)
-
-        if not draft:
+        if not await draft_repo.exists(request.draft_id, user.user_id):
             raise HTTPException(status_code=404, detail="Draft not found")
 
         # Create scheduled post
@@ -106,8 +190,6 @@ async def schedule_post(
         )
 
         # Convert to ScheduledPostData for scheduler
-        from app.services.scheduler_service import ScheduledPostData
-
         scheduled_post_data = ScheduledPostData(
             id=str(post["id"]),
             scheduled_time=scheduled_dt,
@@ -116,18 +198,12 @@ async def schedule_post(
             user_id=post["user_id"],
         )
 
-        # Register with scheduler
-        scheduler_service.schedule_post(scheduled_post_data)
+        # Register with scheduler after the response is sent
+        background_tasks.add_task(scheduler_service.schedule_post, scheduled_post_data)
 
-        return ScheduleResponse(
-            id=post["id"],
-            draft_id=post["draft_id"],
-            platform=post["platform"],
-            content=post["content"],
-            scheduled_time=post["scheduled_time"],
-            status=post["status"],
-            user_id=post["user_id"],
-        )
+        # The row already has the response's fields; response_model validates
+        # and filters it once instead of building a model here and again there
+        return post
     else:
         # SQLite fallback
         try:
@@ -135,34 +211,47 @@ async def schedule_post(
         except ValueError:
             raise HTTPException(status_code=404, detail="Draft not found")
 
-        result = db.execute(select(Draft).where(Draft.id == draft_id_int))
-        draft = result.scalar_one_or_none()
+        # Insert from a SELECT on the draft, so the existence check and the
+        # insert are a single statement; no row back means no such draft
+        stmt = (
+            insert(ScheduledPost)
+            .from_select(
+                ["draft_id", "platform", "content", "scheduled_time", "status"],
+                select(
+                    Draft.id,
+                    literal(platform, ScheduledPost.platform.type),
+                    literal(request.content, ScheduledPost.content.type),
+                    literal(scheduled_dt, ScheduledPost.scheduled_time.type),
+                    literal(PostStatus.SCHEDULED, ScheduledPost.status.type),
+                ).where(Draft.id == draft_id_int),
+            )
+            .returning(ScheduledPost.id, ScheduledPost.scheduled_time)
+        )
+        row = (await db.execute(stmt)).one_or_none()
 
-        if not draft:
+        if row is None:
             raise HTTPException(status_code=404, detail="Draft not found")
 
-        scheduled_post = ScheduledPost(
-            draft_id=draft_id_int,
-            platform=platform,
-            content=request.content,
-            scheduled_time=scheduled_dt,
-            status=PostStatus.SCHEDULED,
-        )
-
-        db.add(scheduled_post)
-        db.commit()
-        db.refresh(scheduled_post)
+        await db.commit()
 
-        # Add to scheduler
-        scheduler_service.schedule_post(scheduled_post)
+        # Add to scheduler after the response is sent
+        background_tasks.add_task(
+            scheduler_service.schedule_post,
+            ScheduledPostData(
+                id=row.id,
+                scheduled_time=row.scheduled_time,
+                platform=platform,
+                content=request.content,
+            )
+        )
 
         return ScheduleResponse(
-            id=str(scheduled_post.id),
-            draft_id=str(scheduled_post.draft_id),
-            platform=scheduled_post.platform.value,
-            content=scheduled_post.content,
-            scheduled_time=scheduled_post.scheduled_time.isoformat(),
-            status=scheduled_post.status.value,
+            id=str(row.id),
+            draft_id=str(draft_id_int),
+            platform=platform.value,
+            content=request.content,
+            scheduled_time=row.scheduled_time.isoformat(),
+            status=PostStatus.SCHEDULED.value,
             user_id=user.user_id,
         )
 
@@ -171,7 +260,7 @@ async def schedule_post(
 async def cancel_post(
     post_id: str,
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Cancel a scheduled post."""
     if settings.USE_SUPABASE:
@@ -209,7 +298,7 @@ async def cancel_post(
         except ValueError:
             raise HTTPException(status_code=404, detail="Post not found")
 
-        result = db.execute(
+        result = await db.execute(
             select(ScheduledPost).where(ScheduledPost.id == post_id_int)
         )
         post = result.scalar_one_or_none()
@@ -224,7 +313,7 @@ async def cancel_post(
             )
 
         post.status = PostStatus.CANCELLED
-        db.commit()
+        await db.commit()
 
         # Remove from scheduler
         scheduler_service.unschedule_post(post_id_int)
@@ -235,11 +324,17 @@ async def cancel_post(
 @router.get("/calendar", response_model=dict)
 async def get_calendar(
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(CALENDAR_PAGE_SIZE, ge=1, le=MAX_CALENDAR_PAGE_SIZE),
 ):
-    """Get calendar view of scheduled posts for the authenticated user."""
+    """
+    Get calendar view of scheduled posts for the authenticated user.
+
+    Returns at most `limit` posts; when more remain, pass the returned
+    `next_cursor` back as `cursor` and merge the pages' date groups.
+    """
     if settings.USE_SUPABASE:
         from app.database_supabase import ScheduledPostRepository
 
@@ -247,7 +342,7 @@ async def get_calendar(
 
         # Parse dates
         start_dt = (
-            datetime.fromisoformat(start_date) if start_date else datetime.now(pytz.UTC)
+            datetime.fromisoformat(start_date) if start_date else datetime.now(timezone.utc)
         )
         end_dt = datetime.fromisoformat(end_date) if end_date else None
 
@@ -257,24 +352,32 @@ async def get_calendar(
 
             end_dt = start_dt + timedelta(days=90)
 
-        posts = await repo.get_calendar(user.user_id, start_dt, end_dt)
+        after = None
+        if cursor:
+            try:
+                after = parse_keyset_position(decode_position_cursor(cursor)["calendar"])
+            except (KeyError, ValueError):
+                raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
 
-        # Group by date
-        calendar = {}
-        for post in posts:
-            scheduled_time = datetime.fromisoformat(
-                post["scheduled_time"].replace("Z", "+00:00")
+        posts = await repo.get_calendar(
+            user.user_id, start_dt, end_dt, limit=limit + 1, after=after
+        )
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = encode_position_cursor(
+                {"calendar": [posts[-1]["scheduled_time"], posts[-1]["id"]]}
             )
-            date_key = scheduled_time.date().isoformat()
-            if date_key not in calendar:
-                calendar[date_key] = []
-            calendar[date_key].append(
+
+        # Group by date; ISO timestamps start with the date, so the key is
+        # a slice rather than a full parse per post
+        calendar = defaultdict(list)
+        for post in posts:
+            calendar[post["scheduled_time"][:10]].append(
                 {
                     "id": post["id"],
                     "platform": post["platform"],
-                    "content": post["content"][:50] + "..."
-                    if len(post["content"]) > 50
-                    else post["content"],
+                    "content": post["content_preview"],
                     "scheduled_time": post["scheduled_time"],
                     "draft_id": post["draft_id"],
                     "status": post["status"],
@@ -282,12 +385,27 @@ async def get_calendar(
                 }
             )
 
-        return {"calendar": calendar, "total": len(posts)}
-    else:
-        # SQLite fallback
-        query = select(ScheduledPost).where(
-            ScheduledPost.status == PostStatus.SCHEDULED
+        return Response(
+            orjson.dumps(
+                {"calendar": calendar, "total": len(posts), "next_cursor": next_cursor}
+            ),
+            media_type="application/json",
         )
+    else:
+        # SQLite fallback: date grouping key and preview truncation are
+        # computed in SQL so only the preview is transferred per row, and
+        # the response is streamed so the full page is never held in memory
+        query = select(
+            func.date(ScheduledPost.scheduled_time).label("date_key"),
+            ScheduledPost.id,
+            ScheduledPost.platform,
+            func.substr(ScheduledPost.content, 1, 50).label("preview"),
+            (func.length(ScheduledPost.content) > 50).label("truncated"),
+            ScheduledPost.scheduled_time,
+            ScheduledPost.draft_id,
+            ScheduledPost.status,
+            ScheduledPost.error_message,
+        ).where(ScheduledPost.status == PostStatus.SCHEDULED)
 
         if start_date:
             start_dt = datetime.fromisoformat(start_date)
@@ -297,41 +415,43 @@ async def get_calendar(
             end_dt = datetime.fromisoformat(end_date)
             query = query.where(ScheduledPost.scheduled_time <= end_dt)
 
-        result = db.execute(query.order_by(ScheduledPost.scheduled_time))
-        posts = result.scalars().all()
-
-        # Group by date
-        calendar = {}
-        for post in posts:
-            date_key = post.scheduled_time.date().isoformat()
-            if date_key not in calendar:
-                calendar[date_key] = []
-            calendar[date_key].append(
-                {
-                    "id": str(post.id),
-                    "platform": post.platform.value,
-                    "content": post.content[:50] + "..."
-                    if len(post.content) > 50
-                    else post.content,
-                    "scheduled_time": post.scheduled_time.isoformat(),
-                    "draft_id": str(post.draft_id),
-                    "status": post.status.value,
-                    "error_message": post.error_message,
-                }
+        if cursor:
+            try:
+                cursor_time, cursor_id = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            query = query.where(
+                tuple_(ScheduledPost.scheduled_time, ScheduledPost.id)
+                > (cursor_time, cursor_id)
             )
 
-        return {"calendar": calendar, "total": len(posts)}
+        return StreamingResponse(
+            _stream_calendar(
+                query.order_by(ScheduledPost.scheduled_time, ScheduledPost.id).limit(
+                    limit + 1
+                ),
+                limit,
+            ),
+            media_type="application/json",
+        )
 
 
 @router.get("/posts", response_model=list)
 async def list_scheduled_posts(
+    response: Response,
     user: ClerkUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=MAX_POSTS_PAGE_SIZE),
 ):
-    """List all scheduled posts for the authenticated user."""
+    """
+    List all scheduled posts for the authenticated user.
+
+    In SQLite mode, pages are keyset-paginated: pass the X-Next-Cursor
+    response header back as `cursor`. Supabase mode pages with `skip`.
+    """
     if settings.USE_SUPABASE:
         from app.database_supabase import ScheduledPostRepository
 
@@ -359,28 +479,45 @@ async def list_scheduled_posts(
         query = select(ScheduledPost)
 
         if status:
-            try:
-                status_enum = PostStatus(status.lower())
+            # Unknown statuses are ignored rather than rejected
+            status_enum = POST_STATUS_BY_NAME.get(status.lower())
+            if status_enum is not None:
                 query = query.where(ScheduledPost.status == status_enum)
-            except ValueError:
-                pass
 
-        result = db.execute(
-            query.order_by(ScheduledPost.scheduled_time.desc())
-            .offset(skip)
-            .limit(limit)
+        if cursor:
+            try:
+                cursor_time, cursor_id = decode_cursor(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            query = query.where(
+                tuple_(ScheduledPost.scheduled_time, ScheduledPost.id)
+                < (cursor_time, cursor_id)
+            )
+        elif skip:
+            query = query.offset(skip)
+
+        result = await db.execute(
+            query.order_by(
+                ScheduledPost.scheduled_time.desc(), ScheduledPost.id.desc()
+            ).limit(limit)
         )
         posts = result.scalars().all()
 
+        if posts and len(posts) == limit:
+            last = posts[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                last.scheduled_time, last.id
+            )
+
         return [
             {
                 "id": str(post.id),
                 "draft_id": str(post.draft_id),
                 "platform": post.platform.value,
                 "content": post.content,
-                "scheduled_time": post.scheduled_time.isoformat(),
+                "scheduled_time": post.scheduled_time,
                 "status": post.status.value,
-                "posted_at": post.posted_at.isoformat() if post.posted_at else None,
+                "posted_at": post.posted_at,
                 "error_message": post.error_message,
                 "user_id": user.user_id,
             }
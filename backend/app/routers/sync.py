@@ -5,23 +5,51 @@ Provides endpoints for bi-directional synchronization between
 frontend localStorage and Supabase backend.
 """
 
+import asyncio
+from collections import Counter, defaultdict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.config import settings
+from app.database_supabase import (
+    ConflictError,
+    DraftRepository,
+    ScheduledPostRepository,
+    SyncMetadataRepository,
+)
 from app.middleware.auth import ClerkUser, get_current_user
+from app.utils.cache import TTLCache
+from app.utils.pagination import (
+    decode_position_cursor,
+    encode_position_cursor,
+    parse_keyset_position,
+)
 
 router = APIRouter()
 
+# Upper bound on Supabase requests a single push runs concurrently
+MAX_CONCURRENT_CHANGES = 16
+
+# Per-user status counts for polling clients; a push clears the pusher's
+# entry, and the short TTL bounds staleness from writes made elsewhere
+# (drafts, scheduling, other devices)
+_status_cache = TTLCache(ttl_seconds=5)
+
+# Drafts and scheduled posts per pull page, each
+PULL_PAGE_SIZE = 500
+MAX_PULL_PAGE_SIZE = 1000
+
 
 # Request/Response Models
 
 
 class SyncPullRequest(BaseModel):
     last_sync_at: Optional[datetime] = None
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    limit: int = Field(PULL_PAGE_SIZE, ge=1, le=MAX_PULL_PAGE_SIZE)
 
 
 class SyncPullResponse(BaseModel):
@@ -29,6 +57,8 @@ class SyncPullResponse(BaseModel):
     scheduled_posts: List[Dict[str, Any]]
     deleted_ids: List[str]
     sync_timestamp: str
+    has_more: bool = False
+    next_cursor: Optional[str] = None
 
 
 class SyncPushItem(BaseModel):
@@ -68,10 +98,15 @@ async def sync_pull(
     Pull all changes since last sync.
 
     Returns:
-    - drafts: All drafts modified since last_sync_at
-    - scheduled_posts: All scheduled posts modified since last_sync_at
+    - drafts: Drafts modified since last_sync_at
+    - scheduled_posts: Scheduled posts modified since last_sync_at
     - deleted_ids: IDs of entities deleted since last_sync_at
     - sync_timestamp: Timestamp to use for next pull
+
+    Drafts and posts are paged by `limit` each. While has_more is set,
+    repeat the pull with the same last_sync_at and cursor=next_cursor;
+    deleted_ids come with the first page and every page carries the same
+    sync_timestamp.
     """
     if not settings.USE_SUPABASE:
         raise HTTPException(
@@ -79,35 +114,75 @@ async def sync_pull(
             detail="Sync is only available when USE_SUPABASE is enabled",
         )
 
-    from app.database_supabase import (
-        DraftRepository,
-        ScheduledPostRepository,
-        SyncMetadataRepository,
-    )
-
-    sync_timestamp = datetime.utcnow()
-
-    # Get drafts modified since last sync
-    draft_repo = DraftRepository()
-    drafts = await draft_repo.get_modified_since(user.user_id, request.last_sync_at)
+    if request.cursor:
+        try:
+            positions = decode_position_cursor(request.cursor)
+            sync_timestamp = datetime.fromisoformat(positions.pop("sync_timestamp"))
+            positions = {
+                key: parse_keyset_position(positions[key])
+                for key in ("drafts", "scheduled_posts")
+                if key in positions
+            }
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=400, detail=f"Invalid cursor: {request.cursor}"
+            )
+    else:
+        positions = None
+        # Taken before the reads so writes that land during them are picked
+        # up by the next pull rather than missed
+        sync_timestamp = datetime.utcnow()
+
+    async def fetch_page(key: str, repo, sort_column: str):
+        """Fetch one page of a stream, returning it and its next position."""
+        if positions is not None and key not in positions:
+            # Finished on an earlier page
+            return [], None
+        rows = await repo.get_modified_since(
+            user.user_id,
+            request.last_sync_at,
+            limit=request.limit + 1,
+            after=positions.get(key) if positions else None,
+        )
+        if len(rows) <= request.limit:
+            return rows, None
+        rows = rows[: request.limit]
+        return rows, [rows[-1][sort_column], rows[-1]["id"]]
+
+    async def fetch_deletions():
+        if positions is not None:
+            return []
+        return await SyncMetadataRepository().get_deletions_since(
+            user.user_id, request.last_sync_at
+        )
 
-    # Get scheduled posts modified since last sync
-    post_repo = ScheduledPostRepository()
-    scheduled_posts = await post_repo.get_modified_since(
-        user.user_id, request.last_sync_at
+    # Modified drafts, modified scheduled posts and deleted IDs are
+    # independent reads, so fetch them concurrently
+    (drafts, drafts_after), (scheduled_posts, posts_after), deleted_ids = (
+        await asyncio.gather(
+            fetch_page("drafts", DraftRepository(), "updated_at"),
+            fetch_page("scheduled_posts", ScheduledPostRepository(), "created_at"),
+            fetch_deletions(),
+        )
     )
 
-    # Get deleted entity IDs
-    sync_repo = SyncMetadataRepository()
-    deleted_ids = await sync_repo.get_deletions_since(
-        user.user_id, request.last_sync_at
-    )
+    next_positions = {
+        key: after
+        for key, after in (("drafts", drafts_after), ("scheduled_posts", posts_after))
+        if after
+    }
+    next_cursor = None
+    if next_positions:
+        next_positions["sync_timestamp"] = sync_timestamp.isoformat()
+        next_cursor = encode_position_cursor(next_positions)
 
     return SyncPullResponse(
         drafts=drafts,
         scheduled_posts=scheduled_posts,
         deleted_ids=deleted_ids,
         sync_timestamp=sync_timestamp.isoformat(),
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
     )
 
 
@@ -131,99 +206,103 @@ async def sync_push(
             detail="Sync is only available when USE_SUPABASE is enabled",
         )
 
-    from app.database_supabase import (
-        ConflictError,
-        DraftRepository,
-        ScheduledPostRepository,
-        SyncMetadataRepository,
-    )
-
-    results = []
-    success_count = 0
-    conflict_count = 0
-    error_count = 0
-
     draft_repo = DraftRepository()
     post_repo = ScheduledPostRepository()
     sync_repo = SyncMetadataRepository()
 
-    for change in request.changes:
-        try:
+    # The _process_* helpers append successful deletes here; they are
+    # recorded for other devices in one insert once all changes are done
+    pending_deletions: List[Tuple[str, str]] = []
+
+    # Changes to different entities are processed concurrently; the
+    # semaphore caps how many Supabase requests one push has in flight.
+    # Changes to the same entity keep their order via a per-entity lock
+    # (asyncio locks are FIFO and tasks start in list order).
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHANGES)
+    entity_locks = defaultdict(asyncio.Lock)
+
+    async def process(change: SyncPushItem) -> SyncPushResult:
+        async with entity_locks[(change.entity_type, change.entity_id)], semaphore:
             if change.entity_type == "draft":
-                result = await _process_draft_change(
-                    change, user.user_id, draft_repo, sync_repo
-                )
-            elif change.entity_type == "scheduled_post":
-                result = await _process_scheduled_post_change(
-                    change, user.user_id, post_repo, sync_repo
+                return await _process_draft_change(
+                    change, user.user_id, draft_repo, pending_deletions
                 )
-            else:
-                result = SyncPushResult(
-                    entity_id=change.entity_id,
-                    status="error",
-                    message=f"Unknown entity type: {change.entity_type}",
+            if change.entity_type == "scheduled_post":
+                return await _process_scheduled_post_change(
+                    change, user.user_id, post_repo, pending_deletions
                 )
+            return SyncPushResult(
+                entity_id=change.entity_id,
+                status="error",
+                message=f"Unknown entity type: {change.entity_type}",
+            )
 
-            results.append(result)
+    outcomes = await asyncio.gather(
+        *(process(change) for change in request.changes), return_exceptions=True
+    )
 
-            if result.status == "success":
-                success_count += 1
-            elif result.status == "conflict":
-                conflict_count += 1
-            else:
-                error_count += 1
+    results = [
+        outcome
+        if isinstance(outcome, SyncPushResult)
+        else SyncPushResult(
+            entity_id=change.entity_id, status="error", message=str(outcome)
+        )
+        for change, outcome in zip(request.changes, outcomes)
+    ]
 
+    if pending_deletions:
+        try:
+            await sync_repo.record_deletions_bulk(user.user_id, pending_deletions)
         except Exception as e:
-            results.append(
+            # The rows are gone but other devices won't hear about it
+            deleted_ids = {entity_id for _, entity_id in pending_deletions}
+            results = [
                 SyncPushResult(
-                    entity_id=change.entity_id, status="error", message=str(e)
+                    entity_id=result.entity_id,
+                    status="error",
+                    message=f"Deleted but failed to record deletion: {e}",
                 )
-            )
-            error_count += 1
+                if result.entity_id in deleted_ids and result.status == "success"
+                else result
+                for result in results
+            ]
+
+    counts = Counter(result.status for result in results)
+    if counts["success"]:
+        _status_cache.invalidate(user.user_id)
 
     return SyncPushResponse(
         results=results,
-        success_count=success_count,
-        conflict_count=conflict_count,
-        error_count=error_count,
+        success_count=counts["success"],
+        conflict_count=counts["conflict"],
+        error_count=len(results) - counts["success"] - counts["conflict"],
     )
 
 
 async def _process_draft_change(
-    change: SyncPushItem, user_id: str, repo, sync_repo
+    change: SyncPushItem, user_id: str, repo, deletions: List[Tuple[str, str]]
 ) -> SyncPushResult:
     """Process a single draft change."""
-    from app.database_supabase import ConflictError
-
     if change.action == "create":
+        # Creates are replayed from offline clients, so the draft may already
+        # exist; upsert handles both cases in one round trip
         try:
-            draft = await repo.create(
-                user_id, change.data or {}, draft_id=change.entity_id
+            draft, _ = await repo.upsert(
+                user_id,
+                change.entity_id,
+                change.data or {},
+                client_updated_at=change.client_updated_at,
             )
+        except ConflictError as ce:
             return SyncPushResult(
-                entity_id=change.entity_id, status="success", server_data=draft
+                entity_id=change.entity_id,
+                status="conflict",
+                message=str(ce),
+                server_data={"updated_at": ce.server_updated_at},
             )
-        except Exception as e:
-            # May fail if already exists - try update instead
-            if "duplicate" in str(e).lower():
-                try:
-                    draft = await repo.update(
-                        change.entity_id,
-                        user_id,
-                        change.data or {},
-                        client_updated_at=change.client_updated_at,
-                    )
-                    return SyncPushResult(
-                        entity_id=change.entity_id, status="success", server_data=draft
-                    )
-                except ConflictError as ce:
-                    return SyncPushResult(
-                        entity_id=change.entity_id,
-                        status="conflict",
-                        message=str(ce),
-                        server_data={"updated_at": ce.server_updated_at},
-                    )
-            raise
+        return SyncPushResult(
+            entity_id=change.entity_id, status="success", server_data=draft
+        )
 
     elif change.action == "update":
         try:
@@ -253,7 +332,7 @@ async def _process_draft_change(
     elif change.action == "delete":
         deleted = await repo.delete(change.entity_id, user_id)
         if deleted:
-            await sync_repo.record_deletion(user_id, "draft", change.entity_id)
+            deletions.append(("draft", change.entity_id))
         return SyncPushResult(entity_id=change.entity_id, status="success")
 
     return SyncPushResult(
@@ -264,7 +343,7 @@ async def _process_draft_change(
 
 
 async def _process_scheduled_post_change(
-    change: SyncPushItem, user_id: str, repo, sync_repo
+    change: SyncPushItem, user_id: str, repo, deletions: List[Tuple[str, str]]
 ) -> SyncPushResult:
     """Process a single scheduled post change."""
     if change.action == "create":
@@ -296,7 +375,7 @@ async def _process_scheduled_post_change(
     elif change.action == "delete":
         deleted = await repo.delete(change.entity_id, user_id)
         if deleted:
-            await sync_repo.record_deletion(user_id, "scheduled_post", change.entity_id)
+            deletions.append(("scheduled_post", change.entity_id))
         return SyncPushResult(entity_id=change.entity_id, status="success")
 
     return SyncPushResult(
@@ -315,18 +394,17 @@ async def sync_status(user: ClerkUser = Depends(get_current_user)):
             "message": "Sync is only available when USE_SUPABASE is enabled",
         }
 
-    from app.database_supabase import DraftRepository, ScheduledPostRepository
-
-    draft_repo = DraftRepository()
-    post_repo = ScheduledPostRepository()
+    cached = _status_cache.get(user.user_id)
+    if cached is not None:
+        return dict(cached)
 
-    drafts = await draft_repo.list_by_user(user.user_id)
-    posts = await post_repo.list_by_user(user.user_id)
+    counts = await SyncMetadataRepository().get_user_counts(user.user_id)
 
-    return {
+    status = {
         "enabled": True,
         "user_id": user.user_id,
-        "draft_count": len(drafts),
-        "scheduled_post_count": len(posts),
+        **counts,
         "last_checked": datetime.utcnow().isoformat(),
     }
+    _status_cache.set(user.user_id, status)
+    return dict(status)
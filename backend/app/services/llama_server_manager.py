@@ -1,21 +1,48 @@
-import subprocess
 import os
+import shutil
 import signal
 import psutil
-import httpx
 import asyncio
+import random
+import time
+from collections import deque
+from operator import itemgetter
 from typing import Optional, Dict
-from pathlib import Path
 from datetime import datetime, timedelta
 import logging
+import httpx
+
+from app.utils.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+# Executable names find_llama_server accepts; also used to recognise orphans
+SERVER_BINARY_NAMES = ("llama-server", "llama-cpp-server")
+
+# stderr lines kept for error messages when the server exits
+STDERR_TAIL_LINES = 50
+
+# Upper bound on a single health probe in the monitor (seconds)
+HEALTH_PROBE_TIMEOUT = 3
+
+# Upper bound on finding and stopping a llama-server we didn't start (seconds)
+ORPHAN_STOP_TIMEOUT = 5
+
+# How long a model listing is reused; file sizes change mid-download
+# without touching the directory mtime (seconds)
+MODELS_CACHE_TTL = 5
+
+# Backoff between port probes while llama-server starts (seconds)
+STARTUP_PROBE_DELAYS = (0.05, 0.1, 0.2, 0.4, 0.8, 1.5)
+
+# A local server that takes longer than this to answer is treated as down
+HEALTH_TIMEOUT = httpx.Timeout(1.0, connect=0.5)
+
 class LlamaServerManager:
     """Manages llama.cpp server process"""
     
     def __init__(self):
-        self.process: Optional[subprocess.Popen] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
         self.server_url = "http://localhost:8080"
         self.cache_dir = os.path.expanduser("~/Library/Caches/llama.cpp")
         self.port = 8080
@@ -27,34 +54,45 @@ class LlamaServerManager:
         self.restart_history: list[datetime] = []
         self.last_health_check: Optional[datetime] = None
         self.health_check_interval = 30  # seconds
+        # Checks come faster after a failure, doubling back up to the cap
+        self.unhealthy_check_interval = 2  # seconds
+        self.health_check_backoff_cap = 30  # seconds
+        # (cache_dir mtime, expiry, models); adding/removing a file bumps the mtime
+        self._models_cache: Optional[tuple[int, float, list]] = None
+        self._server_binary: Optional[str] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        # Model reported by a running server we didn't start
+        self._external_model: Optional[str] = None
+        self._stderr_tail: deque[str] = deque(maxlen=STDERR_TAIL_LINES)
+        # Guards start/stop so concurrent calls don't race on self.process
+        self._lock = asyncio.Lock()
         
     def find_llama_server(self) -> Optional[str]:
+        """Find llama-server binary, reusing the last hit while it's still executable"""
+        cached = self._server_binary
+        if cached and os.access(cached, os.X_OK):
+            return cached
+        self._server_binary = self._scan_for_llama_server()
+        return self._server_binary
+
+    def _scan_for_llama_server(self) -> Optional[str]:
         """Find llama-server binary in PATH"""
-        # Common locations
-        possible_paths = [
-            "llama-server",
-            "llama-cpp-server",
-            os.path.expanduser("~/.local/bin/llama-server"),
-            "/usr/local/bin/llama-server",
-        ]
-        
-        # Check PATH
-        for path in os.environ.get("PATH", "").split(os.pathsep):
-            possible_paths.append(os.path.join(path, "llama-server"))
-        
-        for path in possible_paths:
-            if os.path.isfile(path) and os.access(path, os.X_OK):
+        for name in SERVER_BINARY_NAMES:
+            path = shutil.which(name)
+            if path:
                 return path
         
-        # Try to find in common llama.cpp build directories
+        # Common install and llama.cpp build locations
         home = os.path.expanduser("~")
-        possible_dirs = [
+        possible_paths = [
+            os.path.join(home, ".local", "bin", "llama-server"),
+            "/usr/local/bin/llama-server",
             os.path.join(home, "llama.cpp", "build", "bin", "llama-server"),
             os.path.join(home, "llama.cpp", "llama-server"),
             "/opt/llama.cpp/llama-server",
         ]
         
-        for path in possible_dirs:
+        for path in possible_paths:
             if os.path.isfile(path) and os.access(path, os.X_OK):
                 return path
         
@@ -62,43 +100,108 @@ class LlamaServerManager:
     
     def get_available_models(self) -> list:
         """Get list of available GGUF models"""
+        try:
+            mtime = os.stat(self.cache_dir).st_mtime_ns
+        except OSError:
+            return []
+        now = time.monotonic()
+        if self._models_cache:
+            cached_mtime, expires_at, cached = self._models_cache
+            if cached_mtime == mtime and now < expires_at:
+                return [dict(model) for model in cached]
+
         models = []
-        if os.path.exists(self.cache_dir):
-            for file in os.listdir(self.cache_dir):
-                if file.endswith(".gguf"):
-                    model_path = os.path.join(self.cache_dir, file)
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                # is_file() comes from the directory listing, no extra stat
+                if entry.name.endswith(".gguf") and entry.is_file():
+                    try:
+                        size = entry.stat().st_size
+                    except OSError:
+                        size = 0
                     models.append({
-                        "name": file,
-                        "path": model_path,
-                        "size": os.path.getsize(model_path) if os.path.exists(model_path) else 0
+                        "name": entry.name,
+                        "path": entry.path,
+                        "size": size
                     })
-        return sorted(models, key=lambda x: x["name"])
+        models.sort(key=itemgetter("name"))
+        self._models_cache = (mtime, now + MODELS_CACHE_TTL, models)
+        return [dict(model) for model in models]
+    
+    def _terminate_listener(self, port: int) -> bool:
+        """Terminate a llama-server listening on port; whether one was stopped"""
+        try:
+            pid = self._find_pid_on_port(port)
+            if pid is None:
+                return False
+            proc = psutil.Process(pid)
+            cmdline = proc.cmdline()
+            if not cmdline or os.path.basename(cmdline[0]) not in SERVER_BINARY_NAMES:
+                return False
+            proc.terminate()
+            proc.wait(timeout=3)
+            return True
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.TimeoutExpired):
+            return False
+    
+    def _process_alive(self) -> bool:
+        """Whether the server process we started is still running"""
+        return self.process is not None and self.process.returncode is None
+    
+    async def _port_accepting(self) -> bool:
+        """Whether something accepts TCP connections on our port"""
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection("127.0.0.1", self.port), timeout=0.1
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        return True
+    
+    def _find_pid_on_port(self, port: int) -> Optional[int]:
+        """PID of the process listening on a local TCP port, if any"""
+        try:
+            # One pass over the socket table instead of one syscall per process
+            connections = psutil.net_connections(kind='tcp')
+        except psutil.AccessDenied:
+            # macOS only exposes the system-wide table to root
+            return self._scan_for_listener(port)
+        for conn in connections:
+            if conn.status == psutil.CONN_LISTEN and conn.laddr.port == port:
+                return conn.pid
+        return None
+    
+    def _scan_for_listener(self, port: int) -> Optional[int]:
+        """Per-process fallback for _find_pid_on_port"""
+        # Only the name is prefetched; connections() runs on the few matches
+        for proc in psutil.process_iter(['name']):
+            if proc.info.get('name') not in SERVER_BINARY_NAMES:
+                continue
+            try:
+                for conn in proc.connections(kind='tcp'):
+                    if conn.status == psutil.CONN_LISTEN and conn.laddr.port == port:
+                        return proc.pid
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return None
     
-    def is_server_running(self) -> bool:
+    async def is_server_running(self) -> bool:
         """Check if llama.cpp server is running"""
         # Check if we have a process
-        if self.process and self.process.poll() is None:
+        if self._process_alive():
             return True
         
-        # Check if port is in use
-        try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    cmdline = proc.info.get('cmdline', [])
-                    if cmdline and 'llama-server' in ' '.join(cmdline):
-                        # Check if it's listening on our port
-                        connections = proc.connections()
-                        for conn in connections:
-                            if conn.status == psutil.CONN_LISTEN and conn.laddr.port == self.port:
-                                return True
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-        except Exception as e:
-            logger.error(f"Error checking server status: {e}")
+        # Probe the port directly instead of walking every process
+        if await self._port_accepting():
+            return True
         
-        # Try HTTP check
+        # Nothing accepted in time: fall back to the HTTP check. HEAD skips
+        # the body and the shared client reuses its keep-alive connection
         try:
-            response = httpx.get(f"{self.server_url}/health", timeout=2.0)
+            response = await get_http_client().head(
+                f"{self.server_url}/health", timeout=HEALTH_TIMEOUT
+            )
             return response.status_code == 200
         except:
             pass
@@ -107,7 +210,12 @@ class LlamaServerManager:
     
     async def start_server(self, model_name: str) -> Dict:
         """Start llama.cpp server with specified model"""
-        if self.is_server_running():
+        # Serialized so a double-click can't spawn two servers (each mmaps the model)
+        async with self._lock:
+            return await self._start_server(model_name)
+    
+    async def _start_server(self, model_name: str) -> Dict:
+        if await self.is_server_running():
             return {
                 "success": False,
                 "message": "Server is already running",
@@ -134,33 +242,39 @@ class LlamaServerManager:
         
         try:
             # Start server process
-            self.process = subprocess.Popen(
-                [
-                    server_binary,
-                    "--model", model_path,
-                    "--port", str(self.port),
-                    "--host", "0.0.0.0",
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                preexec_fn=os.setsid if os.name != 'nt' else None
+            self.process = await asyncio.create_subprocess_exec(
+                server_binary,
+                "--model", model_path,
+                "--port", str(self.port),
+                "--host", "0.0.0.0",
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=os.name != 'nt'
             )
+            # Keep reading stderr for the server's whole life; an unread pipe
+            # fills up and blocks llama-server on its next log write
+            self._stderr_tail.clear()
+            self._stderr_task = asyncio.create_task(self._drain_stderr(self.process))
             
-            # Wait a moment to see if it starts successfully
-            import asyncio
-            await asyncio.sleep(2)
+            # Wait until the port accepts connections or the process exits,
+            # backing off so fast starts return quickly (~3s at most)
+            for delay in STARTUP_PROBE_DELAYS:
+                await asyncio.sleep(delay)
+                if self.process.returncode is not None or await self._port_accepting():
+                    break
             
-            if self.process.poll() is not None:
-                # Process died
-                stdout, stderr = self.process.communicate()
+            if self.process.returncode is not None:
+                # Process died; the pipe is at EOF once the drain task finishes
+                await self._stderr_task
+                stderr = "\n".join(self._stderr_tail)
                 return {
                     "success": False,
-                    "message": f"Server failed to start: {stderr.decode() if stderr else 'Unknown error'}",
+                    "message": f"Server failed to start: {stderr or 'Unknown error'}",
                     "status": "error"
                 }
             
             # Verify it's actually running
-            if self.is_server_running():
+            if await self.is_server_running():
                 self.model_name = model_name
                 # Start health monitoring if enabled
                 if self.auto_restart_enabled:
@@ -186,6 +300,13 @@ class LlamaServerManager:
                 "status": "error"
             }
     
+    async def _drain_stderr(self, process: asyncio.subprocess.Process):
+        """Read the server's stderr until it exits, keeping the last lines"""
+        async for line in process.stderr:
+            text = line.decode(errors="replace").rstrip()
+            self._stderr_tail.append(text)
+            logger.debug(f"llama-server: {text}")
+    
     def _can_restart(self) -> bool:
         """Check if we can restart (rate limiting)"""
         now = datetime.now()
@@ -204,52 +325,84 @@ class LlamaServerManager:
     
     async def _monitor_health(self):
         """Monitor server health and auto-restart on crash"""
+        backoff = None  # seconds until the next check while unhealthy
         while self.auto_restart_enabled:
             try:
-                await asyncio.sleep(self.health_check_interval)
+                if backoff is None:
+                    # Jitter keeps several managers from polling in lockstep
+                    await self._sleep_unless_exit(self.health_check_interval + random.uniform(0, 2))
+                else:
+                    await asyncio.sleep(backoff)
                 
                 if not self.model_name:
                     # No model started, nothing to monitor
+                    backoff = None
                     continue
                 
-                is_running = self.is_server_running()
+                try:
+                    async with asyncio.timeout(HEALTH_PROBE_TIMEOUT):
+                        is_running = await self.is_server_running()
+                except TimeoutError:
+                    is_running = False
+                self.last_health_check = datetime.now()
                 
-                if not is_running:
-                    # Check if we have a process that died
-                    if self.process and self.process.poll() is not None:
-                        # Process crashed or stopped unexpectedly
-                        logger.warning("Server process appears to have crashed")
-                        
-                        # Clear the process reference
-                        self.process = None
+                if is_running:
+                    backoff = None
+                    continue
+                
+                if backoff is None:
+                    backoff = self.unhealthy_check_interval
+                else:
+                    backoff = min(backoff * 2, self.health_check_backoff_cap)
+                
+                # Check if we have a process that died
+                if self.process and self.process.returncode is not None:
+                    # Process crashed or stopped unexpectedly
+                    logger.warning("Server process appears to have crashed")
+                    
+                    # Clear the process reference
+                    self.process = None
+                    
+                    # Check if we can restart
+                    if not self._can_restart():
+                        logger.error("Cannot auto-restart: rate limit exceeded")
+                        self.model_name = None  # Clear model to stop monitoring
+                        continue
+                    
+                    # Attempt auto-restart
+                    if self.model_name:
+                        logger.info(f"Attempting to auto-restart server with model: {self.model_name}")
+                        self.restart_history.append(datetime.now())
+                        saved_model = self.model_name
+                        result = await self.start_server(saved_model)
                         
-                        # Check if we can restart
-                        if not self._can_restart():
-                            logger.error("Cannot auto-restart: rate limit exceeded")
-                            self.model_name = None  # Clear model to stop monitoring
-                            continue
+                        if result.get("success"):
+                            logger.info("Server auto-restarted successfully")
+                            self.restart_count += 1
+                            backoff = None
+                        else:
+                            logger.error(f"Auto-restart failed: {result.get('message')}")
+                            # If restart fails, retry after the backoff delay
                         
-                        # Attempt auto-restart
-                        if self.model_name:
-                            logger.info(f"Attempting to auto-restart server with model: {self.model_name}")
-                            self.restart_history.append(datetime.now())
-                            saved_model = self.model_name
-                            result = await self.start_server(saved_model)
-                            
-                            if result.get("success"):
-                                logger.info("Server auto-restarted successfully")
-                                self.restart_count += 1
-                            else:
-                                logger.error(f"Auto-restart failed: {result.get('message')}")
-                                # If restart fails, don't keep trying immediately
-                                # Wait for next check cycle
-                            
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in health monitor: {e}")
                 await asyncio.sleep(self.health_check_interval)
     
+    async def _sleep_unless_exit(self, delay: float):
+        """Sleep for delay, returning early if our server process exits"""
+        process = self.process
+        if process is None or process.returncode is not None:
+            await asyncio.sleep(delay)
+            return
+        try:
+            # The child watcher resolves wait() on exit, so a crash is
+            # noticed immediately rather than at the next poll
+            await asyncio.wait_for(process.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+    
     def _start_monitoring(self):
         """Start health monitoring task"""
         if self.monitor_task and not self.monitor_task.done():
@@ -266,6 +419,10 @@ class LlamaServerManager:
     
     async def stop_server(self) -> Dict:
         """Stop llama.cpp server"""
+        async with self._lock:
+            return await self._stop_server()
+    
+    async def _stop_server(self) -> Dict:
         self._stop_monitoring()
         stopped = False
         
@@ -276,15 +433,21 @@ class LlamaServerManager:
                     os.killpg(os.getpgid(self.process.pid), signal.SIGTERM)
                 else:
                     self.process.terminate()
-                self.process.wait(timeout=5)
+                await asyncio.wait_for(self.process.wait(), timeout=5)
                 stopped = True
             except Exception as e:
-                logger.error(f"Error stopping process: {e}")
+                if isinstance(e, asyncio.TimeoutError):
+                    logger.warning("Server did not exit within 5s of SIGTERM, killing it")
+                else:
+                    logger.error(f"Error stopping process: {e}")
                 try:
                     if os.name != 'nt':
                         os.killpg(os.getpgid(self.process.pid), signal.SIGKILL)
                     else:
                         self.process.kill()
+                    # Reap it so the exit status is collected; SIGKILL can't
+                    # be ignored, so this only waits on the kernel
+                    await asyncio.wait_for(self.process.wait(), timeout=5)
                     stopped = True
                 except:
                     pass
@@ -292,21 +455,16 @@ class LlamaServerManager:
                 self.process = None
                 self.model_name = None
         
-        # Also try to find and kill any other llama-server on our port
+        # Also try to find and kill any other llama-server on our port. psutil
+        # blocks, so it runs in a thread and is bounded like the health probe
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    cmdline = proc.info.get('cmdline', [])
-                    if cmdline and 'llama-server' in ' '.join(cmdline):
-                        connections = proc.connections()
-                        for conn in connections:
-                            if conn.status == psutil.CONN_LISTEN and conn.laddr.port == self.port:
-                                proc.terminate()
-                                proc.wait(timeout=3)
-                                stopped = True
-                                break
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.TimeoutExpired):
-                    continue
+            if await asyncio.wait_for(
+                asyncio.to_thread(self._terminate_listener, self.port),
+                timeout=ORPHAN_STOP_TIMEOUT,
+            ):
+                stopped = True
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out stopping llama-server on port {self.port}")
         except Exception as e:
             logger.error(f"Error finding server process: {e}")
         
@@ -325,20 +483,24 @@ class LlamaServerManager:
     
     async def get_server_status(self) -> Dict:
         """Get current server status"""
-        is_running = self.is_server_running()
+        try:
+            async with asyncio.timeout(HEALTH_PROBE_TIMEOUT):
+                is_running = await self.is_server_running()
+        except TimeoutError:
+            is_running = False
         
         status = {
             "running": is_running,
             "url": self.server_url,
             "port": self.port,
-            "pid": self.process.pid if self.process and self.process.poll() is None else None,
+            "pid": self.process.pid if self._process_alive() else None,
             "model": self.model_name,
             "auto_restart": self.auto_restart_enabled,
             "restart_count": self.restart_count,
         }
         
         # Get resource usage if process is running
-        if self.process and self.process.poll() is None:
+        if self._process_alive():
             try:
                 proc = psutil.Process(self.process.pid)
                 status["resources"] = {
@@ -349,17 +511,21 @@ class LlamaServerManager:
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
         
-        # Try to get model info from API if server is running
-        if is_running:
-            try:
-                async with httpx.AsyncClient(timeout=2.0) as client:
-                    response = await client.get(f"{self.server_url}/v1/models")
+        # A server we didn't start can't tell us its model until we ask; the
+        # answer is kept while it stays up so polls don't repeat the request
+        if not is_running:
+            self._external_model = None
+        elif not self.model_name:
+            if self._external_model is None:
+                try:
+                    response = await get_http_client().get(f"{self.server_url}/v1/models", timeout=2.0)
                     if response.status_code == 200:
                         data = response.json()
                         if "data" in data and len(data["data"]) > 0:
-                            status["model"] = data["data"][0].get("id", self.model_name or "unknown")
-            except:
-                pass
+                            self._external_model = data["data"][0].get("id")
+                except:
+                    pass
+            status["model"] = self._external_model
         
         return status
 
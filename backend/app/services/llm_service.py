@@ -1,20 +1,174 @@
-import hashlib
-import json
-from typing import Optional
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+import asyncio
+import sqlite3
+import threading
+import time
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.providers.factory import get_provider
 from app.providers.base import BaseAIProvider
+from app.config import settings
+from app.utils.singleflight import SingleFlight
+
+# (prompt, system_prompt, max_tokens, temperature, platform)
+CacheKey = tuple[str, str, int, float, str]
+
+CACHE_TTL_SECONDS = 24 * 60 * 60.0  # Cache for 24 hours
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class ContentCache:
+    """
+    LRU cache of generated content with a TTL, bounded by total text size
+    
+    Every method runs without awaiting, so callers on the event loop
+    can't interleave and no lock is needed.
+    """
+    
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self.size = 0
+        # {cache_key: (content, monotonic expiry, size)}, least recently used first
+        self._entries: OrderedDict[CacheKey, tuple[str, float, int]] = OrderedDict()
+    
+    @staticmethod
+    def _entry_size(cache_key: CacheKey, content: str) -> int:
+        # The key holds the prompts, so they count against the budget too
+        return len(content.encode()) + len(cache_key[0].encode()) + len(cache_key[1].encode())
+    
+    def get(self, cache_key: CacheKey) -> Optional[str]:
+        """Get cached content if it exists and hasn't expired"""
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+        
+        content, expiry_time, size = entry
+        
+        # Check if expired
+        if time.monotonic() > expiry_time:
+            del self._entries[cache_key]
+            self.size -= size
+            return None
+        
+        # Mark as most recently used
+        self._entries.move_to_end(cache_key)
+        return content
+    
+    def set(self, cache_key: CacheKey, content: str):
+        """Store content in cache"""
+        size = self._entry_size(cache_key, content)
+        if size > self.max_bytes:
+            return
+        
+        now = time.monotonic()
+        previous = self._entries.pop(cache_key, None)
+        if previous is not None:
+            self.size -= previous[2]
+        
+        if self.size + size > self.max_bytes:
+            # Full: drop whatever has expired in one pass before evicting live entries
+            expired = [key for key, (_, expiry, _) in self._entries.items() if expiry < now]
+            for key in expired:
+                self.size -= self._entries.pop(key)[2]
+        
+        # Evict least recently used entries until the new one fits
+        while self.size + size > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+        
+        self._entries[cache_key] = (content, now + self.ttl, size)
+        self.size += size
+    
+    def clear(self):
+        """Drop every entry"""
+        self._entries.clear()
+        self.size = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PersistentContentCache:
+    """
+    SQLite-backed store of generated content that outlives the process
+    
+    Sits behind ContentCache: read on a memory miss and written alongside it.
+    Expiry is wall-clock time, since monotonic time resets on restart. Calls
+    block on disk, so async callers run them in a worker thread.
+    """
+    
+    def __init__(self, path: str, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS generated_content "
+                "(cache_key BLOB PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_generated_content_expires_at "
+                "ON generated_content (expires_at)"
+            )
+            self._conn.execute("DELETE FROM generated_content WHERE expires_at <= ?", (time.time(),))
+    
+    @staticmethod
+    def _encode_key(cache_key: CacheKey) -> bytes:
+        return orjson.dumps(cache_key)
+    
+    def get(self, cache_key: CacheKey) -> Optional[str]:
+        """Get stored content if it exists and hasn't expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content FROM generated_content WHERE cache_key = ? AND expires_at > ?",
+                (self._encode_key(cache_key), time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def set(self, cache_key: CacheKey, content: str):
+        """Store content, dropping expired rows along the way"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM generated_content WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generated_content VALUES (?, ?, ?)",
+                (self._encode_key(cache_key), content, now + self.ttl)
+            )
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM generated_content")
+
+
+# LLMService is built per request, so the cache lives at module level to
+# be shared across requests
+_content_cache = ContentCache(CACHE_TTL_SECONDS, MAX_CACHE_BYTES)
+
+# Opt-in on-disk copy, so a restart doesn't discard a day of generations
+_persistent_cache = (
+    PersistentContentCache(settings.LLM_CACHE_PATH, CACHE_TTL_SECONDS)
+    if settings.LLM_CACHE_PATH else None
+)
+
+# Identical generate calls that miss the cache together share one provider call
+_generate_flights = SingleFlight()
+
+
+def clear_content_cache():
+    """Forget all generated content, e.g. after the provider or its config changes"""
+    _content_cache.clear()
+    if _persistent_cache is not None:
+        _persistent_cache.clear()
+
 
 class LLMService:
     """Service for interacting with AI providers"""
     
-    def __init__(self, db: Optional[Session] = None):
+    def __init__(self, db: Optional[AsyncSession] = None):
         self.db = db
-        # Simple in-memory cache: {cache_key: (content, expiry_time)}
-        self._cache: dict[str, tuple[str, datetime]] = {}
-        self._cache_ttl = timedelta(hours=24)  # Cache for 24 hours
-        self._max_cache_size = 1000  # Limit cache size
         self._provider: Optional[BaseAIProvider] = None
         
     def _get_cache_key(
@@ -24,54 +178,24 @@ class LLMService:
         max_tokens: int,
         temperature: float,
         platform: Optional[str] = None
-    ) -> str:
+    ) -> CacheKey:
         """Generate a cache key from prompt and parameters"""
-        # Create a hash from the request parameters
-        # For caching purposes, we round temperature to 2 decimals to allow some variance
-        cache_data = {
-            "prompt": prompt,
-            "system_prompt": system_prompt,
-            "max_tokens": max_tokens,
-            "temperature": round(temperature, 2),
-            "platform": platform or "general"
-        }
-        cache_string = json.dumps(cache_data, sort_keys=True)
-        return hashlib.sha256(cache_string.encode()).hexdigest()
-    
-    def _get_cached_content(self, cache_key: str) -> Optional[str]:
+        # The key never leaves the process, so the parameters themselves are
+        # the key. Temperature is rounded to 2 decimals to allow some variance
+        return (prompt, system_prompt, max_tokens, round(temperature, 2), platform or "general")
+    
+    def _get_cached_content(self, cache_key: CacheKey) -> Optional[str]:
         """Get cached content if it exists and hasn't expired"""
-        if cache_key not in self._cache:
-            return None
-        
-        content, expiry_time = self._cache[cache_key]
-        
-        # Check if expired
-        if datetime.now() > expiry_time:
-            del self._cache[cache_key]
-            return None
-        
-        return content
+        return _content_cache.get(cache_key)
     
-    def _set_cached_content(self, cache_key: str, content: str):
+    def _set_cached_content(self, cache_key: CacheKey, content: str):
         """Store content in cache"""
-        # Limit cache size - remove oldest entries if needed
-        if len(self._cache) >= self._max_cache_size:
-            # Remove oldest 10% of entries
-            sorted_items = sorted(
-                self._cache.items(),
-                key=lambda x: x[1][1]  # Sort by expiry time
-            )
-            to_remove = len(sorted_items) // 10
-            for key, _ in sorted_items[:to_remove]:
-                del self._cache[key]
-        
-        expiry_time = datetime.now() + self._cache_ttl
-        self._cache[cache_key] = (content, expiry_time)
+        _content_cache.set(cache_key, content)
     
-    def _get_provider(self) -> BaseAIProvider:
+    async def _get_provider(self) -> BaseAIProvider:
         """Get the current provider instance"""
         if self._provider is None:
-            self._provider = get_provider(db=self.db)
+            self._provider = await get_provider(db=self.db)
         return self._provider
 
     async def generate_content(
@@ -101,20 +225,63 @@ class LLMService:
         if cached_content is not None:
             return cached_content
         
-        # Get provider and generate
-        provider = self._get_provider()
-        content = await provider.generate_content(
+        async def generate() -> str:
+            if _persistent_cache is not None:
+                stored = await asyncio.to_thread(_persistent_cache.get, cache_key)
+                if stored is not None:
+                    self._set_cached_content(cache_key, stored)
+                    return stored
+            
+            # Get provider and generate
+            provider = await self._get_provider()
+            content = await provider.generate_content(
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system_prompt=system_prompt,
+                platform=platform
+            )
+            
+            # Cache the result
+            self._set_cached_content(cache_key, content)
+            if _persistent_cache is not None:
+                await asyncio.to_thread(_persistent_cache.set, cache_key, content)
+            return content
+        
+        return await _generate_flights.do(cache_key, generate)
+    
+    async def generate_content_stream(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None,
+        platform: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated content from the configured AI provider
+        
+        A cached result is replayed as a single chunk. Streamed output is
+        not cached because it skips the provider's post-processing.
+        
+        Yields:
+            Chunks of generated text
+        """
+        cache_key = self._get_cache_key(prompt, system_prompt or "", max_tokens, temperature, platform)
+        cached_content = self._get_cached_content(cache_key)
+        if cached_content is not None:
+            yield cached_content
+            return
+        
+        provider = await self._get_provider()
+        async for chunk in provider.generate_content_stream(
             prompt=prompt,
             max_tokens=max_tokens,
             temperature=temperature,
             system_prompt=system_prompt,
             platform=platform
-        )
-        
-        # Cache the result
-        self._set_cached_content(cache_key, content)
-        
-        return content
+        ):
+            yield chunk
     
     async def edit_content(
         self, 
@@ -133,17 +300,37 @@ class LLMService:
         Returns:
             Edited content
         """
-        provider = self._get_provider()
+        provider = await self._get_provider()
         return await provider.edit_content(
             original_content=original_content,
             edit_instruction=edit_instruction,
             temperature=temperature
         )
     
+    async def edit_content_stream(
+        self,
+        original_content: str,
+        edit_instruction: str,
+        temperature: float = 0.5
+    ) -> AsyncIterator[str]:
+        """
+        Stream edited content from the configured AI provider
+        
+        Yields:
+            Chunks of edited text
+        """
+        provider = await self._get_provider()
+        async for chunk in provider.edit_content_stream(
+            original_content=original_content,
+            edit_instruction=edit_instruction,
+            temperature=temperature
+        ):
+            yield chunk
+    
     async def check_server_health(self) -> bool:
         """Check if the current AI provider is accessible"""
         try:
-            provider = self._get_provider()
+            provider = await self._get_provider()
             return await provider.check_health()
         except Exception:
             return False
@@ -1,19 +1,107 @@
-import httpx
 import os
 from typing import Optional
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal
 from app.models import PlatformType, PlatformConfig
 from sqlalchemy import select
+from sqlalchemy.orm import undefer_group
 import logging
 import base64
+import httpx
+import orjson
+import time
+import unicodedata
 from datetime import datetime
 from app.config import settings
+from app.utils.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+TWITTER_TWEETS_URL = "https://api.twitter.com/2/tweets"
+LINKEDIN_UGC_POSTS_URL = "https://api.linkedin.com/v2/ugcPosts"
+
+# Platform APIs get longer to respond than the client default, but an
+# unreachable host still fails fast
+PLATFORM_TIMEOUT = httpx.Timeout(15.0, connect=5.0, write=10.0, pool=5.0)
+
+# Static request headers; each post adds its own Authorization
+_TWITTER_HEADERS = {"Content-Type": "application/json"}
+_LINKEDIN_HEADERS = {
+    "Content-Type": "application/json",
+    "X-Restli-Protocol-Version": "2.0.0"
+}
+
+# Twitter counts most characters twice against the 280 limit; code points
+# in these ranges (Latin, common punctuation) count once
+TWEET_MAX_WEIGHT = 280
+_TWEET_LIGHT_RANGES = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+
+
+def _tweet_char_weight(char: str) -> int:
+    code = ord(char)
+    for start, end in _TWEET_LIGHT_RANGES:
+        if start <= code <= end:
+            return 1
+    return 2
+
+
+def _joins_previous(char: str) -> bool:
+    """Whether char belongs to the preceding character's grapheme"""
+    return (
+        unicodedata.combining(char) != 0
+        or char == "\u200d"  # zero-width joiner
+        or "\ufe00" <= char <= "\ufe0f"  # variation selectors
+        or "\U0001f3fb" <= char <= "\U0001f3ff"  # skin tone modifiers
+    )
+
+
+def _truncate_tweet(content: str) -> str:
+    """Fit content into a tweet by Twitter's weighted length, ending in '...'"""
+    weight = 0
+    for char in content:
+        weight += _tweet_char_weight(char)
+    if weight <= TWEET_MAX_WEIGHT:
+        return content
+
+    budget = TWEET_MAX_WEIGHT - 3  # room for "..."
+    cut = 0
+    weight = 0
+    for i, char in enumerate(content):
+        weight += _tweet_char_weight(char)
+        if weight > budget:
+            break
+        cut = i + 1
+    # Don't strand a combining mark or emoji modifier from its base
+    while cut > 0 and cut < len(content) and _joins_previous(content[cut]):
+        cut -= 1
+    return content[:cut] + "..."
+
+
+class NonRetriableError(Exception):
+    """A platform rejected the request outright; retrying it would fail the same way"""
+
+
+# Client errors that can succeed on a later attempt
+_RETRIABLE_CLIENT_STATUSES = {408, 429}
+
+
+def _raise_for_status(response: httpx.Response):
+    """raise_for_status, but 4xx rejections raise NonRetriableError"""
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        status = response.status_code
+        if 400 <= status < 500 and status not in _RETRIABLE_CLIENT_STATUSES:
+            raise NonRetriableError(str(e)) from e
+        raise
+
 class PlatformService:
     """Service for publishing to social media platforms"""
 
+    def __init__(self):
+        # LinkedIn person ID per user, stored with the token it was looked up
+        # with so reconnecting (possibly as another member) triggers a fresh lookup
+        self._linkedin_person_ids: dict[str, tuple[str, str]] = {}
+
     async def publish_post(self, platform: str, content: str, user_id: Optional[str] = None) -> dict:
         """
         Publish content to the specified platform
@@ -33,6 +121,17 @@ class PlatformService:
         else:
             raise ValueError(f"Unsupported platform: {platform}")
     
+    async def _get_active_config(self, platform: PlatformType) -> Optional[PlatformConfig]:
+        """Load the active SQLite config for a platform, credentials included"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(PlatformConfig).where(
+                    PlatformConfig.platform == platform,
+                    PlatformConfig.is_active == True
+                ).options(undefer_group("credentials"))
+            )
+            return result.scalar_one_or_none()
+    
     async def _post_to_twitter(self, content: str, user_id: Optional[str] = None) -> dict:
         """Post to Twitter/X using API v2 with OAuth 2.0 tokens"""
 
@@ -49,8 +148,8 @@ class PlatformService:
                 raise ValueError("Twitter not connected. Please connect your Twitter account first.")
 
             # Check if token is expired
-            expires_at = datetime.fromisoformat(secret["expires_at"].replace("Z", "+00:00"))
-            if datetime.utcnow().replace(tzinfo=expires_at.tzinfo) >= expires_at:
+            expires_at = secret["expires_at_epoch"]
+            if expires_at is not None and time.time() >= expires_at:
                 # Token expired - attempt refresh
                 from app.routers.oauth import refresh_oauth_token
                 try:
@@ -61,57 +160,39 @@ class PlatformService:
             else:
                 access_token = secret["access_token"]
 
-            # Twitter API v2 endpoint
-            url = "https://api.twitter.com/2/tweets"
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json"
-            }
-
         else:
             # Legacy SQLite mode
-            db = SessionLocal()
-            try:
-                result = db.execute(
-                    select(PlatformConfig).where(
-                        PlatformConfig.platform == PlatformType.TWITTER,
-                        PlatformConfig.is_active == True
-                    )
-                )
-                config = result.scalar_one_or_none()
+            config = await self._get_active_config(PlatformType.TWITTER)
 
-                if not config or not config.bearer_token:
-                    raise ValueError("Twitter API credentials not configured")
+            if not config or not config.bearer_token:
+                raise ValueError("Twitter API credentials not configured")
 
-                # Twitter API v2 endpoint
-                url = "https://api.twitter.com/2/tweets"
-                headers = {
-                    "Authorization": f"Bearer {config.bearer_token}",
-                    "Content-Type": "application/json"
-                }
-            finally:
-                db.close()
+            access_token = config.bearer_token
 
-        # Twitter has a 280 character limit
-        if len(content) > 280:
-            content = content[:277] + "..."
+        # Twitter has a 280 character limit, weighted per character
+        content = _truncate_tweet(content)
 
         payload = {
             "text": content
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-
-            return {
-                "success": True,
-                "platform": "twitter",
-                "post_id": data.get("data", {}).get("id"),
-                "content": content,
-                "posted_at": datetime.utcnow().isoformat()
-            }
+        client = get_http_client()
+        response = await client.post(
+            TWITTER_TWEETS_URL,
+            headers={**_TWITTER_HEADERS, "Authorization": f"Bearer {access_token}"},
+            content=orjson.dumps(payload),
+            timeout=PLATFORM_TIMEOUT
+        )
+        _raise_for_status(response)
+        data = orjson.loads(response.content)
+
+        return {
+            "success": True,
+            "platform": "twitter",
+            "post_id": data.get("data", {}).get("id"),
+            "content": content,
+            "posted_at": datetime.utcnow().isoformat()
+        }
     
     async def _post_to_linkedin(self, content: str, user_id: Optional[str] = None) -> dict:
         """Post to LinkedIn using API with OAuth 2.0 tokens"""
@@ -134,141 +215,104 @@ class PlatformService:
 
             # LinkedIn API v2: Get user profile URN
             # We'll use the person URN format for posting as an individual
-            # For now, we'll use a simplified approach and post as the authenticated user
-            url = "https://api.linkedin.com/v2/ugcPosts"
-            headers = {
-                "Authorization": f"Bearer {access_token}",
-                "Content-Type": "application/json",
-                "X-Restli-Protocol-Version": "2.0.0"
-            }
+            # Get user profile ID first; it only changes with the account
+            cached = self._linkedin_person_ids.get(user_id)
+            if cached and cached[0] == access_token:
+                author_urn = cached[1]
+            else:
+                profile_response = await self._get_linkedin_profile(access_token)
+                author_urn = profile_response.get("id")
 
-            # Get user profile ID first
-            profile_response = await self._get_linkedin_profile(access_token)
-            author_urn = profile_response.get("id")
-
-            if not author_urn:
-                raise ValueError("Failed to get LinkedIn profile ID")
-
-            # LinkedIn API v2 UGC Post structure for individual user
-            payload = {
-                "author": f"urn:li:person:{author_urn}",
-                "lifecycleState": "PUBLISHED",
-                "specificContent": {
-                    "com.linkedin.ugc.ShareContent": {
-                        "shareCommentary": {
-                            "text": content
-                        },
-                        "shareMediaCategory": "NONE"
-                    }
-                },
-                "visibility": {
-                    "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
-                }
-            }
+                if not author_urn:
+                    raise ValueError("Failed to get LinkedIn profile ID")
+                self._linkedin_person_ids[user_id] = (access_token, author_urn)
+
+            author = f"urn:li:person:{author_urn}"
 
         else:
             # Legacy SQLite mode
-            db = SessionLocal()
-            try:
-                result = db.execute(
-                    select(PlatformConfig).where(
-                        PlatformConfig.platform == PlatformType.LINKEDIN,
-                        PlatformConfig.is_active == True
-                    )
-                )
-                config = result.scalar_one_or_none()
+            config = await self._get_active_config(PlatformType.LINKEDIN)
 
-                if not config or not config.access_token:
-                    raise ValueError("LinkedIn API credentials not configured")
+            if not config or not config.access_token:
+                raise ValueError("LinkedIn API credentials not configured")
 
-                # LinkedIn API endpoint for shares
-                # Note: LinkedIn requires organization ID for posting
-                if not config.linkedin_org_id:
-                    raise ValueError("LinkedIn organization ID not configured")
+            # Note: LinkedIn requires organization ID for posting
+            if not config.linkedin_org_id:
+                raise ValueError("LinkedIn organization ID not configured")
 
-                url = "https://api.linkedin.com/v2/ugcPosts"
+            access_token = config.access_token
+            author = f"urn:li:organization:{config.linkedin_org_id}"
 
-                headers = {
-                    "Authorization": f"Bearer {config.access_token}",
-                    "Content-Type": "application/json",
-                    "X-Restli-Protocol-Version": "2.0.0"
-                }
-
-                # LinkedIn API v2 UGC Post structure
-                payload = {
-                    "author": f"urn:li:organization:{config.linkedin_org_id}",
-                    "lifecycleState": "PUBLISHED",
-                    "specificContent": {
-                        "com.linkedin.ugc.ShareContent": {
-                            "shareCommentary": {
-                                "text": content
-                            },
-                            "shareMediaCategory": "NONE"
-                        }
+        # LinkedIn API v2 UGC Post structure
+        payload = {
+            "author": author,
+            "lifecycleState": "PUBLISHED",
+            "specificContent": {
+                "com.linkedin.ugc.ShareContent": {
+                    "shareCommentary": {
+                        "text": content
                     },
-                    "visibility": {
-                        "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
-                    }
+                    "shareMediaCategory": "NONE"
                 }
-            finally:
-                db.close()
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-
-            return {
-                "success": True,
-                "platform": "linkedin",
-                "post_id": data.get("id"),
-                "content": content,
-                "posted_at": datetime.utcnow().isoformat()
+            },
+            "visibility": {
+                "com.linkedin.ugc.MemberNetworkVisibility": "PUBLIC"
             }
+        }
+
+        client = get_http_client()
+        response = await client.post(
+            LINKEDIN_UGC_POSTS_URL,
+            headers={**_LINKEDIN_HEADERS, "Authorization": f"Bearer {access_token}"},
+            content=orjson.dumps(payload),
+            timeout=PLATFORM_TIMEOUT
+        )
+        _raise_for_status(response)
+        data = orjson.loads(response.content)
+
+        return {
+            "success": True,
+            "platform": "linkedin",
+            "post_id": data.get("id"),
+            "content": content,
+            "posted_at": datetime.utcnow().isoformat()
+        }
 
     async def _get_linkedin_profile(self, access_token: str) -> dict:
         """Get LinkedIn profile information"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://api.linkedin.com/v2/me",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                }
-            )
-            response.raise_for_status()
-            return response.json()
+        client = get_http_client()
+        response = await client.get(
+            "https://api.linkedin.com/v2/me",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+            },
+            timeout=PLATFORM_TIMEOUT
+        )
+        _raise_for_status(response)
+        return orjson.loads(response.content)
     
     async def test_connection(self, platform: str) -> dict:
         """Test connection to platform API"""
         try:
             # For Twitter, we can check credentials without posting
             if platform == PlatformType.TWITTER.value:
-                db = SessionLocal()
-                try:
-                    result = db.execute(
-                        select(PlatformConfig).where(
-                            PlatformConfig.platform == PlatformType.TWITTER,
-                            PlatformConfig.is_active == True
-                        )
-                    )
-                    config = result.scalar_one_or_none()
-                    
-                    if not config or not config.bearer_token:
-                        return {"success": False, "message": "Credentials not configured"}
-                    
-                    # Test with a simple API call
-                    url = "https://api.twitter.com/2/tweets/search/recent"
-                    headers = {"Authorization": f"Bearer {config.bearer_token}"}
-                    
-                    async with httpx.AsyncClient() as client:
-                        response = await client.get(url, headers=headers, params={"query": "test", "max_results": 1})
-                        if response.status_code == 200:
-                            return {"success": True, "message": "Connection successful"}
-                        else:
-                            return {"success": False, "message": f"API error: {response.status_code}"}
-                            
-                finally:
-                    db.close()
+                config = await self._get_active_config(PlatformType.TWITTER)
+                
+                if not config or not config.bearer_token:
+                    return {"success": False, "message": "Credentials not configured"}
+                
+                # Test with a simple API call
+                url = "https://api.twitter.com/2/tweets/search/recent"
+                headers = {"Authorization": f"Bearer {config.bearer_token}"}
+                
+                client = get_http_client()
+                response = await client.get(
+                    url, headers=headers, params={"query": "test", "max_results": 1}, timeout=PLATFORM_TIMEOUT
+                )
+                if response.status_code == 200:
+                    return {"success": True, "message": "Connection successful"}
+                else:
+                    return {"success": False, "message": f"API error: {response.status_code}"}
             
             elif platform == PlatformType.LINKEDIN.value:
                 # Similar test for LinkedIn
@@ -279,3 +323,5 @@ class PlatformService:
         except Exception as e:
             return {"success": False, "message": str(e)}
 
+# Global instance, shared by the platforms router and the scheduler
+platform_service = PlatformService()
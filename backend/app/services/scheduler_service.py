@@ -1,13 +1,14 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone, timedelta
 import asyncio
-from app.services.platform_service import PlatformService
-from app.database import SessionLocal
-from app.models import ScheduledPost, PostStatus, PlatformType
-from sqlalchemy import select
+import random
+from app.services.platform_service import NonRetriableError, platform_service
+from app.database import AsyncSessionLocal
+from app.models import PLATFORM_BY_NAME, ScheduledPost, PostStatus, PlatformType
+from sqlalchemy import bindparam, select, update
 from app.config import settings
 import logging
 
@@ -20,9 +21,46 @@ class ScheduledPostData:
     platform: PlatformType
     content: str
     user_id: str | None = None
+    # platform.value, resolved once rather than at each publish
+    platform_str: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.platform_str = self.platform.value
 
 logger = logging.getLogger(__name__)
 
+# Statuses a post can be published from (Supabase values)
+PENDING_STATUSES = ["scheduled", "failed"]
+
+# Upper bound on platform API calls in flight when many posts fire together
+MAX_CONCURRENT_PUBLISHES = 20
+
+# Scheduled posts fetched per round trip when reloading jobs at startup
+LOAD_BATCH_SIZE = 500
+
+# SQLite statements, built once with bind parameters rather than per call
+_LOAD_SCHEDULED_STMT = select(
+    ScheduledPost.id,
+    ScheduledPost.scheduled_time,
+    ScheduledPost.platform,
+    ScheduledPost.content,
+).where(
+    ScheduledPost.status == PostStatus.SCHEDULED,
+    ScheduledPost.scheduled_time > bindparam("now")
+).order_by(
+    ScheduledPost.scheduled_time
+).execution_options(yield_per=LOAD_BATCH_SIZE)
+
+_POST_STATUS_STMT = select(ScheduledPost.status).where(
+    ScheduledPost.id == bindparam("post_id")
+)
+
+_POST_FOR_PUBLISH_STMT = select(
+    ScheduledPost.platform,
+    ScheduledPost.content,
+    ScheduledPost.status,
+).where(ScheduledPost.id == bindparam("post_id"))
+
 
 # Standalone function for OAuth cleanup (can be pickled by APScheduler)
 async def cleanup_oauth_states_job():
@@ -43,10 +81,16 @@ class SchedulerService:
         # Use memory jobstore to avoid serialization issues with instance methods
         # Jobs are reloaded from database on startup via _load_scheduled_posts()
         self.scheduler = AsyncIOScheduler()
-        self.platform_service = PlatformService()
+        self.platform_service = platform_service
         self.is_running = False
         self.max_retries = 3  # Maximum number of retry attempts
         self.retry_delays = [300, 900, 3600]  # 5min, 15min, 1hour in seconds
+        # What each scheduled job will publish, captured when it is scheduled
+        # so the job only has to re-read the post's status
+        self._post_snapshots: dict[int | str, ScheduledPostData] = {}
+        # APScheduler starts each due job as its own task; this caps how
+        # many of them call a platform API at once
+        self._publish_slots = asyncio.Semaphore(MAX_CONCURRENT_PUBLISHES)
         
     def start(self):
         """Start the scheduler"""
@@ -75,51 +119,63 @@ class SchedulerService:
 
             try:
                 repo = ScheduledPostRepository()
-                # Get all scheduled posts (across all users)
-                posts_data = await repo.get_all_scheduled()
-
-                for post_dict in posts_data:
-                    # Convert dict to ScheduledPost object
-                    scheduled_dt = datetime.fromisoformat(
-                        post_dict["scheduled_time"].replace("Z", "+00:00")
-                    )
-
-                    # Only schedule future posts
-                    if scheduled_dt > datetime.now(timezone.utc):
-                        post_data = ScheduledPostData(
-                            id=str(post_dict["id"]),
-                            scheduled_time=scheduled_dt,
-                            platform=PlatformType(post_dict["platform"]),
-                            content=post_dict["content"],
-                            user_id=post_dict.get("user_id"),
-                        )
-                        self.schedule_post(post_data, retry_count=0)
-
-                logger.info(f"Loaded {len(posts_data)} scheduled posts from Supabase")
+                # Get all scheduled posts (across all users), a page at a
+                # time so jobs are added while the rest are still loading
+                loaded = 0
+                after = None
+                while True:
+                    posts_data = await repo.get_all_scheduled(limit=LOAD_BATCH_SIZE, after=after)
+
+                    for post_dict in posts_data:
+                        # Convert dict to ScheduledPost object
+                        scheduled_dt = datetime.fromisoformat(post_dict["scheduled_time"])
+
+                        # Only schedule future posts
+                        if scheduled_dt > datetime.now(timezone.utc):
+                            post_data = ScheduledPostData(
+                                id=str(post_dict["id"]),
+                                scheduled_time=scheduled_dt,
+                                platform=PLATFORM_BY_NAME[post_dict["platform"]],
+                                content=post_dict["content"],
+                                user_id=post_dict.get("user_id"),
+                            )
+                            self.schedule_post(post_data, retry_count=0)
+
+                    loaded += len(posts_data)
+                    if len(posts_data) < LOAD_BATCH_SIZE:
+                        break
+                    after = (posts_data[-1]["scheduled_time"], posts_data[-1]["id"])
+
+                logger.info(f"Loaded {loaded} scheduled posts from Supabase")
             except Exception as e:
                 logger.error(f"Failed to load scheduled posts from Supabase: {e}")
         else:
-            # Load from SQLite
-            db = SessionLocal()
-            try:
-                result = db.execute(
-                    select(ScheduledPost).where(
-                        ScheduledPost.status == PostStatus.SCHEDULED,
-                        ScheduledPost.scheduled_time > datetime.now(timezone.utc)
-                    )
+            # Load from SQLite, streaming rows in batches rather than
+            # buffering the whole backlog (served by ix_scheduled_posts_status_time)
+            loaded = 0
+            async with AsyncSessionLocal() as db:
+                result = await db.stream(
+                    _LOAD_SCHEDULED_STMT, {"now": datetime.now(timezone.utc)}
                 )
-                posts = result.scalars().all()
+                async for row in result:
+                    self.schedule_post(ScheduledPostData(*row), retry_count=0)
+                    loaded += 1
 
-                for post in posts:
-                    self.schedule_post(post, retry_count=0)
-
-                logger.info(f"Loaded {len(posts)} scheduled posts from SQLite")
-            finally:
-                db.close()
+            logger.info(f"Loaded {loaded} scheduled posts from SQLite")
     
-    def schedule_post(self, post: ScheduledPost | ScheduledPostData, retry_count: int = 0):
-        """Schedule a post for execution"""
+    def _retry_delay(self, retry_count: int) -> int:
+        """
+        Seconds to wait before the next attempt: exponential backoff with
+        equal jitter, so posts that failed together (e.g. on a platform
+        rate limit) don't all retry at the same moment
+        """
+        base = self.retry_delays[min(retry_count, len(self.retry_delays) - 1)]
+        return round(base / 2 + random.uniform(0, base / 2))
+
+    def schedule_post(self, post: ScheduledPostData, retry_count: int = 0):
+        """Schedule a post for execution from a detached snapshot of its fields"""
         trigger = DateTrigger(run_date=post.scheduled_time)
+        self._post_snapshots[post.id] = post
         
         self.scheduler.add_job(
             self._publish_post,
@@ -138,31 +194,42 @@ class SchedulerService:
             from app.database_supabase import ScheduledPostRepository
 
             repo = ScheduledPostRepository()
-            post_dict = await repo.get_by_id_for_scheduler(str(post_id))
+            snapshot = self._post_snapshots.pop(post_id, None)
+            # The status is always re-read: the post may have been cancelled
+            # or published elsewhere since it was scheduled
+            post_dict = await repo.get_by_id_for_scheduler(
+                str(post_id), columns="status" if snapshot and snapshot.user_id else "*"
+            )
 
             if not post_dict:
                 logger.error(f"Post {post_id} not found")
                 return
 
-            if post_dict["status"] not in ["scheduled", "failed"]:
+            if post_dict["status"] not in PENDING_STATUSES:
                 logger.warning(f"Post {post_id} is not in scheduled/failed status: {post_dict['status']}")
                 return
 
-            user_id = post_dict.get("user_id")
-            if not user_id:
-                logger.error(f"Post {post_id} has no user_id")
-                return
+            if snapshot and snapshot.user_id:
+                user_id = snapshot.user_id
+                platform = snapshot.platform_str
+                content = snapshot.content
+            else:
+                user_id = post_dict.get("user_id")
+                if not user_id:
+                    logger.error(f"Post {post_id} has no user_id")
+                    return
 
-            platform = post_dict["platform"]
-            content = post_dict["content"]
+                platform = post_dict["platform"]
+                content = post_dict["content"]
 
             try:
                 # Publish to platform
-                await self.platform_service.publish_post(
-                    platform=platform,
-                    content=content,
-                    user_id=user_id
-                )
+                async with self._publish_slots:
+                    await self.platform_service.publish_post(
+                        platform=platform,
+                        content=content,
+                        user_id=user_id
+                    )
 
                 # Update status
                 await repo.update_status(
@@ -179,113 +246,176 @@ class SchedulerService:
                 error_msg = str(e)
                 logger.error(f"Failed to post {post_id} (attempt {retry_count + 1}): {error_msg}")
 
-                # Check if we should retry
-                if retry_count < self.max_retries:
-                    # Calculate retry delay (exponential backoff)
-                    delay_seconds = self.retry_delays[min(retry_count, len(self.retry_delays) - 1)]
+                # Check if we should retry; a rejection from the platform
+                # would only fail again
+                if retry_count < self.max_retries and not isinstance(e, NonRetriableError):
+                    delay_seconds = self._retry_delay(retry_count)
                     retry_time = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
 
-                    # Update post with error but keep as scheduled for retry
-                    await repo.update_status(
-                        post_id=str(post_id),
-                        user_id=user_id,
-                        status="scheduled",
-                        error_message=f"Attempt {retry_count + 1} failed: {error_msg}. Retrying in {delay_seconds}s"
-                    )
+                    # Update post with error but keep as scheduled for retry,
+                    # unless it was cancelled while this attempt ran
+                    try:
+                        await repo.update_status(
+                            post_id=str(post_id),
+                            user_id=user_id,
+                            status="scheduled",
+                            error_message=f"Attempt {retry_count + 1} failed: {error_msg}. Retrying in {delay_seconds}s",
+                            only_if_status=PENDING_STATUSES,
+                        )
+                    except ValueError:
+                        logger.warning(f"Post {post_id} changed status during publish; not retrying")
+                        return
 
                     # Reschedule for retry with incremented retry count
                     logger.info(f"Rescheduling post {post_id} for retry {retry_count + 1} at {retry_time}")
                     post_data = ScheduledPostData(
                         id=str(post_id),
                         scheduled_time=retry_time,
-                        platform=platform,
+                        platform=PLATFORM_BY_NAME[platform],
                         content=content,
                         user_id=user_id
                     )
                     self.schedule_post(post_data, retry_count=retry_count + 1)
 
                 else:
-                    # Max retries reached - move to permanently failed
-                    logger.error(f"Post {post_id} failed after {self.max_retries} attempts. Marking as permanently failed.")
-                    await repo.update_status(
-                        post_id=str(post_id),
-                        user_id=user_id,
-                        status="failed",
-                        error_message=f"Failed after {self.max_retries} retry attempts. Last error: {error_msg}"
-                    )
+                    # Rejected or out of retries - move to permanently failed
+                    error_message = self._final_error_message(e, platform, retry_count)
+                    logger.error(f"Post {post_id}: {error_message}. Marking as permanently failed.")
+                    try:
+                        await repo.update_status(
+                            post_id=str(post_id),
+                            user_id=user_id,
+                            status="failed",
+                            error_message=error_message,
+                            only_if_status=PENDING_STATUSES,
+                        )
+                    except ValueError:
+                        logger.warning(f"Post {post_id} changed status during publish")
 
         else:
-            # Use SQLite mode
-            db = SessionLocal()
-            try:
-                result = db.execute(
-                    select(ScheduledPost).where(ScheduledPost.id == post_id)
+            # Use SQLite mode. Read and write in short sessions so no pooled
+            # connection is held while the platform API call is in flight
+            snapshot = self._post_snapshots.pop(post_id, None)
+            # The status is always re-read: the router registers posts in a
+            # background task, so a cancel can land before the snapshot does
+            # and a snapshot alone doesn't prove the post is still pending
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    _POST_STATUS_STMT if snapshot else _POST_FOR_PUBLISH_STMT,
+                    {"post_id": post_id},
                 )
-                post = result.scalar_one_or_none()
+                row = result.one_or_none()
 
-                if not post:
-                    logger.error(f"Post {post_id} not found")
-                    return
+            if not row:
+                logger.error(f"Post {post_id} not found")
+                return
 
-                if post.status != PostStatus.SCHEDULED and post.status != PostStatus.FAILED:
-                    logger.warning(f"Post {post_id} is not in scheduled/failed status: {post.status}")
-                    return
+            if row.status != PostStatus.SCHEDULED and row.status != PostStatus.FAILED:
+                logger.warning(f"Post {post_id} is not in scheduled/failed status: {row.status}")
+                return
 
-                try:
-                    # Publish to platform (no user_id in SQLite mode)
+            post = snapshot or row
+            platform = post.platform.value
+            try:
+                # Publish to platform (no user_id in SQLite mode)
+                async with self._publish_slots:
                     await self.platform_service.publish_post(
-                        platform=post.platform.value,
+                        platform=platform,
                         content=post.content
                     )
 
-                    # Update status
-                    post.status = PostStatus.POSTED
-                    post.posted_at = datetime.now(timezone.utc)
-                    post.error_message = None  # Clear any previous errors
-                    db.commit()
-
-                    logger.info(f"Successfully posted {post_id} to {post.platform.value}")
-
-                except Exception as e:
-                    error_msg = str(e)
-                    logger.error(f"Failed to post {post_id} (attempt {retry_count + 1}): {error_msg}")
-
-                    # Check if we should retry
-                    if retry_count < self.max_retries:
-                        # Calculate retry delay (exponential backoff)
-                        delay_seconds = self.retry_delays[min(retry_count, len(self.retry_delays) - 1)]
-                        retry_time = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
-
-                        # Update post with error but keep as scheduled for retry
-                        post.status = PostStatus.SCHEDULED
-                        post.error_message = f"Attempt {retry_count + 1} failed: {error_msg}. Retrying in {delay_seconds}s"
-                        post.scheduled_time = retry_time
-                        db.commit()
-
-                        # Reschedule for retry with incremented retry count
-                        logger.info(f"Rescheduling post {post_id} for retry {retry_count + 1} at {retry_time}")
-                        self.schedule_post(post, retry_count=retry_count + 1)
-
-                    else:
-                        # Max retries reached - move to permanently failed
-                        logger.error(f"Post {post_id} failed after {self.max_retries} attempts. Marking as permanently failed.")
-                        post.status = PostStatus.FAILED
-                        post.error_message = f"Failed after {self.max_retries} retry attempts. Last error: {error_msg}"
-                        db.commit()
-
-            finally:
-                db.close()
+                # Update status
+                await self._update_sqlite_post(
+                    post_id,
+                    status=PostStatus.POSTED,
+                    posted_at=datetime.now(timezone.utc),
+                    error_message=None,  # Clear any previous errors
+                )
+
+                logger.info(f"Successfully posted {post_id} to {platform}")
+
+            except Exception as e:
+                error_msg = str(e)
+                logger.error(f"Failed to post {post_id} (attempt {retry_count + 1}): {error_msg}")
+
+                # Check if we should retry; a rejection from the platform
+                # would only fail again
+                if retry_count < self.max_retries and not isinstance(e, NonRetriableError):
+                    delay_seconds = self._retry_delay(retry_count)
+                    retry_time = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+
+                    # Update post with error but keep as scheduled for retry,
+                    # unless it was cancelled while this attempt ran
+                    if not await self._update_sqlite_post(
+                        post_id,
+                        only_pending=True,
+                        status=PostStatus.SCHEDULED,
+                        error_message=f"Attempt {retry_count + 1} failed: {error_msg}. Retrying in {delay_seconds}s",
+                        scheduled_time=retry_time,
+                    ):
+                        logger.warning(f"Post {post_id} changed status during publish; not retrying")
+                        return
+
+                    # Reschedule for retry with incremented retry count
+                    logger.info(f"Rescheduling post {post_id} for retry {retry_count + 1} at {retry_time}")
+                    self.schedule_post(
+                        ScheduledPostData(
+                            id=post_id,
+                            scheduled_time=retry_time,
+                            platform=post.platform,
+                            content=post.content,
+                        ),
+                        retry_count=retry_count + 1,
+                    )
+
+                else:
+                    # Rejected or out of retries - move to permanently failed
+                    error_message = self._final_error_message(e, platform, retry_count)
+                    logger.error(f"Post {post_id}: {error_message}. Marking as permanently failed.")
+                    if not await self._update_sqlite_post(
+                        post_id,
+                        only_pending=True,
+                        status=PostStatus.FAILED,
+                        error_message=error_message,
+                    ):
+                        logger.warning(f"Post {post_id} changed status during publish")
+
+    def _final_error_message(self, error: Exception, platform: str, retry_count: int) -> str:
+        """Error recorded on a post that won't be retried"""
+        if isinstance(error, NonRetriableError):
+            return f"Rejected by {platform} on attempt {retry_count + 1}: {error}"
+        return f"Failed after {self.max_retries} retry attempts. Last error: {error}"
+
+    async def _update_sqlite_post(self, post_id: int, only_pending: bool = False, **values) -> bool:
+        """
+        Write publish results for a post in its own short session
+
+        With only_pending, the write is skipped unless the post is still
+        scheduled or failed, checked in the same statement. Returns whether
+        the post was updated.
+        """
+        stmt = update(ScheduledPost).where(ScheduledPost.id == post_id)
+        if only_pending:
+            stmt = stmt.where(ScheduledPost.status.in_([PostStatus.SCHEDULED, PostStatus.FAILED]))
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(stmt.values(**values).returning(ScheduledPost.id))
+            updated = result.first() is not None
+            await db.commit()
+        return updated
     
     def unschedule_post(self, post_id):
         """Remove a scheduled post from the scheduler"""
-        try:
-            # Handle both int (SQLite) and str (Supabase UUID)
-            job_id = f"post_{post_id}"
-            self.scheduler.remove_job(job_id)
-            logger.info(f"Unscheduled post {post_id}")
-        except Exception as e:
-            logger.debug(f"Could not unschedule post {post_id}: {e}")
-            pass  # Job might not exist
+        # Handle both int (SQLite) and str (Supabase UUID)
+        self._post_snapshots.pop(post_id, None)
+        # A post's job id carries its retry count; look each one up rather
+        # than letting remove_job raise for the ones that don't exist
+        for retry_count in range(self.max_retries + 1):
+            job_id = f"post_{post_id}_{retry_count}"
+            if self.scheduler.get_job(job_id) is not None:
+                self.scheduler.remove_job(job_id)
+                logger.info(f"Unscheduled post {post_id}")
+                return
+        logger.debug(f"No scheduled job for post {post_id}")
 
     def _schedule_oauth_cleanup(self):
         """Schedule periodic cleanup of expired OAuth states"""
@@ -0,0 +1,41 @@
+"""
+In-process TTL cache for read-mostly API responses.
+
+The app runs as a single uvicorn worker, so a process-local dict gives
+sub-millisecond reads without an external cache service. Writers must
+invalidate the keys they affect.
+"""
+
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Dict-backed cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value for the configured TTL."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """Drop the given keys, or every entry when called without keys."""
+        if not keys:
+            self._entries.clear()
+            return
+        for key in keys:
+            self._entries.pop(key, None)
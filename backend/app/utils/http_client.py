@@ -0,0 +1,32 @@
+"""
+Shared outbound HTTP client.
+
+One keep-alive connection pool for the process, so repeat calls to the
+same host (platform APIs, the llama.cpp server) reuse connections instead
+of paying DNS + TCP/TLS setup on every request. Created lazily and closed
+in the app lifespan.
+"""
+
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200)
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor encodes the sort key of the last row on a page, so the next
+page is an index seek past that key instead of an OFFSET scan.
+"""
+
+import base64
+from datetime import datetime
+from typing import Any, Dict, Tuple
+from uuid import UUID
+
+import orjson
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(scheduled_time: datetime, row_id: int) -> str:
+    """Encode a (scheduled_time, id) sort key as an opaque cursor."""
+    raw = f"{scheduled_time.isoformat()}|{row_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        time_part, id_part = raw.rsplit("|", 1)
+        return datetime.fromisoformat(time_part), int(id_part)
+    except (UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def encode_position_cursor(positions: Dict[str, Any]) -> str:
+    """
+    Encode named keyset positions as one opaque cursor.
+
+    Used where a page spans several streams (e.g. drafts and posts in a
+    sync pull) or where sort keys are Supabase strings rather than the
+    SQLite (datetime, int) pair encode_cursor handles.
+    """
+    raw = orjson.dumps(positions)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_position_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_position_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        positions = orjson.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(positions, dict):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return positions
+
+
+def parse_keyset_position(position: Any) -> Tuple[str, str]:
+    """
+    Validate a (sort value, id) pair taken from a position cursor.
+
+    The pair ends up in a PostgREST filter, so it is rebuilt from the
+    parsed timestamp and UUID/int id rather than passed through as sent.
+
+    Raises:
+        ValueError: If the position is malformed
+    """
+    if not isinstance(position, list) or len(position) != 2:
+        raise ValueError(f"Invalid cursor position: {position!r}")
+    value, row_id = position
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid cursor position: {position!r}")
+    value = datetime.fromisoformat(value).isoformat()
+    if isinstance(row_id, int) and not isinstance(row_id, bool):
+        return value, str(row_id)
+    if isinstance(row_id, str):
+        try:
+            return value, str(UUID(row_id))
+        except ValueError:
+            return value, str(int(row_id))
+    raise ValueError(f"Invalid cursor position: {position!r}")
@@ -3,9 +3,12 @@ PKCE (Proof Key for Code Exchange) utilities for OAuth 2.0
 Implements RFC 7636 specification
 """
 
-import secrets
+import os
 import hashlib
-import base64
+import binascii
+
+# Standard to URL-safe base64 alphabet (RFC 4648 Section 5)
+_URLSAFE = bytes.maketrans(b'+/', b'-_')
 
 
 def generate_code_verifier() -> str:
@@ -19,9 +22,12 @@ def generate_code_verifier() -> str:
     Returns:
         str: A random code verifier (64 characters)
     """
-    # secrets.token_urlsafe(48) generates 64 base64url characters
-    # (48 bytes * 4/3 = 64 chars)
-    return secrets.token_urlsafe(48)
+    # 48 random bytes encode to exactly 64 base64url characters with no
+    # padding (48 is a multiple of 3), already within the 43-128 range and
+    # alphabet. os.urandom is the CSPRNG behind secrets.token_urlsafe,
+    # called directly to skip its wrappers and padding strip; b2a_base64 is
+    # the C encoder base64.urlsafe_b64encode wraps.
+    return binascii.b2a_base64(os.urandom(48), newline=False).translate(_URLSAFE).decode('ascii')
 
 
 def generate_code_challenge(verifier: str) -> str:
@@ -37,11 +43,14 @@ def generate_code_challenge(verifier: str) -> str:
     Returns:
         str: Base64URL-encoded SHA256 hash (no padding)
     """
-    # Hash the verifier with SHA256
+    # Hash the verifier with SHA256. hashlib.sha256 goes through OpenSSL's
+    # EVP interface, which dispatches to SHA-NI (sha256rnds2) on x86_64 and
+    # the ARMv8 crypto extensions on arm64. Don't swap in a pure-Python hash,
+    # and don't substitute BLAKE2: S256 is the only hash the spec allows.
     digest = hashlib.sha256(verifier.encode('ascii')).digest()
 
     # Base64URL encode (RFC 4648 Section 5)
     # - Replace + with -, / with _
-    # - Remove padding (=)
-    challenge = base64.urlsafe_b64encode(digest).decode('ascii')
-    return challenge.rstrip('=')
+    # - Remove padding: a 32-byte digest always encodes to 43 characters
+    #   plus exactly one '=', so slice it off rather than scan for it
+    return binascii.b2a_base64(digest, newline=False).translate(_URLSAFE)[:-1].decode('ascii')
@@ -0,0 +1,31 @@
+"""
+Request coalescing ("single-flight") for async calls.
+
+Concurrent callers that ask for the same key share one in-flight call
+instead of each issuing their own upstream request.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() once per key while a call for that key is in flight.
+
+        The call runs in its own task and every caller awaits it through
+        asyncio.shield, so one caller disconnecting does not cancel the
+        result the others are waiting on.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
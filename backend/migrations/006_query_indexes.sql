@@ -0,0 +1,24 @@
+-- Composite indexes for the per-user list, calendar and sync queries
+-- Run in Supabase SQL Editor
+
+-- list_by_user (optional status filter) ordered by scheduled_time
+CREATE INDEX IF NOT EXISTS idx_scheduled_posts_user_status_time
+    ON scheduled_posts(user_id, status, scheduled_time);
+
+-- get_calendar: user + scheduled_time range
+CREATE INDEX IF NOT EXISTS idx_scheduled_posts_user_time
+    ON scheduled_posts(user_id, scheduled_time);
+
+-- Sync pulls: rows modified since the last sync
+CREATE INDEX IF NOT EXISTS idx_scheduled_posts_user_created
+    ON scheduled_posts(user_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_drafts_user_updated
+    ON drafts(user_id, updated_at DESC);
+
+-- Draft list ordered by created_at
+CREATE INDEX IF NOT EXISTS idx_drafts_user_created
+    ON drafts(user_id, created_at DESC);
+
+-- The single-column user_id indexes are prefixes of the ones above
+DROP INDEX IF EXISTS idx_scheduled_posts_user_id;
@@ -0,0 +1,43 @@
+-- Single-round-trip create-or-update for drafts pushed by sync
+-- Run in Supabase SQL Editor
+--
+-- Inserts the draft, or updates it when the id already exists. As in
+-- DraftRepository.update, only fields sent with a non-null value are
+-- changed, and the update is skipped (no row returned) when the server
+-- copy is newer than p_client_updated_at or belongs to another user.
+
+CREATE OR REPLACE FUNCTION upsert_draft(
+    p_id UUID,
+    p_user_id TEXT,
+    p_data JSONB,
+    p_client_updated_at TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (draft JSONB, inserted BOOLEAN)
+LANGUAGE sql
+SET search_path = public
+AS $$
+    INSERT INTO drafts AS d (
+        id, user_id, title, content, prompt, tags, confirmed, scheduled_at
+    )
+    SELECT
+        p_id,
+        p_user_id,
+        src.title,
+        COALESCE(src.content, ''),
+        src.prompt,
+        COALESCE(src.tags, empty.tags),
+        COALESCE(src.confirmed, false),
+        src.scheduled_at
+    FROM jsonb_populate_record(NULL::drafts, p_data) AS src,
+         jsonb_populate_record(NULL::drafts, '{"tags": []}') AS empty
+    ON CONFLICT (id) DO UPDATE SET
+        title = CASE WHEN p_data->>'title' IS NOT NULL THEN EXCLUDED.title ELSE d.title END,
+        content = CASE WHEN p_data->>'content' IS NOT NULL THEN EXCLUDED.content ELSE d.content END,
+        prompt = CASE WHEN p_data->>'prompt' IS NOT NULL THEN EXCLUDED.prompt ELSE d.prompt END,
+        tags = CASE WHEN p_data->>'tags' IS NOT NULL THEN EXCLUDED.tags ELSE d.tags END,
+        confirmed = CASE WHEN p_data->>'confirmed' IS NOT NULL THEN EXCLUDED.confirmed ELSE d.confirmed END,
+        scheduled_at = CASE WHEN p_data->>'scheduled_at' IS NOT NULL THEN EXCLUDED.scheduled_at ELSE d.scheduled_at END
+    WHERE d.user_id = p_user_id
+      AND (p_client_updated_at IS NULL OR d.updated_at <= p_client_updated_at)
+    RETURNING to_jsonb(d.*) AS draft, (d.xmax = 0) AS inserted;
+$$;
@@ -0,0 +1,16 @@
+-- Per-user draft and scheduled post counts for the sync status endpoint
+-- Run in Supabase SQL Editor
+--
+-- Both counts in one round trip, served from the (user_id, ...) indexes
+-- in 006_query_indexes.sql instead of transferring every row.
+
+CREATE OR REPLACE FUNCTION get_user_counts(p_user_id TEXT)
+RETURNS TABLE (draft_count BIGINT, scheduled_post_count BIGINT)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        (SELECT count(*) FROM drafts WHERE user_id = p_user_id),
+        (SELECT count(*) FROM scheduled_posts WHERE user_id = p_user_id);
+$$;
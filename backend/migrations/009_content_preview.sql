@@ -0,0 +1,12 @@
+-- Stored calendar preview for scheduled posts
+-- Run in Supabase SQL Editor
+--
+-- The calendar only shows the first 50 characters of each post. A
+-- generated column keeps that preview next to the row so the calendar
+-- query can select it instead of transferring the full content.
+
+ALTER TABLE scheduled_posts
+    ADD COLUMN IF NOT EXISTS content_preview TEXT
+    GENERATED ALWAYS AS (
+        CASE WHEN length(content) > 50 THEN left(content, 50) || '...' ELSE content END
+    ) STORED;
@@ -3,7 +3,8 @@ Test configuration and fixtures for PostFarm backend tests.
 """
 
 import pytest
-from typing import AsyncGenerator, Dict, Any
+import pytest_asyncio
+from types import MappingProxyType, SimpleNamespace
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime, timedelta
 
@@ -17,9 +18,13 @@ class MockClerkUser:
         self.email = f"{user_id}@test.com"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_clerk_user():
-    """Fixture providing a mock Clerk user."""
+    """
+    Fixture providing a mock Clerk user.
+
+    Shared by the whole session; tests only read it, so don't modify it.
+    """
     return MockClerkUser()
 
 
@@ -52,35 +57,84 @@ def mock_supabase_client():
     mock_table.order = Mock(return_value=mock_table)
 
     # Execute returns a response with data
-    mock_response = Mock()
-    mock_response.data = []
+    mock_response = SimpleNamespace(data=[])
     mock_table.execute = Mock(return_value=mock_response)
 
     return mock_client
 
 
-# Mock OAuth Provider Responses
+def _fake_builder_method(name):
+    def method(self, *args, **kwargs):
+        self.calls.append((name, args))
+        return self
+    return method
+
+
+class FakeSupabaseClient:
+    """
+    Plain stand-in for the Supabase client.
+
+    Every query builder method records its call in `calls` and returns the
+    client itself, and execute() returns whatever `data` holds, so tests
+    set `data` and skip wiring up a mock per chained call.
+    """
+
+    def __init__(self, data=None):
+        self.data = data
+        self.calls = []
+
+    table = _fake_builder_method("table")
+    select = _fake_builder_method("select")
+    insert = _fake_builder_method("insert")
+    update = _fake_builder_method("update")
+    upsert = _fake_builder_method("upsert")
+    delete = _fake_builder_method("delete")
+    eq = _fake_builder_method("eq")
+    lt = _fake_builder_method("lt")
+    gte = _fake_builder_method("gte")
+    in_ = _fake_builder_method("in_")
+    order = _fake_builder_method("order")
+    limit = _fake_builder_method("limit")
+    maybe_single = _fake_builder_method("maybe_single")
+
+    def execute(self):
+        return SimpleNamespace(data=self.data)
+
+
 @pytest.fixture
+def fake_supabase_client():
+    """Fixture providing a FakeSupabaseClient with no data."""
+    return FakeSupabaseClient()
+
+
+# Mock OAuth Provider Responses
+# Read-only, so one copy of each can be shared by the whole session
+_TWITTER_TOKEN_RESPONSE = MappingProxyType({
+    "access_token": "twitter_access_token_12345",
+    "refresh_token": "twitter_refresh_token_67890",
+    "token_type": "Bearer",
+    "expires_in": 7200,
+    "scope": "tweet.read tweet.write users.read offline.access",
+})
+
+_LINKEDIN_TOKEN_RESPONSE = MappingProxyType({
+    "access_token": "linkedin_access_token_12345",
+    "token_type": "Bearer",
+    "expires_in": 5184000,  # 60 days
+    "scope": "openid profile w_member_social",
+})
+
+
+@pytest.fixture(scope="session")
 def mock_twitter_token_response():
     """Mock successful Twitter OAuth token response."""
-    return {
-        "access_token": "twitter_access_token_12345",
-        "refresh_token": "twitter_refresh_token_67890",
-        "token_type": "Bearer",
-        "expires_in": 7200,
-        "scope": "tweet.read tweet.write users.read offline.access",
-    }
+    return _TWITTER_TOKEN_RESPONSE
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_linkedin_token_response():
     """Mock successful LinkedIn OAuth token response."""
-    return {
-        "access_token": "linkedin_access_token_12345",
-        "token_type": "Bearer",
-        "expires_in": 5184000,  # 60 days
-        "scope": "openid profile w_member_social",
-    }
+    return _LINKEDIN_TOKEN_RESPONSE
 
 
 @pytest.fixture
@@ -135,17 +189,43 @@ def mock_user_secret_data():
 
 
 # FastAPI Test Client
-@pytest.fixture
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def async_client():
-    """Fixture providing async httpx client for testing FastAPI endpoints."""
-    from httpx import AsyncClient
+    """
+    Fixture providing async httpx client for testing FastAPI endpoints.
+
+    ASGITransport calls the app in-process without keeping connection
+    state, so one client is shared by the whole session.
+    """
+    from httpx import ASGITransport, AsyncClient
     from app.main import app
 
-    async with AsyncClient(app=app, base_url="http://test") as client:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         yield client
 
 
 # Environment variable mocking
+@pytest.fixture
+def oauth_settings(monkeypatch):
+    """
+    Replace the OAuth router's settings with a plain namespace.
+
+    Supabase is enabled and both platforms are configured; tests change
+    attributes on the returned namespace for other cases.
+    """
+    settings = SimpleNamespace(
+        USE_SUPABASE=True,
+        TWITTER_CLIENT_ID="test_client_id",
+        TWITTER_CLIENT_SECRET="test_client_secret",
+        TWITTER_REDIRECT_URI="http://localhost:3000/oauth/twitter/callback",
+        LINKEDIN_CLIENT_ID="test_linkedin_client",
+        LINKEDIN_CLIENT_SECRET="test_linkedin_secret",
+        LINKEDIN_REDIRECT_URI="http://localhost:3000/oauth/linkedin/callback",
+    )
+    monkeypatch.setattr("app.routers.oauth.settings", settings)
+    return settings
+
+
 @pytest.fixture
 def mock_oauth_settings():
     """Mock OAuth environment variables."""
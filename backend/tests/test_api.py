@@ -0,0 +1,54 @@
+"""
+Tests for the assembled FastAPI app, through the shared async client.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.database import get_db
+from app.main import app
+from app.middleware.auth import get_current_user
+
+
+@pytest.fixture
+def authenticated(mock_clerk_user_dependency):
+    """Override auth and the database session for the duration of a test."""
+    app.dependency_overrides[get_current_user] = mock_clerk_user_dependency
+    app.dependency_overrides[get_db] = lambda: AsyncMock()
+    yield
+    app.dependency_overrides.clear()
+
+
+class TestApp:
+    """Tests for routing, auth and validation across the app."""
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_health_check_is_public(self, async_client):
+        """Test that the health check answers without credentials."""
+        response = await async_client.get("/api/health")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_routes_require_auth(self, async_client):
+        """Test that API routes reject requests without a bearer token."""
+        response = await async_client.get("/api/providers/")
+
+        assert response.status_code == 401
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_list_providers(self, async_client, authenticated):
+        """Test that an authenticated request reaches the providers router."""
+        response = await async_client.get("/api/providers/")
+
+        assert response.status_code == 200
+        assert "llamacpp" in [p["name"] for p in response.json()["providers"]]
+
+    @pytest.mark.asyncio(loop_scope="session")
+    @pytest.mark.parametrize("limit", [0, 1001])
+    async def test_post_list_limit_out_of_range(self, async_client, authenticated, limit):
+        """Test that post list limits outside 1-1000 are rejected before the query runs."""
+        response = await async_client.get(f"/api/posts/?limit={limit}")
+
+        assert response.status_code == 422
@@ -0,0 +1,95 @@
+"""
+Tests for the batch API router.
+"""
+
+import pytest
+from fastapi import Request
+from unittest.mock import patch
+
+from app.main import app
+from app.middleware.auth import get_current_user
+from app.routers.batch import BatchResponseItem, _dispatch
+
+
+@pytest.fixture
+def seen_authorization(mock_clerk_user):
+    """Override auth, recording the Authorization header of every request it sees."""
+    seen = []
+
+    def current_user(request: Request):
+        seen.append(request.headers.get("authorization"))
+        return mock_clerk_user
+
+    app.dependency_overrides[get_current_user] = current_user
+    yield seen
+    app.dependency_overrides.clear()
+
+
+def _batch(*items):
+    return {"requests": [{"id": str(i), **item} for i, item in enumerate(items)]}
+
+
+class TestBatch:
+    """Tests for POST /api/batch/."""
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_results_keep_request_order(self, async_client, seen_authorization):
+        """Test that results come back in request order, whatever their status."""
+        response = await async_client.post("/api/batch/", json=_batch(
+            {"url": "/api/providers/"},
+            {"url": "/api/health"},
+            {"url": "/api/no-such-route"},
+        ))
+
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["id"] for r in results] == ["0", "1", "2"]
+        assert results[0]["status"] == 200
+        assert "providers" in results[0]["body"]
+        assert results[1] == {"id": "1", "status": 200, "body": {"status": "healthy"}}
+        assert results[2]["status"] == 404
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_rejects_writes_and_invalid_urls(self, async_client, seen_authorization):
+        """Test that non-GET items are a 405 and non-API or nested batch URLs a 400."""
+        response = await async_client.post("/api/batch/", json=_batch(
+            {"method": "POST", "url": "/api/drafts/"},
+            {"url": "/docs"},
+            {"url": "/api/batch/"},
+        ))
+
+        assert [(r["id"], r["status"]) for r in response.json()] == [
+            ("0", 405), ("1", 400), ("2", 400)
+        ]
+        # Only the batch call itself was authenticated; nothing was dispatched
+        assert len(seen_authorization) == 1
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_forwards_authorization(self, async_client, seen_authorization):
+        """Test that sub-requests carry the caller's Authorization header."""
+        await async_client.post(
+            "/api/batch/",
+            json=_batch({"url": "/api/providers/"}, {"url": "/api/providers/"}),
+            headers={"Authorization": "Bearer caller-token"},
+        )
+
+        assert seen_authorization == ["Bearer caller-token"] * 3
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_sub_request_exception_is_500(self, async_client, seen_authorization):
+        """Test that a sub-request that raises becomes a 500 item without failing the batch."""
+        async def dispatch(client, item):
+            if item.id == "0":
+                raise RuntimeError("boom")
+            return await _dispatch(client, item)
+
+        with patch("app.routers.batch._dispatch", side_effect=dispatch):
+            response = await async_client.post("/api/batch/", json=_batch(
+                {"url": "/api/providers/"}, {"url": "/api/health"},
+            ))
+
+        assert response.status_code == 200
+        assert response.json() == [
+            BatchResponseItem(id="0", status=500, body={"detail": "Sub-request failed"}).model_dump(),
+            {"id": "1", "status": 200, "body": {"status": "healthy"}},
+        ]
@@ -0,0 +1,91 @@
+"""
+Tests for the in-process TTL response cache.
+"""
+
+from unittest.mock import patch
+
+from app.services.llama_server_manager import LlamaServerManager
+from app.utils.cache import TTLCache
+
+
+class TestTTLCache:
+    """Tests for TTLCache."""
+
+    def test_get_returns_stored_value(self):
+        """Test that a stored value is returned before it expires."""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("key", {"value": 1})
+
+        assert cache.get("key") == {"value": 1}
+
+    def test_get_missing_key_returns_none(self):
+        """Test that unknown keys miss."""
+        cache = TTLCache(ttl_seconds=60)
+
+        assert cache.get("missing") is None
+
+    def test_entry_expires_after_ttl(self):
+        """Test that entries are dropped once the TTL elapses."""
+        cache = TTLCache(ttl_seconds=60)
+
+        with patch("app.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("key", "value")
+        with patch("app.utils.cache.time.monotonic", return_value=159.0):
+            assert cache.get("key") == "value"
+        with patch("app.utils.cache.time.monotonic", return_value=160.0):
+            assert cache.get("key") is None
+
+    def test_invalidate_specific_keys(self):
+        """Test that invalidate drops only the named keys."""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate("a")
+
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+    def test_invalidate_all(self):
+        """Test that invalidate without keys clears the cache."""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate()
+
+        assert cache.get("a") is None
+        assert cache.get("b") is None
+
+
+class TestModelListingCache:
+    """Tests for the GGUF model listing cache."""
+
+    def test_listing_refreshes_sizes_after_ttl(self, tmp_path):
+        """Test that a file growing in place shows its new size once the TTL elapses."""
+        manager = LlamaServerManager()
+        manager.cache_dir = str(tmp_path)
+        model = tmp_path / "model.gguf"
+        model.write_bytes(b"x" * 10)
+
+        with patch("app.services.llama_server_manager.time.monotonic", return_value=100.0):
+            assert manager.get_available_models()[0]["size"] == 10
+        # Appending doesn't touch the directory mtime
+        with model.open("ab") as f:
+            f.write(b"x" * 5)
+        with patch("app.services.llama_server_manager.time.monotonic", return_value=101.0):
+            assert manager.get_available_models()[0]["size"] == 10
+        with patch("app.services.llama_server_manager.time.monotonic", return_value=200.0):
+            assert manager.get_available_models()[0]["size"] == 15
+
+    def test_listing_returns_copies(self, tmp_path):
+        """Test that mutating a returned listing doesn't affect the cache."""
+        manager = LlamaServerManager()
+        manager.cache_dir = str(tmp_path)
+        (tmp_path / "model.gguf").write_bytes(b"x")
+
+        models = manager.get_available_models()
+        models[0]["size"] = 999
+        models.clear()
+
+        assert manager.get_available_models()[0]["size"] == 1
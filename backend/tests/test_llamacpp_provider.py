@@ -0,0 +1,31 @@
+"""
+Tests for extracting post text from llama.cpp completions.
+"""
+
+from app.providers.llamacpp import LlamaCppProvider
+
+
+class TestExtractContent:
+    """Tests for LlamaCppProvider._extract_content."""
+
+    def test_content_is_returned_when_present(self):
+        """Test that plain content wins over reasoning."""
+        provider = LlamaCppProvider()
+
+        assert provider._extract_content("Post text", "Answer: other", None, "stop") == "Post text"
+
+    def test_marker_line_takes_text_after_first_colon(self):
+        """Test that the first marker line with text supplies the answer."""
+        provider = LlamaCppProvider()
+        reasoning = "Let me think about it\nTweet:\nFinal ANSWER: Ship it: today\nOutput: later"
+
+        assert provider._extract_content("", reasoning, None, "stop") == "Ship it: today"
+
+    def test_falls_back_to_last_substantial_line(self):
+        """Test that without markers the last non-reasoning line is used."""
+        provider = LlamaCppProvider()
+        reasoning = "Small teams ship faster than big ones\nhmm, let me check that"
+
+        result = provider._extract_content("", reasoning, None, "length")
+
+        assert result == "Small teams ship faster than big ones"
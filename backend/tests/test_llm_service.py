@@ -0,0 +1,130 @@
+"""
+Tests for the LLM service content cache and call coalescing.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.services.llm_service import (
+    ContentCache,
+    LLMService,
+    PersistentContentCache,
+    clear_content_cache,
+)
+
+
+def make_key(prompt):
+    return (prompt, "", 500, 0.7, "general")
+
+
+class TestContentCache:
+    """Tests for ContentCache."""
+
+    def test_evicts_least_recently_used_past_byte_limit(self):
+        """Test that inserts past the byte budget evict the least recently used entry."""
+        cache = ContentCache(ttl_seconds=60, max_bytes=25)
+        cache.set(make_key("a"), "x" * 9)
+        cache.set(make_key("b"), "x" * 9)
+        cache.get(make_key("a"))
+
+        cache.set(make_key("c"), "x" * 9)
+
+        assert cache.get(make_key("b")) is None
+        assert cache.get(make_key("a")) == "x" * 9
+        assert cache.get(make_key("c")) == "x" * 9
+        assert cache.size == 20
+
+    def test_expired_entries_are_dropped_before_live_ones(self):
+        """Test that a full cache purges expired entries before evicting by recency."""
+        cache = ContentCache(ttl_seconds=60, max_bytes=30)
+        with patch("app.services.llm_service.time.monotonic", return_value=100.0):
+            cache.set(make_key("old"), "x" * 7)
+        with patch("app.services.llm_service.time.monotonic", return_value=150.0):
+            cache.set(make_key("live"), "x" * 6)
+        with patch("app.services.llm_service.time.monotonic", return_value=170.0):
+            cache.set(make_key("new"), "x" * 16)
+            assert cache.get(make_key("live")) == "x" * 6
+
+        assert len(cache) == 2
+
+    def test_oversized_content_is_not_cached(self):
+        """Test that an entry larger than the whole budget is skipped."""
+        cache = ContentCache(ttl_seconds=60, max_bytes=10)
+        cache.set(make_key("a"), "x" * 20)
+
+        assert cache.get(make_key("a")) is None
+        assert cache.size == 0
+
+    def test_replacing_entry_keeps_size_accurate(self):
+        """Test that overwriting a key doesn't double-count its bytes."""
+        cache = ContentCache(ttl_seconds=60, max_bytes=100)
+        cache.set(make_key("a"), "x" * 10)
+        cache.set(make_key("a"), "x" * 5)
+
+        assert cache.size == 6
+        assert cache.get(make_key("a")) == "x" * 5
+
+
+class TestPersistentContentCache:
+    """Tests for PersistentContentCache."""
+
+    def test_content_survives_reopening(self, tmp_path):
+        """Test that content stored by one instance is read back by the next."""
+        path = str(tmp_path / "llm_cache.db")
+        PersistentContentCache(path, ttl_seconds=60).set(make_key("a"), "stored")
+
+        cache = PersistentContentCache(path, ttl_seconds=60)
+
+        assert cache.get(make_key("a")) == "stored"
+        assert cache.get(make_key("b")) is None
+
+    def test_expired_content_is_not_returned(self, tmp_path):
+        """Test that rows past their wall-clock expiry are treated as missing."""
+        cache = PersistentContentCache(str(tmp_path / "llm_cache.db"), ttl_seconds=60)
+        with patch("app.services.llm_service.time.time", return_value=1000.0):
+            cache.set(make_key("a"), "stored")
+        with patch("app.services.llm_service.time.time", return_value=1061.0):
+            assert cache.get(make_key("a")) is None
+
+
+class TestGenerateContent:
+    """Tests for LLMService.generate_content."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_share_one_provider_call(self):
+        """Test that identical cache misses in flight together call the provider once."""
+        clear_content_cache()
+        provider = Mock()
+
+        async def generate_content(**kwargs):
+            await asyncio.sleep(0.01)
+            return "generated"
+
+        provider.generate_content = AsyncMock(side_effect=generate_content)
+
+        with patch("app.services.llm_service.get_provider", AsyncMock(return_value=provider)):
+            results = await asyncio.gather(
+                *(LLMService().generate_content("same prompt") for _ in range(3))
+            )
+
+        assert results == ["generated"] * 3
+        provider.generate_content.assert_awaited_once()
+        clear_content_cache()
+
+    @pytest.mark.asyncio
+    async def test_memory_miss_falls_back_to_persistent_cache(self, tmp_path):
+        """Test that content on disk is served without calling the provider."""
+        clear_content_cache()
+        persistent = PersistentContentCache(str(tmp_path / "llm_cache.db"), ttl_seconds=60)
+        persistent.set(("stored prompt", "", 500, 0.7, "general"), "from disk")
+        get_provider = AsyncMock()
+
+        with patch("app.services.llm_service._persistent_cache", persistent), \
+             patch("app.services.llm_service.get_provider", get_provider):
+            result = await LLMService().generate_content("stored prompt")
+
+        assert result == "from disk"
+        get_provider.assert_not_awaited()
+        clear_content_cache()
@@ -0,0 +1,109 @@
+"""
+Tests for keyset pagination cursors.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import Response
+
+from app.routers.posts import list_posts
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    decode_position_cursor,
+    encode_cursor,
+    encode_position_cursor,
+    parse_keyset_position,
+)
+
+
+class TestPaginationCursor:
+    """Tests for encode_cursor/decode_cursor."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the key it was built from."""
+        scheduled_time = datetime(2025, 1, 15, 9, 30, tzinfo=timezone.utc)
+
+        cursor = encode_cursor(scheduled_time, 42)
+
+        assert decode_cursor(cursor) == (scheduled_time, 42)
+
+    def test_round_trip_naive_datetime(self):
+        """Test that naive datetimes (SQLite rows) survive the round trip."""
+        scheduled_time = datetime(2025, 1, 15, 9, 30, 0, 123456)
+
+        assert decode_cursor(encode_cursor(scheduled_time, 7)) == (scheduled_time, 7)
+
+    def test_cursor_is_url_safe(self):
+        """Test that cursors can be passed as query params unescaped."""
+        cursor = encode_cursor(datetime(2025, 1, 15, tzinfo=timezone.utc), 1)
+
+        assert "=" not in cursor
+        assert "+" not in cursor
+        assert "/" not in cursor
+
+    @pytest.mark.parametrize("cursor", ["garbage!", "", "bm9waXBl"])
+    def test_malformed_cursor_raises_value_error(self, cursor):
+        """Test that malformed cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+
+class TestPositionCursor:
+    """Tests for encode_position_cursor/decode_position_cursor."""
+
+    def test_round_trip(self):
+        """Test that named positions survive the round trip."""
+        positions = {"drafts": ["2025-01-15T09:30:00+00:00", "abc"], "sync_timestamp": "x"}
+
+        assert decode_position_cursor(encode_position_cursor(positions)) == positions
+
+    @pytest.mark.parametrize("cursor", ["garbage!", "", "WzFd"])
+    def test_malformed_cursor_raises_value_error(self, cursor):
+        """Test that malformed or non-object cursors raise ValueError."""
+        with pytest.raises(ValueError):
+            decode_position_cursor(cursor)
+
+
+class TestKeysetPosition:
+    """Tests for parse_keyset_position."""
+
+    def test_reserializes_valid_position(self):
+        """Test that a valid pair comes back with normalized values."""
+        assert parse_keyset_position(
+            ["2025-01-01T00:00:00Z", "3F1C6A8E-0000-4000-8000-000000000001"]
+        ) == ("2025-01-01T00:00:00+00:00", "3f1c6a8e-0000-4000-8000-000000000001")
+        assert parse_keyset_position(["2025-01-01T00:00:00", 42]) == ("2025-01-01T00:00:00", "42")
+
+    @pytest.mark.parametrize("position", [
+        None,
+        ["x"],
+        ["2025-01-01T00:00:00", 1, 2],
+        'a",id.gt.0)',
+        ['a",id.gt.0)', 1],
+        ["2025-01-01T00:00:00", "1),or(id.gt.0"],
+        ["2025-01-01T00:00:00", True],
+        [1, 1],
+    ])
+    def test_malformed_position_raises_value_error(self, position):
+        """Test that anything but a (timestamp, UUID or int id) pair is rejected."""
+        with pytest.raises(ValueError):
+            parse_keyset_position(position)
+
+
+class TestPostListPaging:
+    """Tests for cursor headers on the post list endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_empty_page_sets_no_cursor(self):
+        """Test that an empty page with limit=0 returns no rows and no cursor."""
+        db = AsyncMock()
+        db.execute.return_value.scalars = Mock(return_value=Mock(all=Mock(return_value=[])))
+        response = Response()
+
+        posts = await list_posts(response, db=db, cursor=None, skip=0, limit=0, status=None, platform=None)
+
+        assert posts == []
+        assert NEXT_CURSOR_HEADER not in response.headers
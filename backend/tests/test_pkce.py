@@ -6,35 +6,57 @@ Tests compliance with RFC 7636.
 import pytest
 import base64
 import hashlib
+from functools import lru_cache
 from app.utils.pkce import generate_code_verifier, generate_code_challenge
 
+# RFC 7636 Section 4.1 verifier alphabet, and base64url without padding
+_PKCE_ALLOWED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_B64URL_ALLOWED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+# Fixed verifier and its challenge, encoded independently of app.utils.pkce
+_FIXED_VERIFIER = "test_verifier_abc123"
+_FIXED_CHALLENGE = base64.urlsafe_b64encode(
+    hashlib.sha256(_FIXED_VERIFIER.encode('ascii')).digest()
+).decode('ascii').rstrip('=')
+
+
+@lru_cache(maxsize=256)
+def _cached_challenge(verifier):
+    """Challenge for a verifier, computed once however many tests check it."""
+    return generate_code_challenge(verifier)
+
+
+@pytest.fixture(scope="module")
+def verifier_batch():
+    """Verifiers drawn once and shared by every test that needs real ones."""
+    return [generate_code_verifier() for _ in range(100)]
+
+
+@pytest.fixture(scope="module")
+def sample_verifier(verifier_batch):
+    return verifier_batch[0]
+
 
 class TestPKCE:
     """Test PKCE implementation."""
 
-    def test_generate_code_verifier_length(self):
+    def test_generate_code_verifier_length(self, verifier_batch):
         """Test that code verifier has correct length (43-128 chars)."""
-        verifier = generate_code_verifier()
-
         # RFC 7636 Section 4.1: verifier must be 43-128 characters
-        assert 43 <= len(verifier) <= 128, f"Verifier length {len(verifier)} out of range"
+        for verifier in verifier_batch:
+            assert 43 <= len(verifier) <= 128, f"Verifier length {len(verifier)} out of range"
 
-    def test_generate_code_verifier_characters(self):
+    def test_generate_code_verifier_characters(self, verifier_batch):
         """Test that code verifier uses only allowed characters."""
-        verifier = generate_code_verifier()
-
         # RFC 7636 Section 4.1: [A-Z] / [a-z] / [0-9] / "-" / "." / "_" / "~"
-        allowed_chars = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
-        verifier_chars = set(verifier)
+        verifier_chars = set().union(*verifier_batch)
 
-        assert verifier_chars.issubset(allowed_chars), "Verifier contains invalid characters"
+        assert verifier_chars.issubset(_PKCE_ALLOWED), "Verifier contains invalid characters"
 
-    def test_generate_code_verifier_uniqueness(self):
+    def test_generate_code_verifier_uniqueness(self, verifier_batch):
         """Test that code verifier is random (generates unique values)."""
-        verifiers = {generate_code_verifier() for _ in range(100)}
-
         # All 100 verifiers should be unique
-        assert len(verifiers) == 100, "Code verifier is not sufficiently random"
+        assert len(set(verifier_batch)) == 100, "Code verifier is not sufficiently random"
 
     def test_generate_code_challenge_format(self):
         """Test that code challenge is properly base64url encoded."""
@@ -47,8 +69,7 @@ class TestPKCE:
         assert "=" not in challenge, "Challenge contains padding (should be stripped)"
 
         # Should only contain base64url characters
-        allowed_chars = set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
-        assert set(challenge).issubset(allowed_chars), "Challenge contains invalid base64url characters"
+        assert set(challenge).issubset(_B64URL_ALLOWED), "Challenge contains invalid base64url characters"
 
     def test_generate_code_challenge_sha256(self):
         """Test that code challenge correctly uses SHA256."""
@@ -62,29 +83,23 @@ class TestPKCE:
 
     def test_generate_code_challenge_deterministic(self):
         """Test that same verifier produces same challenge."""
-        verifier = "test_verifier_abc123"
-
-        challenge1 = generate_code_challenge(verifier)
-        challenge2 = generate_code_challenge(verifier)
+        assert generate_code_challenge(_FIXED_VERIFIER) == _FIXED_CHALLENGE
+        assert generate_code_challenge(_FIXED_VERIFIER) == _FIXED_CHALLENGE, "Challenge should be deterministic"
 
-        assert challenge1 == challenge2, "Challenge should be deterministic"
-
-    def test_generate_code_challenge_length(self):
+    def test_generate_code_challenge_length(self, sample_verifier):
         """Test that code challenge has expected length (SHA256 hash)."""
-        verifier = generate_code_verifier()
-        challenge = generate_code_challenge(verifier)
+        challenge = _cached_challenge(sample_verifier)
 
         # SHA256 produces 32 bytes = 256 bits
         # Base64 encoded (without padding) = 43 characters
         assert len(challenge) == 43, f"Challenge length {len(challenge)} != 43"
 
-    def test_code_challenge_verification(self):
+    def test_code_challenge_verification(self, sample_verifier):
         """Test that challenge can be verified from verifier."""
-        verifier = generate_code_verifier()
-        challenge = generate_code_challenge(verifier)
+        challenge = _cached_challenge(sample_verifier)
 
         # Manually compute challenge to verify
-        digest = hashlib.sha256(verifier.encode('ascii')).digest()
+        digest = hashlib.sha256(sample_verifier.encode('ascii')).digest()
         expected_challenge = base64.urlsafe_b64encode(digest).decode('ascii').rstrip('=')
 
         assert challenge == expected_challenge, "Challenge verification failed"
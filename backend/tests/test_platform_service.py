@@ -0,0 +1,63 @@
+"""
+Tests for tweet truncation and error classification in the platform service.
+"""
+
+import httpx
+import pytest
+
+from app.services.platform_service import NonRetriableError, _raise_for_status, _truncate_tweet
+
+
+class TestTruncateTweet:
+    """Tests for _truncate_tweet."""
+
+    def test_short_content_is_unchanged(self):
+        """Test that content within the limit is returned as-is."""
+        content = "a" * 280
+
+        assert _truncate_tweet(content) is content
+
+    def test_ascii_content_truncated_to_limit(self):
+        """Test that long ASCII content is cut to 277 characters plus an ellipsis."""
+        result = _truncate_tweet("a" * 300)
+
+        assert result == "a" * 277 + "..."
+
+    def test_wide_characters_count_double(self):
+        """Test that CJK characters count twice toward the limit."""
+        assert _truncate_tweet("字" * 140) == "字" * 140
+
+        result = _truncate_tweet("字" * 141)
+
+        assert result == "字" * 138 + "..."
+
+    def test_does_not_split_emoji_modifier(self):
+        """Test that a skin tone modifier isn't separated from its emoji."""
+        content = "a" * 275 + "\U0001f44b\U0001f3fd" + "b" * 10
+
+        result = _truncate_tweet(content)
+
+        assert result == "a" * 275 + "..."
+
+
+class TestRaiseForStatus:
+    """Tests for _raise_for_status."""
+
+    @staticmethod
+    def make_response(status_code):
+        return httpx.Response(status_code, request=httpx.Request("POST", "https://api.twitter.com/2/tweets"))
+
+    def test_client_error_is_not_retriable(self):
+        """Test that a 4xx rejection raises NonRetriableError."""
+        with pytest.raises(NonRetriableError):
+            _raise_for_status(self.make_response(403))
+
+    @pytest.mark.parametrize("status_code", [408, 429, 503])
+    def test_transient_errors_stay_retriable(self, status_code):
+        """Test that timeouts, rate limits and server errors raise HTTPStatusError."""
+        with pytest.raises(httpx.HTTPStatusError):
+            _raise_for_status(self.make_response(status_code))
+
+    def test_success_does_not_raise(self):
+        """Test that a 2xx response passes through."""
+        _raise_for_status(self.make_response(201))
@@ -3,10 +3,11 @@ Tests for the scheduler service - scheduled job execution.
 """
 
 import pytest
+from types import SimpleNamespace
 from datetime import datetime, timezone, timedelta
 from unittest.mock import Mock, AsyncMock, patch
 from app.services.scheduler_service import SchedulerService, ScheduledPostData
-from app.models import ScheduledPost, PostStatus, PlatformType
+from app.models import PostStatus, PlatformType
 
 
 class TestSchedulerService:
@@ -37,6 +38,14 @@ class TestSchedulerService:
         assert scheduler_service.max_retries == 3
         assert len(scheduler_service.retry_delays) == 3
 
+    def test_retry_delay_is_jittered_within_backoff_step(self, scheduler_service):
+        """Test that retry delays vary between half and all of each backoff step."""
+        with patch('app.services.scheduler_service.random.uniform', side_effect=lambda a, b: b):
+            assert scheduler_service._retry_delay(0) == 300
+            assert scheduler_service._retry_delay(5) == 3600
+        with patch('app.services.scheduler_service.random.uniform', side_effect=lambda a, b: a):
+            assert scheduler_service._retry_delay(1) == 450
+
     def test_scheduler_stop(self, scheduler_service):
         """Test scheduler stops correctly."""
         scheduler_service.is_running = True
@@ -63,30 +72,38 @@ class TestSchedulerService:
             assert call_kwargs.kwargs['id'] == f"post_{mock_scheduled_post.id}_2"
             assert call_kwargs.kwargs['args'] == [mock_scheduled_post.id, 2]
 
-    def test_unschedule_post_removes_job(self, scheduler_service):
-        """Test unscheduling a post removes the job."""
+    def test_unschedule_post_removes_job(self, scheduler_service, mock_scheduled_post):
+        """Test unscheduling a post removes its job, whatever its retry count."""
+        scheduler_service.schedule_post(mock_scheduled_post, retry_count=2)
+
         with patch.object(scheduler_service.scheduler, 'remove_job') as mock_remove:
             scheduler_service.unschedule_post("test-post-123")
-            mock_remove.assert_called_once_with("post_test-post-123")
+            mock_remove.assert_called_once_with("post_test-post-123_2")
 
     def test_unschedule_post_handles_missing_job(self, scheduler_service):
-        """Test unscheduling a non-existent post doesn't raise."""
-        with patch.object(scheduler_service.scheduler, 'remove_job', side_effect=Exception("Job not found")):
-            # Should not raise
+        """Test unscheduling a non-existent post doesn't try to remove a job."""
+        with patch.object(scheduler_service.scheduler, 'remove_job') as mock_remove:
             scheduler_service.unschedule_post("nonexistent-post")
+            mock_remove.assert_not_called()
 
-    def test_unschedule_post_handles_int_id(self, scheduler_service):
+    def test_unschedule_post_handles_int_id(self, scheduler_service, mock_scheduled_post):
         """Test unscheduling works with integer post IDs (SQLite)."""
+        mock_scheduled_post.id = 123
+        scheduler_service.schedule_post(mock_scheduled_post)
+
         with patch.object(scheduler_service.scheduler, 'remove_job') as mock_remove:
             scheduler_service.unschedule_post(123)
-            mock_remove.assert_called_once_with("post_123")
+            mock_remove.assert_called_once_with("post_123_0")
 
-    def test_unschedule_post_handles_uuid_id(self, scheduler_service):
+    def test_unschedule_post_handles_uuid_id(self, scheduler_service, mock_scheduled_post):
         """Test unscheduling works with UUID post IDs (Supabase)."""
         uuid_id = "550e8400-e29b-41d4-a716-446655440000"
+        mock_scheduled_post.id = uuid_id
+        scheduler_service.schedule_post(mock_scheduled_post)
+
         with patch.object(scheduler_service.scheduler, 'remove_job') as mock_remove:
             scheduler_service.unschedule_post(uuid_id)
-            mock_remove.assert_called_once_with(f"post_{uuid_id}")
+            mock_remove.assert_called_once_with(f"post_{uuid_id}_0")
 
 
 class TestSchedulerServiceLoadPosts:
@@ -103,27 +120,32 @@ class TestSchedulerServiceLoadPosts:
     @pytest.mark.asyncio
     async def test_load_scheduled_posts_sqlite(self, scheduler_service):
         """Test loading posts from SQLite."""
-        mock_post = Mock()
-        mock_post.id = 1
-        mock_post.draft_id = 1
-        mock_post.platform = PlatformType.TWITTER
-        mock_post.content = "Test content"
-        mock_post.scheduled_time = datetime.now(timezone.utc) + timedelta(hours=1)
-        mock_post.status = PostStatus.SCHEDULED
-        mock_post.user_id = None
+        scheduled_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        row = (1, scheduled_time, PlatformType.TWITTER, "Test content")
 
-        mock_result = Mock()
-        mock_result.scalars.return_value.all.return_value = [mock_post]
+        async def stream_rows():
+            yield row
 
-        mock_db = Mock()
-        mock_db.execute.return_value = mock_result
+        mock_db = AsyncMock()
+        mock_db.stream.return_value = stream_rows()
+        mock_session = AsyncMock()
+        mock_session.__aenter__.return_value = mock_db
 
         with patch('app.services.scheduler_service.settings') as mock_settings:
             mock_settings.USE_SUPABASE = False
-            with patch('app.services.scheduler_service.SessionLocal', return_value=mock_db):
+            with patch('app.services.scheduler_service.AsyncSessionLocal', return_value=mock_session):
                 with patch.object(scheduler_service, 'schedule_post') as mock_schedule:
                     await scheduler_service._load_scheduled_posts()
-                    mock_schedule.assert_called_once_with(mock_post, retry_count=0)
+                    mock_session.__aexit__.assert_awaited_once()
+                    mock_schedule.assert_called_once_with(
+                        ScheduledPostData(
+                            id=1,
+                            scheduled_time=scheduled_time,
+                            platform=PlatformType.TWITTER,
+                            content="Test content",
+                        ),
+                        retry_count=0,
+                    )
 
     @pytest.mark.asyncio
     async def test_load_scheduled_posts_supabase(self, scheduler_service):
@@ -151,6 +173,38 @@ class TestSchedulerServiceLoadPosts:
                     await scheduler_service._load_scheduled_posts()
                     assert mock_schedule.call_count == 1
 
+    @pytest.mark.asyncio
+    async def test_load_scheduled_posts_supabase_pages(self, scheduler_service):
+        """Test that a full page is followed by a fetch after its last post."""
+        future_time = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+
+        def page(start, count):
+            return [
+                {
+                    "id": f"uuid-{i}",
+                    "platform": "twitter",
+                    "content": "Test content",
+                    "scheduled_time": future_time,
+                    "user_id": "user-789",
+                }
+                for i in range(start, start + count)
+            ]
+
+        mock_repo = Mock()
+        mock_repo.get_all_scheduled = AsyncMock(side_effect=[page(0, 2), page(2, 1)])
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch('app.services.scheduler_service.LOAD_BATCH_SIZE', 2):
+            mock_settings.USE_SUPABASE = True
+            with patch('app.database_supabase.ScheduledPostRepository', return_value=mock_repo):
+                with patch.object(scheduler_service, 'schedule_post') as mock_schedule:
+                    await scheduler_service._load_scheduled_posts()
+
+        assert mock_schedule.call_count == 3
+        assert mock_repo.get_all_scheduled.await_args_list[1].kwargs == {
+            "limit": 2, "after": (future_time, "uuid-1")
+        }
+
     @pytest.mark.asyncio
     async def test_load_scheduled_posts_skips_past_posts(self, scheduler_service):
         """Test that past posts are not scheduled."""
@@ -203,8 +257,7 @@ class TestScheduledPostRepository:
             {"id": "2", "status": "scheduled", "scheduled_time": "2025-01-01T11:00:00Z"},
         ]
 
-        mock_response = Mock()
-        mock_response.data = mock_posts
+        mock_response = SimpleNamespace(data=mock_posts)
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.order.return_value.execute.return_value = mock_response
 
         repo = ScheduledPostRepository(client=mock_supabase_client)
@@ -218,8 +271,7 @@ class TestScheduledPostRepository:
         """Test get_all_scheduled filters by scheduled status."""
         from app.database_supabase import ScheduledPostRepository
 
-        mock_response = Mock()
-        mock_response.data = []
+        mock_response = SimpleNamespace(data=[])
         mock_supabase_client.table.return_value.select.return_value.eq.return_value.order.return_value.execute.return_value = mock_response
 
         repo = ScheduledPostRepository(client=mock_supabase_client)
@@ -227,3 +279,228 @@ class TestScheduledPostRepository:
 
         # Verify eq was called with status filter
         mock_supabase_client.table.return_value.select.return_value.eq.assert_called_with("status", "scheduled")
+
+
+class TestSchedulerServicePublish:
+    """Tests for publishing scheduled posts."""
+
+    @pytest.fixture
+    def scheduler_service(self):
+        """Create a fresh scheduler service with a mocked platform service."""
+        service = SchedulerService()
+        service.platform_service = Mock()
+        service.platform_service.publish_post = AsyncMock(return_value={"success": True})
+        return service
+
+    @pytest.fixture
+    def snapshot(self):
+        return ScheduledPostData(
+            id="uuid-123",
+            scheduled_time=datetime.now(timezone.utc) + timedelta(hours=1),
+            platform=PlatformType.TWITTER,
+            content="Snapshot content",
+            user_id="user-789",
+        )
+
+    @pytest.mark.asyncio
+    async def test_publish_uses_snapshot_and_reads_only_status(self, scheduler_service, snapshot):
+        """Test that a scheduled post publishes its snapshot after a status-only read."""
+        mock_repo = Mock()
+        mock_repo.get_by_id_for_scheduler = AsyncMock(return_value={"status": "scheduled"})
+        mock_repo.update_status = AsyncMock(return_value={})
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch.object(scheduler_service.scheduler, 'add_job'):
+            mock_settings.USE_SUPABASE = True
+            scheduler_service.schedule_post(snapshot)
+            with patch('app.database_supabase.ScheduledPostRepository', return_value=mock_repo):
+                await scheduler_service._publish_post("uuid-123")
+
+        mock_repo.get_by_id_for_scheduler.assert_awaited_once_with("uuid-123", columns="status")
+        scheduler_service.platform_service.publish_post.assert_awaited_once_with(
+            platform="twitter", content="Snapshot content", user_id="user-789"
+        )
+
+    @pytest.mark.asyncio
+    async def test_sqlite_publish_from_snapshot_reads_only_status(self, scheduler_service, snapshot):
+        """Test that a post scheduled in this process publishes its snapshot after a status-only read."""
+        from app.services.scheduler_service import _POST_STATUS_STMT
+
+        mock_db = AsyncMock()
+        mock_db.execute.return_value.one_or_none = Mock(return_value=Mock(status=PostStatus.SCHEDULED))
+        mock_db.execute.return_value.first = Mock(return_value=(1,))
+        mock_session = AsyncMock()
+        mock_session.__aenter__.return_value = mock_db
+        snapshot.id = 1
+        snapshot.user_id = None
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch.object(scheduler_service.scheduler, 'add_job'):
+            mock_settings.USE_SUPABASE = False
+            scheduler_service.schedule_post(snapshot)
+            with patch('app.services.scheduler_service.AsyncSessionLocal', return_value=mock_session):
+                await scheduler_service._publish_post(1)
+
+        scheduler_service.platform_service.publish_post.assert_awaited_once_with(
+            platform="twitter", content="Snapshot content"
+        )
+        # The status read, then the status write
+        assert mock_db.execute.await_count == 2
+        assert mock_db.execute.await_args_list[0].args[0] is _POST_STATUS_STMT
+
+    @pytest.mark.asyncio
+    async def test_sqlite_publish_skips_post_cancelled_before_registration(self, scheduler_service, snapshot):
+        """Test that a snapshot registered after its post was cancelled doesn't publish it."""
+        mock_db = AsyncMock()
+        mock_db.execute.return_value.one_or_none = Mock(return_value=Mock(status=PostStatus.CANCELLED))
+        mock_session = AsyncMock()
+        mock_session.__aenter__.return_value = mock_db
+        snapshot.id = 1
+        snapshot.user_id = None
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch.object(scheduler_service.scheduler, 'add_job'):
+            mock_settings.USE_SUPABASE = False
+            # cancel_post ran before the router's background task registered the post
+            scheduler_service.unschedule_post(1)
+            scheduler_service.schedule_post(snapshot)
+            with patch('app.services.scheduler_service.AsyncSessionLocal', return_value=mock_session):
+                await scheduler_service._publish_post(1)
+
+        scheduler_service.platform_service.publish_post.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_sqlite_publish_skips_cancelled_post(self, scheduler_service, snapshot):
+        """Test that a post without a snapshot is read and skipped once cancelled."""
+        mock_db = AsyncMock()
+        mock_db.execute.return_value.one_or_none = Mock(return_value=Mock(
+            platform=PlatformType.TWITTER, content="Stored content", status=PostStatus.CANCELLED
+        ))
+        mock_session = AsyncMock()
+        mock_session.__aenter__.return_value = mock_db
+        snapshot.id = 1
+        snapshot.user_id = None
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch.object(scheduler_service.scheduler, 'add_job'):
+            mock_settings.USE_SUPABASE = False
+            scheduler_service.schedule_post(snapshot)
+            scheduler_service.unschedule_post(1)
+            with patch('app.services.scheduler_service.AsyncSessionLocal', return_value=mock_session):
+                await scheduler_service._publish_post(1)
+
+        mock_db.execute.assert_awaited_once()
+        scheduler_service.platform_service.publish_post.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_failed_publish_not_retried_once_cancelled(self, scheduler_service, snapshot):
+        """Test that a post cancelled during a failed attempt isn't put back on the schedule."""
+        scheduler_service.platform_service.publish_post.side_effect = RuntimeError("boom")
+        mock_repo = Mock()
+        mock_repo.get_by_id_for_scheduler = AsyncMock(return_value={"status": "scheduled"})
+        mock_repo.update_status = AsyncMock(side_effect=ValueError("Scheduled post not found"))
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch.object(scheduler_service.scheduler, 'add_job') as mock_add_job:
+            mock_settings.USE_SUPABASE = True
+            scheduler_service.schedule_post(snapshot)
+            with patch('app.database_supabase.ScheduledPostRepository', return_value=mock_repo):
+                await scheduler_service._publish_post("uuid-123")
+
+        assert mock_repo.update_status.await_args.kwargs["only_if_status"] == ["scheduled", "failed"]
+        assert mock_add_job.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_rejected_publish_fails_without_retry(self, scheduler_service, snapshot):
+        """Test that a post the platform rejects is marked failed on the first attempt."""
+        from app.services.platform_service import NonRetriableError
+
+        scheduler_service.platform_service.publish_post.side_effect = NonRetriableError("403 Forbidden")
+        mock_repo = Mock()
+        mock_repo.get_by_id_for_scheduler = AsyncMock(return_value={"status": "scheduled"})
+        mock_repo.update_status = AsyncMock(return_value={})
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch.object(scheduler_service.scheduler, 'add_job') as mock_add_job:
+            mock_settings.USE_SUPABASE = True
+            scheduler_service.schedule_post(snapshot)
+            with patch('app.database_supabase.ScheduledPostRepository', return_value=mock_repo):
+                await scheduler_service._publish_post("uuid-123")
+
+        assert mock_repo.update_status.await_args.kwargs["status"] == "failed"
+        assert mock_add_job.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_publishes_are_bounded(self, scheduler_service):
+        """Test that posts firing together share a limited number of publish slots."""
+        import asyncio
+
+        active = 0
+        max_active = 0
+
+        async def publish_post(**kwargs):
+            nonlocal active, max_active
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        scheduler_service.platform_service.publish_post = publish_post
+        scheduler_service._publish_slots = asyncio.Semaphore(2)
+        mock_repo = Mock()
+        mock_repo.get_by_id_for_scheduler = AsyncMock(return_value={
+            "status": "scheduled", "user_id": "user-789", "platform": "twitter", "content": "x"
+        })
+        mock_repo.update_status = AsyncMock(return_value={})
+
+        with patch('app.services.scheduler_service.settings') as mock_settings, \
+             patch('app.database_supabase.ScheduledPostRepository', return_value=mock_repo):
+            mock_settings.USE_SUPABASE = True
+            await asyncio.gather(*(scheduler_service._publish_post(f"uuid-{i}") for i in range(5)))
+
+        assert max_active == 2
+        assert mock_repo.update_status.await_count == 5
+
+
+class TestSchedulerEndpoints:
+    """Tests for the scheduler endpoints' request validation."""
+
+    @pytest.mark.asyncio
+    async def test_invalid_timezone_rejected_for_utc_timestamp(self, mock_clerk_user):
+        """Test that a bogus timezone is rejected even when the timestamp is already UTC."""
+        from fastapi import HTTPException
+        from app.routers.scheduler import ScheduleRequest, schedule_post
+
+        request = ScheduleRequest(
+            draft_id="1",
+            platform="twitter",
+            content="Hello",
+            scheduled_time="2030-01-01T12:00:00Z",
+            timezone="Not/AZone",
+        )
+
+        with pytest.raises(HTTPException) as exc_info:
+            await schedule_post(request, Mock(), user=mock_clerk_user, db=Mock())
+
+        assert exc_info.value.status_code == 400
+        assert "Invalid timezone" in exc_info.value.detail
+
+    @pytest.mark.asyncio
+    async def test_calendar_rejects_malformed_cursor_position(self, mock_clerk_user):
+        """Test that a calendar cursor that could rewrite the PostgREST filter is a 400."""
+        from fastapi import HTTPException
+        from app.routers.scheduler import get_calendar
+        from app.utils.pagination import encode_position_cursor
+
+        cursor = encode_position_cursor({"calendar": ['a",id.gt.0)', "1"]})
+        repo = Mock()
+        repo.get_calendar = AsyncMock(return_value=[])
+
+        with patch('app.routers.scheduler.settings') as mock_settings, \
+             patch('app.database_supabase.ScheduledPostRepository', return_value=repo):
+            mock_settings.USE_SUPABASE = True
+            with pytest.raises(HTTPException) as exc_info:
+                await get_calendar(user=mock_clerk_user, cursor=cursor, limit=10)
+
+        assert exc_info.value.status_code == 400
+        repo.get_calendar.assert_not_awaited()
@@ -0,0 +1,76 @@
+"""
+Tests for request coalescing (single-flight).
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test that concurrent callers with the same key run fn once."""
+        flights = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("key", fn) for _ in range(5)))
+
+        assert results == ["result"] * 5
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_key_released_after_completion(self):
+        """Test that a finished call does not serve later requests."""
+        flights = SingleFlight()
+        calls = 0
+
+        async def fn():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flights.do("key", fn) == 1
+        await asyncio.sleep(0)
+        assert await flights.do("key", fn) == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates_to_all_callers(self):
+        """Test that every waiting caller sees the shared failure."""
+        flights = SingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            raise ConnectionError("down")
+
+        results = await asyncio.gather(
+            flights.do("key", fn), flights.do("key", fn), return_exceptions=True
+        )
+
+        assert all(isinstance(r, ConnectionError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Test that cancelling one caller leaves the shared call running."""
+        flights = SingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flights.do("key", fn))
+        second = asyncio.ensure_future(flights.do("key", fn))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
@@ -0,0 +1,350 @@
+"""
+Tests for the sync router - push and pull processing.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.database_supabase import ConflictError, SyncMetadataRepository
+from app.routers.sync import (
+    SyncPullRequest,
+    SyncPushItem,
+    SyncPushRequest,
+    _status_cache,
+    sync_pull,
+    sync_push,
+    sync_status,
+)
+from app.utils.pagination import encode_position_cursor
+from tests.conftest import MockClerkUser
+
+
+class FakeDraftRepository:
+    """Draft repository that records call order and overlap."""
+
+    def __init__(self):
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def _track(self, name, draft_id):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.calls.append((name, draft_id))
+        self.active -= 1
+
+    async def upsert(self, user_id, draft_id, data, client_updated_at=None):
+        await self._track("upsert", draft_id)
+        if draft_id == "stale":
+            raise ConflictError("Draft was modified on another device", "2025-01-02T00:00:00")
+        return {"id": draft_id}, True
+
+    async def update(self, draft_id, user_id, data, client_updated_at=None):
+        await self._track("update", draft_id)
+        return {"id": draft_id}
+
+    async def delete(self, draft_id, user_id):
+        await self._track("delete", draft_id)
+        if draft_id == "missing":
+            raise RuntimeError("delete failed")
+        return draft_id != "gone"
+
+
+class TestSyncPush:
+    """Tests for sync_push."""
+
+    @pytest.fixture
+    def sync_repo(self):
+        repo = Mock()
+        repo.record_deletions_bulk = AsyncMock(return_value=[])
+        return repo
+
+    @pytest.fixture
+    def draft_repo(self, sync_repo):
+        repo = FakeDraftRepository()
+        with patch("app.routers.sync.settings") as mock_settings, \
+             patch("app.routers.sync.DraftRepository", return_value=repo), \
+             patch("app.routers.sync.ScheduledPostRepository", return_value=Mock()), \
+             patch("app.routers.sync.SyncMetadataRepository", return_value=sync_repo):
+            mock_settings.USE_SUPABASE = True
+            yield repo
+
+    @pytest.mark.asyncio
+    async def test_push_processes_entities_concurrently(self, draft_repo):
+        """Test that changes to different entities overlap."""
+        request = SyncPushRequest(changes=[
+            SyncPushItem(entity_type="draft", entity_id=f"d{i}", action="create", data={})
+            for i in range(5)
+        ])
+
+        response = await sync_push(request, user=MockClerkUser())
+
+        assert response.success_count == 5
+        assert draft_repo.max_active > 1
+
+    @pytest.mark.asyncio
+    async def test_push_keeps_order_per_entity(self, draft_repo):
+        """Test that changes to the same entity run in request order."""
+        request = SyncPushRequest(changes=[
+            SyncPushItem(entity_type="draft", entity_id="d1", action="create", data={}),
+            SyncPushItem(entity_type="draft", entity_id="d1", action="update", data={}),
+            SyncPushItem(entity_type="draft", entity_id="d1", action="delete"),
+        ])
+
+        await sync_push(request, user=MockClerkUser())
+
+        assert draft_repo.calls == [("upsert", "d1"), ("update", "d1"), ("delete", "d1")]
+
+    @pytest.mark.asyncio
+    async def test_push_reports_errors_in_order(self, draft_repo):
+        """Test that failures and unknown types become error results in place."""
+        request = SyncPushRequest(changes=[
+            SyncPushItem(entity_type="draft", entity_id="missing", action="delete"),
+            SyncPushItem(entity_type="note", entity_id="n1", action="create"),
+            SyncPushItem(entity_type="draft", entity_id="d2", action="create", data={}),
+        ])
+
+        response = await sync_push(request, user=MockClerkUser())
+
+        assert [r.entity_id for r in response.results] == ["missing", "n1", "d2"]
+        assert [r.status for r in response.results] == ["error", "error", "success"]
+        assert response.results[0].message == "delete failed"
+        assert response.error_count == 2
+        assert response.success_count == 1
+
+    @pytest.mark.asyncio
+    async def test_push_create_reports_upsert_conflict(self, draft_repo):
+        """Test that a create rejected by the upsert becomes a conflict result."""
+        request = SyncPushRequest(changes=[
+            SyncPushItem(entity_type="draft", entity_id="stale", action="create", data={}),
+        ])
+
+        response = await sync_push(request, user=MockClerkUser())
+
+        assert response.results[0].status == "conflict"
+        assert response.results[0].server_data == {"updated_at": "2025-01-02T00:00:00"}
+        assert response.conflict_count == 1
+
+    @pytest.mark.asyncio
+    async def test_push_records_deletions_in_one_call(self, draft_repo, sync_repo):
+        """Test that successful deletes are recorded with a single bulk insert."""
+        request = SyncPushRequest(changes=[
+            SyncPushItem(entity_type="draft", entity_id="d1", action="delete"),
+            SyncPushItem(entity_type="draft", entity_id="gone", action="delete"),
+            SyncPushItem(entity_type="draft", entity_id="d2", action="delete"),
+        ])
+
+        await sync_push(request, user=MockClerkUser())
+
+        sync_repo.record_deletions_bulk.assert_awaited_once()
+        user_id, deletions = sync_repo.record_deletions_bulk.await_args.args
+        assert user_id == "test_user_123"
+        assert sorted(deletions) == [("draft", "d1"), ("draft", "d2")]
+
+
+class TestSyncPull:
+    """Tests for sync_pull."""
+
+    @pytest.mark.asyncio
+    async def test_pull_combines_concurrent_reads(self):
+        """Test that pull returns the results of all three reads."""
+        draft_repo = Mock()
+        draft_repo.get_modified_since = AsyncMock(return_value=[{"id": "d1"}])
+        post_repo = Mock()
+        post_repo.get_modified_since = AsyncMock(return_value=[{"id": "p1"}])
+        sync_repo = Mock()
+        sync_repo.get_deletions_since = AsyncMock(return_value=["x1"])
+
+        with patch("app.routers.sync.settings") as mock_settings, \
+             patch("app.routers.sync.DraftRepository", return_value=draft_repo), \
+             patch("app.routers.sync.ScheduledPostRepository", return_value=post_repo), \
+             patch("app.routers.sync.SyncMetadataRepository", return_value=sync_repo):
+            mock_settings.USE_SUPABASE = True
+            response = await sync_pull(SyncPullRequest(), user=MockClerkUser())
+
+        assert response.drafts == [{"id": "d1"}]
+        assert response.scheduled_posts == [{"id": "p1"}]
+        assert response.deleted_ids == ["x1"]
+
+
+    @pytest.mark.asyncio
+    async def test_pull_pages_with_cursor(self):
+        """Test that a full stream yields a cursor and the next page resumes after it."""
+        d1, d2, d3 = (f"00000000-0000-4000-8000-00000000000{i}" for i in (1, 2, 3))
+        draft_repo = Mock()
+        draft_repo.get_modified_since = AsyncMock(side_effect=[
+            [
+                {"id": d1, "updated_at": "2025-01-01T00:00:00+00:00"},
+                {"id": d2, "updated_at": "2025-01-02T00:00:00+00:00"},
+                {"id": d3, "updated_at": "2025-01-03T00:00:00+00:00"},
+            ],
+            [{"id": d3, "updated_at": "2025-01-03T00:00:00+00:00"}],
+        ])
+        post_repo = Mock()
+        post_repo.get_modified_since = AsyncMock(return_value=[])
+        sync_repo = Mock()
+        sync_repo.get_deletions_since = AsyncMock(return_value=["x1"])
+
+        with patch("app.routers.sync.settings") as mock_settings, \
+             patch("app.routers.sync.DraftRepository", return_value=draft_repo), \
+             patch("app.routers.sync.ScheduledPostRepository", return_value=post_repo), \
+             patch("app.routers.sync.SyncMetadataRepository", return_value=sync_repo):
+            mock_settings.USE_SUPABASE = True
+            first = await sync_pull(SyncPullRequest(limit=2), user=MockClerkUser())
+            second = await sync_pull(
+                SyncPullRequest(limit=2, cursor=first.next_cursor), user=MockClerkUser()
+            )
+
+        assert [d["id"] for d in first.drafts] == [d1, d2]
+        assert first.has_more is True
+        assert draft_repo.get_modified_since.await_args.kwargs["after"] == (
+            "2025-01-02T00:00:00+00:00", d2
+        )
+        # Posts finished on the first page and deletions only come once
+        post_repo.get_modified_since.assert_awaited_once()
+        sync_repo.get_deletions_since.assert_awaited_once()
+        assert second.drafts == [{"id": d3, "updated_at": "2025-01-03T00:00:00+00:00"}]
+        assert second.deleted_ids == []
+        assert second.has_more is False
+        assert second.next_cursor is None
+        assert second.sync_timestamp == first.sync_timestamp
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("position", [
+        ["x"],
+        ['a",id.gt.0)', "00000000-0000-4000-8000-000000000001"],
+        ["2025-01-01T00:00:00+00:00", "1),or(id.gt.0"],
+    ])
+    async def test_pull_rejects_malformed_cursor_position(self, position):
+        """Test that a cursor position that isn't a (timestamp, id) pair is a 400."""
+        cursor = encode_position_cursor({
+            "drafts": position, "sync_timestamp": "2025-01-01T00:00:00",
+        })
+        draft_repo = Mock()
+        draft_repo.get_modified_since = AsyncMock(return_value=[])
+
+        with patch("app.routers.sync.settings") as mock_settings, \
+             patch("app.routers.sync.DraftRepository", return_value=draft_repo):
+            mock_settings.USE_SUPABASE = True
+            with pytest.raises(HTTPException) as exc_info:
+                await sync_pull(SyncPullRequest(cursor=cursor), user=MockClerkUser())
+
+        assert exc_info.value.status_code == 400
+        draft_repo.get_modified_since.assert_not_awaited()
+
+
+class TestSyncStatus:
+    """Tests for sync_status caching."""
+
+    @pytest.mark.asyncio
+    async def test_status_cached_until_push(self):
+        """Test that status is served from cache and a push clears it."""
+        _status_cache.invalidate()
+        sync_repo = Mock()
+        sync_repo.get_user_counts = AsyncMock(
+            return_value={"draft_count": 1, "scheduled_post_count": 0}
+        )
+        sync_repo.record_deletions_bulk = AsyncMock(return_value=[])
+
+        with patch("app.routers.sync.settings") as mock_settings, \
+             patch("app.routers.sync.DraftRepository", return_value=FakeDraftRepository()), \
+             patch("app.routers.sync.ScheduledPostRepository", return_value=Mock()), \
+             patch("app.routers.sync.SyncMetadataRepository", return_value=sync_repo):
+            mock_settings.USE_SUPABASE = True
+            first = await sync_status(user=MockClerkUser())
+            second = await sync_status(user=MockClerkUser())
+            assert sync_repo.get_user_counts.await_count == 1
+            assert second == first
+            assert first["draft_count"] == 1
+            # Each caller gets its own copy of the cached status
+            second["draft_count"] = 99
+            assert (await sync_status(user=MockClerkUser()))["draft_count"] == 1
+
+            await sync_push(
+                SyncPushRequest(changes=[
+                    SyncPushItem(entity_type="draft", entity_id="d2", action="create", data={})
+                ]),
+                user=MockClerkUser(),
+            )
+            await sync_status(user=MockClerkUser())
+
+        assert sync_repo.get_user_counts.await_count == 2
+
+
+class TestDraftRepositoryConflicts:
+    """Tests for DraftRepository.update conflict detection."""
+
+    @pytest.mark.asyncio
+    async def test_update_raises_conflict_when_server_is_newer(self, mock_supabase_client):
+        """Test that a newer server copy raises ConflictError with its timestamp."""
+        from datetime import datetime, timezone
+
+        from app.database_supabase import DraftRepository
+
+        mock_table = mock_supabase_client.table.return_value
+        mock_table.limit = Mock(return_value=mock_table)
+        mock_table.execute.return_value.data = [{"updated_at": "2025-01-02T00:00:00+00:00"}]
+
+        repo = DraftRepository(client=mock_supabase_client)
+        with pytest.raises(ConflictError) as exc_info:
+            await repo.update(
+                "d1",
+                "test_user_123",
+                {"content": "new"},
+                client_updated_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            )
+
+        assert exc_info.value.server_updated_at == "2025-01-02T00:00:00+00:00"
+        mock_table.update.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_update_propagates_api_errors(self, mock_supabase_client):
+        """Test that a failed lookup isn't reported as a missing draft."""
+        from datetime import datetime, timezone
+
+        from app.database_supabase import DraftRepository
+
+        mock_table = mock_supabase_client.table.return_value
+        mock_table.limit = Mock(return_value=mock_table)
+        mock_table.execute.side_effect = RuntimeError("connection reset")
+
+        repo = DraftRepository(client=mock_supabase_client)
+        with pytest.raises(RuntimeError, match="connection reset"):
+            await repo.update(
+                "d1",
+                "test_user_123",
+                {"content": "new"},
+                client_updated_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+            )
+
+
+class TestSyncMetadataRepository:
+    """Tests for SyncMetadataRepository deletion lookups."""
+
+    @pytest.mark.asyncio
+    async def test_get_deletions_since_without_timestamp(self, fake_supabase_client):
+        """Test that every recorded deletion is returned when no timestamp is given."""
+        fake_supabase_client.data = [{"entity_id": "a"}, {"entity_id": "b"}]
+
+        deleted = await SyncMetadataRepository(client=fake_supabase_client).get_deletions_since("user_123")
+
+        assert deleted == ["a", "b"]
+        assert not any(name == "gte" for name, _ in fake_supabase_client.calls)
+
+    @pytest.mark.asyncio
+    async def test_get_deletions_since_filters_by_timestamp(self, fake_supabase_client):
+        """Test that a timestamp narrows the query to later deletions."""
+        since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        fake_supabase_client.data = [{"entity_id": "a"}]
+
+        deleted = await SyncMetadataRepository(client=fake_supabase_client).get_deletions_since(
+            "user_123", since
+        )
+
+        assert deleted == ["a"]
+        assert ("gte", ("created_at", since.isoformat())) in fake_supabase_client.calls
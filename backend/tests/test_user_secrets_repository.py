@@ -0,0 +1,67 @@
+"""
+Tests for UserSecretsRepository.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from app.database_supabase import UserSecretsRepository, _secret_cache
+
+
+class TestUserSecretsRepository:
+    """Test UserSecretsRepository lookups."""
+
+    @pytest.fixture(autouse=True)
+    def clear_secret_cache(self):
+        _secret_cache.invalidate()
+        yield
+        _secret_cache.invalidate()
+
+    @pytest.mark.asyncio
+    async def test_get_secret_returns_secret_data(self, mock_supabase_client):
+        """Test that get_secret executes the query and returns the stored data."""
+        mock_table = mock_supabase_client.table.return_value
+        mock_table.limit = Mock(return_value=mock_table)
+        mock_table.execute.return_value.data = [
+            {"secret_data": {"access_token": "tok", "expires_at": "2025-01-01T00:00:00+00:00"}}
+        ]
+
+        repo = UserSecretsRepository(mock_supabase_client)
+        secret = await repo.get_secret("user_123", "twitter")
+
+        assert secret["access_token"] == "tok"
+        assert secret["expires_at_epoch"] == 1735689600.0
+        mock_table.execute.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_get_secret_missing_returns_none(self, mock_supabase_client):
+        """Test that a user without the secret gets None."""
+        mock_table = mock_supabase_client.table.return_value
+        mock_table.limit = Mock(return_value=mock_table)
+        mock_table.execute.return_value.data = []
+
+        repo = UserSecretsRepository(mock_supabase_client)
+
+        assert await repo.get_secret("user_123", "linkedin") is None
+
+    @pytest.mark.asyncio
+    async def test_get_secret_cached_until_upsert(self, mock_supabase_client):
+        """Test that repeat lookups skip Supabase and a write forces a refetch."""
+        mock_table = mock_supabase_client.table.return_value
+        mock_table.limit = Mock(return_value=mock_table)
+        mock_table.execute.return_value.data = [
+            {"secret_data": {"access_token": "tok", "expires_at": "2025-01-01T00:00:00"}}
+        ]
+
+        repo = UserSecretsRepository(mock_supabase_client)
+        first = await repo.get_secret("user_123", "twitter")
+        second = await repo.get_secret("user_123", "twitter")
+        assert mock_table.execute.call_count == 1
+        assert second == first
+        # Naive expiries are stored from utcnow
+        assert first["expires_at_epoch"] == 1735689600.0
+
+        await repo.upsert_secret("user_123", "twitter", {"access_token": "new"})
+        await repo.get_secret("user_123", "twitter")
+
+        assert mock_table.execute.call_count == 3
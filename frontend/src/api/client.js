@@ -133,8 +133,23 @@ export const schedulerApi = {
     if (endDate) params.end_date = endDate;
     // Add cache-busting parameter if requested
     if (cacheBust) params._t = Date.now();
-    const response = await client.get("/scheduler/calendar", { params });
-    return response.data;
+
+    // The calendar is paged; follow next_cursor and merge the date groups
+    const calendar = {};
+    let total = 0;
+    let cursor = null;
+    do {
+      const response = await client.get("/scheduler/calendar", {
+        params: cursor ? { ...params, cursor } : params,
+      });
+      for (const [date, posts] of Object.entries(response.data.calendar)) {
+        calendar[date] = (calendar[date] || []).concat(posts);
+      }
+      total += response.data.total;
+      cursor = response.data.next_cursor;
+    } while (cursor);
+
+    return { calendar, total };
   },
 };
 
@@ -258,9 +273,10 @@ export const providersApi = {
 
 // Sync API
 export const syncApi = {
-  pull: async (lastSyncAt = null) => {
+  pull: async (lastSyncAt = null, cursor = null) => {
     const response = await client.post("/sync/pull", {
       last_sync_at: lastSyncAt,
+      cursor,
     });
     return response.data;
   },
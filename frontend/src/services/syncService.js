@@ -251,11 +251,23 @@ class SyncService {
     const lastSync = this.getLastSyncTime()
 
     try {
-      const response = await this.apiClient.post('/api/sync/pull', {
-        last_sync_at: lastSync
-      })
-
-      const { drafts, scheduled_posts, deleted_ids, sync_timestamp } = response.data
+      // Pulls are paged; keep requesting until the server has nothing more
+      const drafts = []
+      const scheduled_posts = []
+      const deleted_ids = []
+      let sync_timestamp = null
+      let cursor = null
+      do {
+        const response = await this.apiClient.post('/api/sync/pull', {
+          last_sync_at: lastSync,
+          cursor
+        })
+        drafts.push(...response.data.drafts)
+        scheduled_posts.push(...response.data.scheduled_posts)
+        deleted_ids.push(...response.data.deleted_ids)
+        sync_timestamp = response.data.sync_timestamp
+        cursor = response.data.next_cursor
+      } while (cursor)
 
       // Notify store to merge changes
       this.notify({